@@ -0,0 +1,161 @@
+import collections
+import threading
+import time
+
+try:
+    from .framestore import newFrame, newMetadata, writeMetadata
+except ImportError:
+    from framestore import newFrame, newMetadata, writeMetadata
+
+# What FrameQueue.put() does when the queue is full.
+#
+#   - DropOldest: discard the oldest queued frame to make room,
+#   - DropNewest: discard the incoming frame,
+#   - Block: wait until the consumer makes room.
+#
+OVERFLOW_POLICIES = ('DropOldest', 'DropNewest', 'Block')
+
+class QueueClosed(Exception):
+    pass
+
+class FrameQueue(object):
+    """ A bounded, thread-safe queue of (frame, metadata) pairs.
+
+    Frames that are discarded because of the overflow policy are counted in
+    [dropped].
+    """
+    def __init__(self, maxsize=16, overflow='DropOldest'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise Exception("Unknown overflow policy: " + str(overflow) +
+                ". Must be one of " + str(OVERFLOW_POLICIES) + ".")
+        self.maxsize = int(maxsize)
+        self.overflow = overflow
+        self.items = collections.deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def __len__(self):
+        with self.cond:
+            return len(self.items)
+
+    def close(self):
+        """ Wake any waiting producer or consumer. Frames already queued can
+        still be taken.
+        """
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def get(self, timeout=None):
+        """ Return the oldest (frame, metadata) pair, waiting up to [timeout]
+        seconds.
+
+        Returns None on timeout, or if the queue is closed and empty.
+        """
+        with self.cond:
+            if timeout is None:
+                while not self.items and not self.closed:
+                    self.cond.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self.items and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+            if self.items:
+                rtn = self.items.popleft()
+                self.cond.notify_all()
+            else:
+                rtn = None
+        return rtn
+
+    def getAll(self):
+        """ Return all queued (frame, metadata) pairs without waiting. """
+        with self.cond:
+            rtn = list(self.items)
+            self.items.clear()
+            self.cond.notify_all()
+        return rtn
+
+    def put(self, item):
+        """ Add an item, applying the overflow policy if the queue is full.
+
+        Returns False if the item was not queued.
+        """
+        with self.cond:
+            if self.closed:
+                raise QueueClosed()
+            if len(self.items) >= self.maxsize:
+                if self.overflow == 'DropOldest':
+                    self.items.popleft()
+                    self.dropped += 1
+                elif self.overflow == 'DropNewest':
+                    self.dropped += 1
+                    return False
+                elif self.overflow == 'Block':
+                    while len(self.items) >= self.maxsize and \
+                    not self.closed:
+                        self.cond.wait()
+                    if self.closed:
+                        raise QueueClosed()
+            self.items.append(item)
+            self.cond.notify_all()
+        return True
+
+class AcquisitionThread(threading.Thread):
+    """ A producer thread that pulls grab results from a Basler camera into
+    a FrameQueue.
+
+    Each frame is copied out of the driver's buffer so that the buffer can be
+    handed straight back to pylon, and queued alongside a FRAME_METADATA_DTYPE
+    record. Binning, AOI and flips done on the host (see
+    Basler.getHostTransform()) are applied as for read().
+    """
+    def __init__(self, camera, queue, read_timeout_ms=1000, pixel_format=None):
+        super(AcquisitionThread, self).__init__(daemon=True)
+        self.camera = camera
+        self.pixel_format = pixel_format
+        self.queue = queue
+        self.read_timeout_ms = read_timeout_ms
+        self.failed = 0
+        self.sequence = 0
+        self.stop_event = threading.Event()
+
+    def run(self):
+        transform = self.camera.host_transform
+        if transform.isIdentity():
+            transform = None
+        try:
+            while not self.stop_event.is_set() and self.camera.isExposing():
+                grabResult = self.camera.retrieveResult(self.read_timeout_ms)
+                if grabResult.IsValid() and grabResult.GrabSucceeded():
+                    img = newFrame(grabResult, self.pixel_format)
+                    meta = newMetadata(1)[0]
+                    writeMetadata(grabResult, meta, sequence=self.sequence)
+                    grabResult.Release()
+                    if transform is not None:
+                        img = transform.apply(img)
+                    self.camera.clock.annotate(meta)
+                    self.sequence += 1
+                    self.queue.put((img, meta))
+                    self.camera.grab_stats.observeQueueDepth(len(self.queue))
+                else:
+                    if grabResult.IsValid():
+                        grabResult.Release()
+                    self.failed += 1
+        except QueueClosed:
+            pass
+        finally:
+            self.queue.close()
+
+    def stop(self, timeout=None):
+        """ Ask the thread to finish and wait for it.
+
+        The thread may take up to the read timeout to notice.
+        """
+        self.stop_event.set()
+        self.queue.close()
+        if self.is_alive():
+            self.join(timeout)
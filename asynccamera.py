@@ -0,0 +1,110 @@
+import asyncio
+import concurrent.futures
+import functools
+
+class AsyncBasler(object):
+    """ An asyncio interface to a Basler camera.
+
+    Every method of the wrapped [camera] is available as a coroutine, e.g.
+    `await cam.setExposureTimeMicroseconds(1000)` or `await cam.read(1)`.
+    The blocking calls run on a single-threaded executor dedicated to this
+    camera, so a slow camera only delays its own calls, and calls to one
+    camera never run concurrently with each other.
+
+    Frames can be iterated with `async for frame in cam.frames()`; see
+    frames() for how grabbing is stopped when leaving the loop early.
+
+    Used as an async context manager, the camera is connected on entry and
+    disconnected, and the executor shut down, on exit.
+    """
+    def __init__(self, camera, loop=None):
+        self.camera = camera
+        self.loop = loop
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+            thread_name_prefix='camera')
+
+    def __getattr__(self, name):
+        attr = getattr(self.camera, name)
+        if not callable(attr):
+            return attr
+
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        method.__name__ = name
+        method.__doc__ = attr.__doc__
+        return method
+
+    async def __aenter__(self):
+        await self.run(self.camera.connect)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            await self.run(self.camera.disconnect)
+        finally:
+            self.close()
+
+    def close(self):
+        """ Shut down the executor once queued calls have finished. """
+        self.executor.shutdown(wait=False)
+
+    async def frames(self, grab_strategy='OneByOne', n_frames=None,
+        poll_ms=100, max_grab_attempts=None):
+        """ Start grabbing and yield frames as they arrive, until [n_frames]
+        frames have been yielded, or forever if it is None.
+
+        Frames are read [poll_ms] at a time, so other calls to this camera
+        and cancellation wait no longer than that. If [max_grab_attempts] is
+        given, iteration ends after that many consecutive polls without a
+        frame.
+
+        Grabbing stops when iteration ends by itself, or when the generator
+        is closed. Leaving an `async for` loop early with break or an
+        exception doesn't close it, so grabbing would carry on until it is
+        garbage collected: iterate it inside `contextlib.aclosing()`
+        (Python 3.10 and later), e.g.
+
+            async with contextlib.aclosing(cam.frames()) as frames:
+                async for frame in frames:
+                    ...
+
+        or call its aclose() when done. Cancelling the iterating task stops
+        grabbing too.
+        """
+        await self.run(self.camera.beginExpose, grab_strategy)
+        try:
+            n_yielded = 0
+            n_empty = 0
+            while n_frames is None or n_yielded < n_frames:
+                imgs = await self.run(self.camera.read, 1,
+                    read_timeout_ms=poll_ms, max_grab_attempts=1)
+                if not imgs:
+                    n_empty += 1
+                    if max_grab_attempts is not None and \
+                    n_empty >= max_grab_attempts:
+                        break
+                    continue
+                n_empty = 0
+                n_yielded += 1
+                yield imgs[0]
+        finally:
+            # Shielded, so that grabbing still stops if the task is
+            # cancelled again while waiting.
+            #
+            await asyncio.shield(self.run(self.camera.endExpose))
+
+    async def get(self, name):
+        """ Return the value of node [name]. """
+        return await self.run(self.camera.getNodeValue, name)
+
+    def run(self, fn, *args, **kwargs):
+        """ Run a blocking call on this camera's executor and return a
+        future for its result.
+        """
+        loop = self.loop or asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, functools.partial(fn,
+            *args, **kwargs))
+
+    async def set(self, name, value):
+        """ Set node [name] to [value]. """
+        return await self.run(self.camera.setNodeValue, name, value)
@@ -1,41 +1,366 @@
+import contextlib
+import importlib
 import time
 
-import cv2
-from pypylon import pylon
-from pypylon import genicam
-
 try:
+    from .acquisition import AcquisitionThread, FrameQueue
+    from .burst import Burst
     from .cameras import camera
-except ModuleNotFoundError:
+    from .clock import ClockModel, ClockSync
+    from .events import EventGrabber
+    from .framehandle import FrameHandle, HandleTracker
+    from .framestore import FrameStore, newFrame, newMetadata, \
+        pixelFormatDtype, writeFrame, writeMetadata
+    from .hostops import HostTransform
+    from .metrics import GrabStats
+    from .packed import isPacked, newScratch
+    from .recorder import Recorder
+    from .sequencer import Sequencer
+    from .timing import transmissionSeconds
+except ImportError:
+    from acquisition import AcquisitionThread, FrameQueue
+    from burst import Burst
     from cameras import camera
+    from clock import ClockModel, ClockSync
+    from events import EventGrabber
+    from framehandle import FrameHandle, HandleTracker
+    from framestore import FrameStore, newFrame, newMetadata, \
+        pixelFormatDtype, writeFrame, writeMetadata
+    from hostops import HostTransform
+    from metrics import GrabStats
+    from packed import isPacked, newScratch
+    from recorder import Recorder
+    from sequencer import Sequencer
+    from timing import transmissionSeconds
+
+# Names of the modules providing the pylon and genicam APIs for each backend,
+# selected with Basler.find(). Names starting with '.' are relative to this
+# package. The modules are only imported by loadBackend(), when a camera is
+# first used, so importing this module doesn't need the driver. More
+# backends can be added with registerBackend().
+#
+BACKENDS = {
+    'pylon': ('pypylon.pylon', 'pypylon.genicam'),
+    'simulated': ('.simulated.pylon', '.simulated.genicam')
+}
+
+# (pylon, genicam) modules of the backends imported so far.
+#
+loaded_backends = {}
+
+# Nodes whose values only change when the host writes to the camera, mapped to
+# the nodes whose writes can change them. Their values are cached for the
+# duration of a session and invalidated by setNodeValue().
+#
+CACHED_NODES = {
+    'BinningHorizontal': ('BinningHorizontal',),
+    'BinningVertical': ('BinningVertical',),
+    'DeviceUserID': ('DeviceUserID',),
+    'GevSCPSPacketSize': ('GevSCPSPacketSize',),
+    'Height': ('Height', 'BinningVertical'),
+    'MaxNumBuffer': ('MaxNumBuffer',),
+    'OffsetX': ('OffsetX', 'Width', 'BinningHorizontal'),
+    'OffsetY': ('OffsetY', 'Height', 'BinningVertical'),
+    'PayloadSize': ('Width', 'Height', 'PixelFormat', 'BinningHorizontal', 
+        'BinningVertical', 'ChunkModeActive', 'ChunkEnable', 'SequenceEnable',
+        'SequenceSetTotalNumber'),
+    'PixelFormat': ('PixelFormat',),
+    'ReadoutTimeAbs': ('Width', 'Height', 'OffsetY', 'PixelFormat', 
+        'BinningHorizontal', 'BinningVertical'),
+    'Width': ('Width', 'BinningHorizontal')
+}
+
+# Nodes that fall back to a host-side setter when the camera doesn't 
+# implement them, mapped to that setter.
+#
+HOST_FALLBACK_SETTERS = {
+    'BinningHorizontal': 'setBinningHorizontal',
+    'BinningVertical': 'setBinningVertical',
+    'ReverseX': 'setImageFlipX',
+    'ReverseY': 'setImageFlipY'
+}
+
+def importModule(name):
+    """ Import module [name], relative to this package if it starts with
+    '.'.
+    """
+    if name.startswith('.'):
+        if __package__:
+            return importlib.import_module(name, __package__)
+        name = name[1:]
+    return importlib.import_module(name)
+
+def loadBackend(name):
+    """ Return the (pylon, genicam) modules of backend [name], importing
+    them on first use.
+    """
+    if name not in loaded_backends:
+        try:
+            modules = BACKENDS[name]
+        except KeyError:
+            raise Exception("Unknown backend: " + str(name) + ". Must be " +
+                "one of " + str(list(BACKENDS)) + ".")
+        loaded_backends[name] = tuple(importModule(module) for module in
+            modules)
+    return loaded_backends[name]
+
+def registerBackend(name, pylon_module, genicam_module):
+    """ Add backend [name], given the names of the modules providing its
+    pylon and genicam APIs.
+    """
+    BACKENDS[name] = (pylon_module, genicam_module)
+    loaded_backends.pop(name, None)
+
+# Chunks enabled by default by Basler.enableChunks(). Framecounter must be
+# among any chunks enabled for the others to be read, see
+# framestore.writeChunks().
+#
+DEFAULT_CHUNKS = ('Framecounter', 'Timestamp', 'ExposureTime', 'GainAll')
 
 class Basler(camera):
+    # Names of the horizontal and vertical binning mode nodes, which vary 
+    # between models. None if the model has no binning mode.
+    #
+    BINNING_MODE_NODES = None
+
+    # Delay between the trigger and the start of exposure, from the model's 
+    # user manual, as it can't be read from the camera.
+    #
+    EXPOSURE_START_DELAY_US = 0.
+
     def __init__(self):
         super(Basler, self).__init__()
-
-    def beginExpose(self, grab_strategy='LatestImageOnly'):
+        self.frame_store = None
+        self.acquisition_thread = None
+        self.event_grabber = None
+        self.frame_queue = None
+        self.clock = ClockModel()
+        self.clock_sync = None
+        self.sequencer = None
+        self.handle_tracker = HandleTracker()
+        self.host_transform = HostTransform()
+        self.grab_stats = GrabStats()
+        self.backend = 'pylon'
+        self.session_camera = None
+        self.nodes = {}
+        self.node_cache = {}
+
+    @property
+    def genicam(self):
+        """ The genicam module of the backend in use. """
+        return loadBackend(self.backend)[1]
+
+    @property
+    def pylon(self):
+        """ The pylon module of the backend in use. """
+        return loadBackend(self.backend)[0]
+
+    @contextlib.contextmanager
+    def acquire(self, grab_strategy='OneByOne', queue_size=16, 
+        overflow='DropOldest', read_timeout_ms=1000):
+        """ Context manager that grabs frames in the background for the 
+        duration of the block.
+
+        Frames are taken with getFrame() or getFramesNoWait(). endExpose() is 
+        always called on exit.
+        """
+        self.beginExpose(grab_strategy, background=True, 
+            queue_size=queue_size, overflow=overflow, 
+            read_timeout_ms=read_timeout_ms)
+        try:
+            yield self
+        finally:
+            self.endExpose()
+
+    def beginExpose(self, grab_strategy='LatestImageOnly', background=False, 
+        queue_size=16, overflow='DropOldest', read_timeout_ms=1000, 
+        on_frame=None, event_driven=False, zero_copy=False):
+        """ Start grabbing.
+
+        If [background] is True, a producer thread pulls frames into a 
+        bounded queue of [queue_size] frames so that grabbing can overlap 
+        with processing. [overflow] is one of 'DropOldest', 'DropNewest' or 
+        'Block' and decides what happens when the consumer falls behind. 
+        Frames are then taken with getFrame() or getFramesNoWait() rather 
+        than read().
+
+        If [on_frame] is given, or [event_driven] is True, grabbing is 
+        event-driven instead: pylon's own grab loop thread hands each frame 
+        to [on_frame] (a function, or a list of them, called as 
+        on_frame(frame, meta)) and, with [background], to the queue, as 
+        soon as it arrives. [zero_copy] gives the callbacks frames viewing 
+        the driver's buffers, valid until they return. See 
+        events.EventGrabber for how long a callback may hold a frame; the 
+        grabber is available as [event_grabber]. read() can't be used.
+
+        Returns True once grabbing has started, or None if it couldn't be,
+        in which case no thread or handler is left running.
+        """
+        event_driven = event_driven or on_frame is not None
+        if event_driven:
+            if on_frame is None:
+                callbacks = []
+            elif callable(on_frame):
+                callbacks = [on_frame]
+            else:
+                callbacks = list(on_frame)
+            queue = FrameQueue(queue_size, overflow) if background else None
+            self.connect()
+            self.event_grabber = EventGrabber(self, callbacks, queue=queue, 
+                zero_copy=zero_copy)
+            self.event_grabber.start()
+            grab_loop = self.pylon.GrabLoop_ProvidedByInstantCamera
+        else:
+            grab_loop = self.pylon.GrabLoop_ProvidedByUser
+        rtn = None
         try:
             self.connect()
             self.grab_strategy = grab_strategy
-            if self.grab_strategy == 'OneByOne':   
-                rtn = self.camera.StartGrabbing(
-                    pylon.GrabStrategy_OneByOne)
-                
+            if self.grab_strategy == 'OneByOne':
+                self.camera.StartGrabbing(
+                    self.pylon.GrabStrategy_OneByOne, grab_loop)
+                rtn = True
+
             elif self.grab_strategy == 'LatestImageOnly':
-                rtn = self.camera.StartGrabbing(
-                    pylon.GrabStrategy_LatestImageOnly)
+                self.camera.StartGrabbing(
+                    self.pylon.GrabStrategy_LatestImageOnly, grab_loop)
+                rtn = True
+        except:
+            rtn = None
+        if not rtn:
+            # Nothing is grabbing, so no thread is started. The handler is
+            # deregistered, or the next beginExpose() would add a second one.
+            #
+            if event_driven:
+                self.event_grabber.stop()
+                self.event_grabber = None
+            return rtn
+        if event_driven:
+            self.frame_queue = self.event_grabber.queue
+        elif background:
+            self.frame_queue = FrameQueue(queue_size, overflow)
+            self.acquisition_thread = AcquisitionThread(self, 
+                self.frame_queue, read_timeout_ms=read_timeout_ms, 
+                pixel_format=self.getPixelFormat())
+            self.acquisition_thread.start()
+        return rtn
+
+    def broadcast(self, name=None, capacity=32, max_subscribers=8):
+        """ Start publishing frames to other processes through a ring of 
+        [capacity] frames in shared memory; see broadcast.FramePublisher.
+
+        The camera must already be grabbing. Processes read the frames with 
+        broadcast.FrameSubscriber(publisher.name). Returns the publisher, 
+        which should be closed when done.
+        """
+        # Imported here, as shared memory is only needed when broadcasting.
+        #
+        try:
+            from .broadcast import FramePublisher
+        except ImportError:
+            from broadcast import FramePublisher
+        publisher = FramePublisher(self, name=name, capacity=capacity, 
+            max_subscribers=max_subscribers)
+        publisher.start()
+        return publisher
+
+    def burst(self, n_frames, read_timeout_ms=1000, max_grab_attempts=3, 
+        max_in_flight=None):
+        """ Acquire [n_frames] triggered frames with triggers pipelined 
+        behind readout and transmission; see burst.Burst. 
+
+        The trigger must be configured first with configureTrigger(). 
+        Returns (data, meta), the frames and their burst.BURST_METADATA_DTYPE 
+        records, including the trigger that exposed each frame.
+        """
+        burst = Burst(self, max_in_flight=max_in_flight)
+        return burst.run(n_frames, read_timeout_ms=read_timeout_ms, 
+            max_grab_attempts=max_grab_attempts)
+
+    def checkNoHostTransform(self, operation):
+        """ Raise if binning, AOI or flips are applied on the host (see 
+        getHostTransform()), which [operation] can't do as it fills buffers 
+        sized to the frames the camera sends.
+        """
+        if not self.host_transform.isIdentity():
+            raise Exception(operation + " can't apply the binning, AOI or " +
+                "flips done on the host for settings the camera doesn't " +
+                "implement; use read() or getFrame() instead.")
+
+    def configureSequencer(self, sets, executions=1, advance='Auto', 
+        source='AlwaysActive'):
+        """ Upload parameter sets to the camera's sequencer and enable it, 
+        so that frames cycle through [sets] without any register writes; 
+        see sequencer.Sequencer.
+
+        [sets] is a list of configurations as for sendParameters(). With 
+        [advance] 'Auto', each set is used for [executions] frames before 
+        the next; with 'Controlled', the set moves on when [source] fires 
+        (e.g. 'AlwaysActive', 'Line1', or 'Disabled' for 
+        sequencer.advance()). Each frame's metadata records the set that 
+        exposed it in 'sequence_set'. Pass [sets] None to disable the 
+        sequencer. Must be called while not grabbing.
+
+        Returns the Sequencer, also kept in [sequencer].
+        """
+        if sets is None:
+            Sequencer(self).stop()
+            self.sequencer = None
+            return None
+        self.sequencer = Sequencer(self)
+        self.sequencer.upload(sets, executions)
+        self.sequencer.start(advance, source)
+        return self.sequencer
+
+    def configureTrigger(self, source='Software', delay_us=0, 
+        activation='RisingEdge', burst_frames=None):
+        """ Configure triggered acquisition.
+
+        [source] is 'Software' or an input line, e.g. 'Line1', and 
+        [delay_us] the delay between the trigger and exposure. If 
+        [burst_frames] is given, each trigger starts a burst of that many 
+        frames at the free-running rate (an acquisition start trigger); 
+        otherwise each trigger exposes one frame (a frame start trigger). 
+        The other trigger is switched off. Pass [source] None to switch 
+        both off and free-run.
+        """
+        try:
+            if source is None:
+                self.setTriggerMode('Off', 'AcquisitionStart')
+                rtn = self.setTriggerMode('Off', 'FrameStart')
+                return rtn
+            selector = 'FrameStart'
+            other = 'AcquisitionStart'
+            if burst_frames is not None:
+                selector, other = other, selector
+                self.setAcquisitionFrameCount(burst_frames)
+            self.setTriggerMode('Off', other)
+            self.setNodeValue('TriggerSelector', selector)
+            self.setNodeValue('TriggerSource', source)
+            self.setNodeValue('TriggerActivation', activation)
+            self.setNodeValue('TriggerDelayAbs', delay_us)
+            rtn = self.setNodeValue('TriggerMode', 'On')
         except:
             rtn = None
         return rtn
 
     def connect(self):
-        """ Open connection to a camera. """
+        """ Open connection to a camera. 
+
+        Once a connection has been made, later calls return immediately 
+        without asking the camera whether it is still open, until 
+        disconnect() is called or [self.camera] is replaced.
+        """
         try:
             assert self.camera is not None
-            if not self.camera.IsOpen():
+            if self.session_camera is self.camera:
+                rtn = True
+            elif not self.camera.IsOpen():
                 rtn = self.camera.Open()
+                self.startSession()
             else:
                 rtn = True
+                self.startSession()
         except AssertionError:
             raise Exception("No camera is currently defined. You may need " + 
             "to run find() first.")  
@@ -44,8 +369,10 @@ class Basler(camera):
 
     def disconnect(self):
         """ Disconnect from a camera. """
+        self.stopClockSync()
         try:
             assert self.camera is not None
+            self.session_camera = None
             if self.camera.IsOpen():
                 rtn = self.camera.Close()
             else:
@@ -55,50 +382,100 @@ class Basler(camera):
             rtn = None    
         return rtn
 
+    def enableChunks(self, chunks=DEFAULT_CHUNKS, enable=True):
+        """ Have the camera append [chunks] (ChunkSelector entries) to 
+        every frame, or stop sending them if [enable] is False.
+
+        The chunk values are read into each frame's metadata (frame_counter, 
+        timestamp, exposure_us, gain and sequence_set) from the payload, at 
+        no extra register access. Must be called while not grabbing, as the 
+        payload size changes. Chunk mode is switched off when no chunk is 
+        left enabled.
+        """
+        try:
+            if enable:
+                self.setNodeValue('ChunkModeActive', True)
+            for chunk in chunks:
+                self.setNodeValue('ChunkSelector', chunk)
+                self.setNodeValue('ChunkEnable', enable)
+            if not enable and not self.getEnabledChunks():
+                self.setNodeValue('ChunkModeActive', False)
+            rtn = True
+        except:
+            rtn = None
+        return rtn
+
     def endExpose(self):
+        if self.acquisition_thread is not None:
+            self.acquisition_thread.stop()
+            self.acquisition_thread = None
         try:
             self.connect()
             rtn = self.camera.StopGrabbing()
             self.grab_strategy = None
         except:
             rtn = None
+        # Deregistered once grabbing has stopped, so no callback is running.
+        #
+        if self.event_grabber is not None:
+            self.event_grabber.stop()
+            self.event_grabber = None
         return rtn
 
-    def find(self, serial_number=None, assign=True):
+    def find(self, serial_number=None, assign=True, backend=None):
         """ Find a camera.
 
         The search can be conducted with or without a serial number. If 
         [serial_number] is not specified, the routine will return the first 
-        available camera.
+        available camera. A device user ID or IP address can be given in 
+        place of the serial number.
+
+        Devices are looked up in the backend's shared 
+        discovery.DeviceDirectory, so the devices are enumerated once for 
+        many calls rather than on every call.
 
         If [assign] is set to True, the returned camera will be assigned to 
         [self.camera].
+
+        [backend] selects the pylon implementation from BACKENDS, e.g. 
+        'simulated' for a camera model that needs no hardware or driver. 
+        The backend in use is kept if [backend] is None. Its modules are 
+        imported here, on first use.
         """
-        tlFactory = pylon.TlFactory.GetInstance()
-        devices = tlFactory.EnumerateDevices()
         try:
-            if serial_number is not None:
-                for i, dev in enumerate(devices):
-                    if int(dev.GetSerialNumber()) == int(serial_number):
-                        camera = pylon.InstantCamera(
-                            tlFactory.CreateDevice(devices[i]))
-                        break
-            else:
-                if len(devices) > 0:
-                    camera = pylon.InstantCamera(
-                        pylon.TlFactory.GetInstance().CreateFirstDevice())
-            assert camera is not None
+            from .discovery import getDirectory
+        except ImportError:
+            from discovery import getDirectory
+        if backend is not None:
+            loadBackend(backend)
+            self.backend = backend
+        pylon = self.pylon
+        try:
+            device = getDirectory(self.backend).lookup(serial_number)
+            assert device is not None
+            camera = pylon.InstantCamera(
+                pylon.TlFactory.GetInstance().CreateDevice(device))
         except:
             raise Exception("Failed to find camera.")
 
         if assign:
             self.camera = camera
+        return camera
 
     def getAcquisitionMode(self):
         """ Get when the camera stops waiting for triggers. """
         try:
-            self.connect()
-            rtn = self.camera.AcquisitionMode.GetValue('Continuous')
+            rtn = self.getNodeValue('AcquisitionMode')
+        except:
+            rtn = None
+        return rtn
+
+    def getAcquisitionFrameCount(self):
+        """ Return the number of frames exposed per acquisition start 
+        trigger.
+        """
+        try:
+            rtn = self.getNodeValue('AcquisitionFrameCount')
         except:
             rtn = None
         return rtn
@@ -110,11 +487,10 @@ class Basler(camera):
         and height.
         """
         try:
-            self.connect()
-            x_offset = self.camera.OffsetX.GetValue()
-            y_offset = self.camera.OffsetY.GetValue()
-            w = self.camera.Width.GetValue()
-            h = self.camera.Height.GetValue()   
+            x_offset = self.getNodeValue('OffsetX')
+            y_offset = self.getNodeValue('OffsetY')
+            w = self.getNodeValue('Width')
+            h = self.getNodeValue('Height')   
             rtn = (w, h, x_offset, y_offset)
         except:
             rtn = None
@@ -123,8 +499,7 @@ class Basler(camera):
     def getBandwidthAssigned(self):
         """ Return the bandwidth assigned to the camera in bytes/s. """
         try:
-            self.connect()
-            rtn = self.camera.GevSCBWA.GetValue()
+            rtn = self.getNodeValue('GevSCBWA')
         except:
             rtn = None
         return rtn
@@ -132,8 +507,7 @@ class Basler(camera):
     def getBandwidthReserve(self):
         """ Return the % of bwa reserved to resend packets. """
         try:
-            self.connect()
-            rtn = self.camera.GevSCBWRA.GetValue()
+            rtn = self.getNodeValue('GevSCBWRA')
         except:
             rtn = None
         return rtn
@@ -141,8 +515,7 @@ class Basler(camera):
     def getBinningHorizontal(self):
         """ Return the horizontal binning factor. """
         try:
-            self.connect()
-            rtn = self.camera.BinningHorizontal.GetValue()
+            rtn = self.getNodeValue('BinningHorizontal')
         except:
             rtn = None
         return rtn
@@ -150,8 +523,7 @@ class Basler(camera):
     def getBinningHorizontalMode(self):
         """ Return the horizontal binning mode. """
         try:
-            self.connect()
-            rtn = self.camera.BinningHorizontalMode.GetValue()
+            rtn = self.getNodeValue('BinningHorizontalMode')
         except:
             rtn = None
         return rtn        
@@ -159,8 +531,7 @@ class Basler(camera):
     def getBinningVertical(self):
         """ Return the vertical binning factor. """
         try:
-            self.connect()
-            rtn = self.camera.BinningVertical.GetValue()
+            rtn = self.getNodeValue('BinningVertical')
         except:
             rtn = None
         return rtn
@@ -168,8 +539,7 @@ class Basler(camera):
     def getBinningVerticalMode(self):
         """ Return the vertical binning mode. """
         try:
-            self.connect()
-            rtn = self.camera.BinningVerticalMode.GetValue()
+            rtn = self.getNodeValue('BinningVerticalMode')
         except:
             rtn = None
         return rtn        
@@ -177,8 +547,7 @@ class Basler(camera):
     def getBlackLevel(self):
         """ Return the DC bias level. """
         try:
-            self.connect()
-            rtn = self.camera.BlackLevelRaw.GetValue()
+            rtn = self.getNodeValue('BlackLevelRaw')
         except:
             rtn = None
         return rtn
@@ -186,17 +555,29 @@ class Basler(camera):
     def getDeviceUserID(self):
         """ Return the device ID. """
         try:
-            self.connect()
-            rtn = self.camera.DeviceUserID.GetValue()
+            rtn = self.getNodeValue('DeviceUserID')
         except:
             rtn = None
         return rtn          
 
+    def getEnabledChunks(self):
+        """ Return the chunks sent with each frame. """
+        try:
+            if not self.getNodeValue('ChunkModeActive'):
+                return []
+            rtn = []
+            for chunk in self.getNode('ChunkSelector').GetSymbolics():
+                self.setNodeValue('ChunkSelector', chunk)
+                if self.getNodeValue('ChunkEnable'):
+                    rtn.append(chunk)
+        except:
+            rtn = None
+        return rtn
+
     def getExposureTimeMicroseconds(self):
         """ Return the exposure time in microseconds. """
         try:
-            self.connect()
-            rtn = self.camera.ExposureTimeAbs.GetValue()
+            rtn = self.getNodeValue('ExposureTimeAbs')
         except:
             rtn = None
         return rtn
@@ -204,17 +585,37 @@ class Basler(camera):
     def getFrameRate(self):
         """ Return the frame rate. """
         try:
-            self.connect()
-            rtn = self.camera.ResultingFrameRateAbs.GetValue()
+            rtn = self.getNodeValue('ResultingFrameRateAbs')
         except: 
             rtn = None     
         return rtn 
 
+    def getFrame(self, timeout=None):
+        """ Return the next (frame, metadata) pair from the background 
+        acquisition queue, waiting up to [timeout] seconds.
+
+        Returns None on timeout or if background acquisition isn't running.
+        """
+        if self.frame_queue is None:
+            return None
+        return self.frame_queue.get(timeout)
+
+    def getFramesNoWait(self):
+        """ Return all (frame, metadata) pairs currently in the background 
+        acquisition queue without waiting.
+        """
+        if self.frame_queue is None:
+            return []
+        return self.frame_queue.getAll()
+
+    def getFrameStore(self):
+        """ Return the frame store used by read(), or None. """
+        return self.frame_store
+
     def getGain(self):
         """ Return the gain. """
         try:
-            self.connect()
-            rtn = self.camera.GainRaw.GetValue()
+            rtn = self.getNodeValue('GainRaw')
         except:
             rtn = None
         return rtn
@@ -222,8 +623,7 @@ class Basler(camera):
     def getGainAuto(self):
         """ Return the automatic gain mode. """
         try:
-            self.connect()
-            rtn = self.camera.GainAuto.GetValue()
+            rtn = self.getNodeValue('GainAuto')
         except:
             rtn = None
         return rtn                    
@@ -231,8 +631,7 @@ class Basler(camera):
     def getImageFlipX(self):
         """ Return the x-axis flipping mode. """
         try:
-            self.connect()
-            rtn = self.camera.ReverseX.GetValue()
+            rtn = self.getNodeValue('ReverseX')
         except:
             rtn = None   
         return rtn
@@ -240,8 +639,7 @@ class Basler(camera):
     def getImageFlipY(self):
         """ Return the y-axis flipping mode. """
         try:
-            self.connect()
-            rtn = self.camera.ReverseY.GetValue()
+            rtn = self.getNodeValue('ReverseY')
         except:
             rtn = None 
         return rtn    
@@ -249,21 +647,53 @@ class Basler(camera):
     def getIPD(self):
         """ Return delay between sending packets in ticks. """
         try:
-            self.connect()
-            rtn = self.camera.GevSCPD.GetValue()
+            rtn = self.getNodeValue('GevSCPD')
         except:
             rtn = None
         return rtn          
 
+    def getHostTransform(self):
+        """ Return the binning, AOI and flips applied on the host for 
+        settings the camera doesn't implement. 
+        """
+        return self.host_transform
+
     def getMaxNumBuffers(self):
         """ Return the maximum number of buffers available. """
         try:
-            self.connect()
-            rtn = self.camera.MaxNumBuffer.GetValue()
+            rtn = self.getNodeValue('MaxNumBuffer')
         except:
             rtn = None
         return rtn  
 
+    def getNode(self, name):
+        """ Return the GenICam node [name], resolving it once per session. 
+        """
+        self.connect()
+        try:
+            node = self.nodes[name]
+        except KeyError:
+            node = getattr(self.camera, name)
+            self.nodes[name] = node
+        return node
+
+    def getNodeValue(self, name):
+        """ Return the value of node [name].
+
+        Values of nodes in CACHED_NODES are read from the camera once and 
+        then served from the cache until a dependent node is set.
+        """
+        node = self.getNode(name)
+        if name in CACHED_NODES:
+            try:
+                rtn = self.node_cache[name]
+            except KeyError:
+                rtn = node.GetValue()
+                self.node_cache[name] = rtn
+        else:
+            rtn = node.GetValue()
+        return rtn
+
     def getFrameOverheadsSeconds(self):
         """ Return the frame overhead in seconds.
 
@@ -273,17 +703,23 @@ class Basler(camera):
                 - time between reading out and transmitting 
                 (transmission_start_delay)
                 - time to transfer frame to host (transmission_delay)
+
+            The exposure start delay is taken from EXPOSURE_START_DELAY_US. 
+            See timing.TimingModel to predict these for other settings.
         """
         try:
-            transmission_delay_uS = self.getPayloadSize()/\
-                self.getThroughputCurrent()*10**6
-            transmission_start_delay_uS = self.getTransmissionStartDelay()       
+            tick_frequency_hz = self.getNodeValue('GevTimestampTickFrequency')
+            transmission_delay_S = transmissionSeconds(self.getPayloadSize(),
+                self.getPacketSize(), self.getBandwidthAssigned(), 
+                ipd=self.getIPD(), tick_frequency_hz=tick_frequency_hz)
+            transmission_start_delay_S = self.getTransmissionStartDelay()/\
+                tick_frequency_hz
             readout_time_uS = self.getReadoutTime()       
             rtn = {
-                'exposure_start_delay': self.exposure_start_delay_uS/10**6,
+                'exposure_start_delay': self.EXPOSURE_START_DELAY_US/10**6,
                 'readout_time': readout_time_uS/10**6,
-                'transmission_start_delay': transmission_start_delay_uS/10**6,
-                'transmission_delay': transmission_delay_uS/10**6
+                'transmission_start_delay': transmission_start_delay_S,
+                'transmission_delay': transmission_delay_S
             }
         except:
             rtn = None
@@ -292,8 +728,7 @@ class Basler(camera):
     def getPacketSize(self):
         """ Return the size used for packets in bytes. """
         try:
-            self.connect()
-            rtn = self.camera.GevSCPSPacketSize.GetValue()
+            rtn = self.getNodeValue('GevSCPSPacketSize')
         except:
             rtn = None
         return rtn
@@ -303,8 +738,7 @@ class Basler(camera):
         pixel format.
         """
         try:
-            self.connect()
-            rtn = self.camera.PayloadSize.GetValue()
+            rtn = self.getNodeValue('PayloadSize')
         except:
             rtn = None
         return rtn
@@ -312,8 +746,7 @@ class Basler(camera):
     def getPixelFormat(self):
         """ Return the pixel format. """
         try:
-            self.connect()
-            rtn = self.camera.PixelFormat.GetValue()
+            rtn = self.getNodeValue('PixelFormat')
         except:
             rtn = None
         return rtn
@@ -321,8 +754,7 @@ class Basler(camera):
     def getReadoutTime(self):
         """ Return the readout time. """
         try:
-            self.connect()
-            rtn = self.camera.ReadoutTimeAbs.GetValue()
+            rtn = self.getNodeValue('ReadoutTimeAbs')
         except:
             rtn = None
         return rtn
@@ -330,9 +762,8 @@ class Basler(camera):
     def getTemperature(self, sensor_name='Coreboard'):
         """ Return a temperature measurement. """
         try:
-            self.connect()
-            self.camera.TemperatureSelector.SetValue(sensor_name)
-            rtn = self.camera.TemperatureAbs.GetValue()
+            self.setNodeValue('TemperatureSelector', sensor_name)
+            rtn = self.getNodeValue('TemperatureAbs')
         except:
             rtn = None
         return rtn      
@@ -340,8 +771,7 @@ class Basler(camera):
     def getTemperatureState(self, sensor_name='Coreboard'):
         """ Return the detector's temperature state. """
         try:
-            self.connect()
-            rtn = self.camera.TemperatureState.GetValue()
+            rtn = self.getNodeValue('TemperatureState')
         except:
             rtn = None
         return rtn
@@ -349,8 +779,7 @@ class Basler(camera):
     def getThroughputCurrent(self):
         """ Return the current device throughput in bytes/s. """
         try:
-            self.connect()
-            rtn = self.camera.GevSCDCT.GetValue()
+            rtn = self.getNodeValue('GevSCDCT')
         except:
             rtn = None
         return rtn
@@ -360,12 +789,71 @@ class Basler(camera):
         the host in ticks.
         """
         try:
-            self.connect()
-            rtn = self.camera.GevSCFTD.GetValue()
+            rtn = self.getNodeValue('GevSCFTD')
         except:
             rtn = None    
         return rtn 
 
+    def getTriggerDelayMicroseconds(self, selector='FrameStart'):
+        """ Return the delay between trigger and exposure of [selector]. """
+        try:
+            self.setNodeValue('TriggerSelector', selector)
+            rtn = self.getNodeValue('TriggerDelayAbs')
+        except:
+            rtn = None
+        return rtn
+
+    def getTriggerMode(self, selector='FrameStart'):
+        """ Return whether the [selector] trigger is 'On' or 'Off'. """
+        try:
+            self.setNodeValue('TriggerSelector', selector)
+            rtn = self.getNodeValue('TriggerMode')
+        except:
+            rtn = None
+        return rtn
+
+    def getTriggerSelector(self):
+        """ Return the trigger that is on, 'FrameStart' or 
+        'AcquisitionStart', or None if the camera is free-running.
+        """
+        for selector in ('FrameStart', 'AcquisitionStart'):
+            if self.getTriggerMode(selector) == 'On':
+                return selector
+        return None
+
+    def getTriggerSource(self, selector='FrameStart'):
+        """ Return the source of the [selector] trigger. """
+        try:
+            self.setNodeValue('TriggerSelector', selector)
+            rtn = self.getNodeValue('TriggerSource')
+        except:
+            rtn = None
+        return rtn
+
+    def hasNode(self, name):
+        """ Return True if the camera implements node [name].
+
+        Only a node the connected camera reports as missing counts as not
+        implemented: failing to connect raises, as for connect().
+        """
+        self.connect()
+        try:
+            node = self.getNode(name)
+        except self.genicam.LogicalErrorException:
+            return False
+        return bool(self.genicam.IsImplemented(node))
+
+    def invalidateCache(self, name=None):
+        """ Forget cached node values that depend on node [name], or all 
+        cached values if [name] is None.
+        """
+        if name is None:
+            self.node_cache.clear()
+        else:
+            for cached, dependencies in CACHED_NODES.items():
+                if name in dependencies:
+                    self.node_cache.pop(cached, None)
+
     def isExposing(self):
         try:
             if self.camera.IsGrabbing():
@@ -376,26 +864,241 @@ class Basler(camera):
             rtn = None
         return rtn
 
-    def read(self, n_images=1, read_timeout_ms=1000, max_grab_attempts=3):
+    def latchTimestamp(self):
+        """ Read the camera clock together with the host clock.
+
+        Returns (ticks, host_time, uncertainty_s): the camera clock is 
+        latched between two host clock readings, [host_time] is their 
+        midpoint and [uncertainty_s] half their difference. Returns None if 
+        the camera can't latch its clock.
+        """
+        try:
+            latch = self.getNode('GevTimestampControlLatch')
+            t0 = time.time()
+            latch.Execute()
+            t1 = time.time()
+            ticks = self.getNodeValue('GevTimestampValue')
+            rtn = (ticks, (t0 + t1)/2, (t1 - t0)/2)
+        except:
+            rtn = None
+        return rtn
+
+    def parameterOrder(self):
+        """ Return the node names written by sendParameters(), in the order 
+        they must be written.
+
+        Pixel format and binning come first as they change the valid AOI, 
+        'AOI' stands for the offset and size nodes as ordered by planAOI(), 
+        and gain auto is switched before the gain is set. The frame rate is 
+        set after the exposure time, which limits it.
+        """
+        rtn = ['PixelFormat']
+        if self.BINNING_MODE_NODES is not None:
+            rtn.extend(self.BINNING_MODE_NODES)
+        rtn.extend([
+            'BinningHorizontal',
+            'BinningVertical',
+            'AOI',
+            'ExposureTimeAbs',
+            'GainAuto',
+            'GainRaw',
+            'BlackLevelRaw',
+            'AcquisitionFrameRateEnable',
+            'AcquisitionFrameRateAbs',
+            'AcquisitionMode',
+            'ReverseX',
+            'ReverseY',
+            'GevSCPSPacketSize',
+            'GevSCBWRA',
+            'GevSCPD',
+            'GevSCFTD'
+        ])
+        return rtn
+
+    def planAOI(self, w=None, h=None, x_offset=None, y_offset=None):
+        """ Return the (node, value) writes needed to move from the current 
+        AOI to the one given, in an order where every intermediate AOI is 
+        valid.
+
+        Along each axis, the size is written first when shrinking and the 
+        offset first when growing, so that offset + size never exceeds the 
+        sensor. Values that are None or already set are left alone.
+        """
+        rtn = []
+        for size_node, offset_node, size, offset in (
+            ('Width', 'OffsetX', w, x_offset), 
+            ('Height', 'OffsetY', h, y_offset)):
+            current_size = self.getNodeValue(size_node)
+            current_offset = self.getNodeValue(offset_node)
+            writes = []
+            if size is not None and size != current_size:
+                writes.append((size_node, size))
+            if offset is not None and offset != current_offset:
+                writes.append((offset_node, offset))
+            if size is not None and size > current_size:
+                writes.reverse()
+            rtn.extend(writes)
+        return rtn
+
+    def read(self, n_images=1, read_timeout_ms=1000, max_grab_attempts=3,
+        zero_copy=False, return_meta=False):
         """ Read a frame(s) from the detector. 
+
+        If [return_meta] is True, returns (frames, meta), where [meta] is an 
+        array of FRAME_METADATA_DTYPE records for the frames: timestamps, 
+        chunk data (see enableChunks()) and host times (see syncClock()).
+
+        If [zero_copy] is True, the returned list holds FrameHandles that view 
+        pylon's own buffers instead of copies. Each handle keeps its buffer 
+        out of the pool until it is closed, so handles should be closed (or 
+        used in a with block) as soon as the frame has been processed. A 
+        BufferPoolWarning is issued when most of MaxNumBuffer is held.
+
+        If a frame store has been set with setFrameStore(), frames are 
+        copied into its preallocated slots and the returned list holds views 
+        onto them. The views are overwritten once the store wraps around; 
+        per-slot metadata is available from the store's [meta] array at the 
+        indices given by [frame_store.latest(n)].
+
+        Binning, AOI and flips that the camera doesn't implement are applied 
+        on the host to the returned frames (see getHostTransform()), except 
+        to zero-copy handles, which hold the frames as sent. Frame store 
+        slots are written already transformed, by the host transform set 
+        when the store was allocated.
+
+        Packed pixel formats (see packed.py) are unpacked into ordinary 
+        uint16 arrays, so can't be read with [zero_copy].
         """
+        pixel_format = self.getPixelFormat()
+        if zero_copy:
+            if isPacked(pixel_format):
+                raise Exception("Packed pixel format " + pixel_format + 
+                    " can't be read without copying.")
+            dtype = pixelFormatDtype(pixel_format)
+            if self.handle_tracker.pool_size is None:
+                self.handle_tracker.pool_size = self.getMaxNumBuffers()
+        transform = self.host_transform
+        if transform.isIdentity():
+            transform = None
         imgs = []
+        meta = newMetadata(n_images) if return_meta else None
         grab_attempts = 0
         while len(imgs) < n_images:
             if grab_attempts >= max_grab_attempts:
                 break
             else:
-                grabResult = self.camera.RetrieveResult(
-                    read_timeout_ms, pylon.TimeoutHandling_Return)
+                grabResult = self.retrieveResult(read_timeout_ms)
                 if grabResult.IsValid() and \
                 grabResult.GrabSucceeded():
-                    imgs.append(grabResult.Array)
+                    if zero_copy:
+                        handle = FrameHandle(grabResult, dtype, 
+                            tracker=self.handle_tracker, sequence=len(imgs))
+                        if meta is not None:
+                            meta[len(imgs)] = handle.meta
+                        imgs.append(handle)
+                        continue
+                    t0 = time.perf_counter()
+                    if self.frame_store is not None:
+                        slot = self.frame_store.write(grabResult)
+                        if meta is not None:
+                            meta[len(imgs)] = self.frame_store.meta[slot]
+                        imgs.append(self.frame_store.data[slot])
+                    else:
+                        if meta is not None:
+                            writeMetadata(grabResult, meta[len(imgs)], 
+                                sequence=len(imgs))
+                        img = newFrame(grabResult, pixel_format)
+                        if transform is not None:
+                            img = transform.apply(img)
+                        imgs.append(img)
+                    self.grab_stats.observeCopy(time.perf_counter() - t0)
                     grabResult.Release()
                 else:
                     grab_attempts += 1
+        if meta is not None:
+            meta = meta[:len(imgs)]
+            self.clock.annotate(meta)
+            return imgs, meta
         return imgs
 
+    def readInto(self, buffer, meta=None, read_timeout_ms=1000, 
+        max_grab_attempts=3):
+        """ Read frames from the detector into a preallocated buffer.
+
+        [buffer] is an (N, H, W) array matching the current AOI and pixel 
+        format, e.g. FrameStore.fromCamera(...).data. If [meta] is given, 
+        it should be an array of N records as returned by 
+        framestore.newMetadata(), and is filled in alongside the frames.
+
+        Returns the number of frames read, which is less than N if 
+        [max_grab_attempts] failed grabs occurred first. Raises if host-side 
+        binning, AOI or flips are set, see checkNoHostTransform().
+        """
+        self.checkNoHostTransform('readInto()')
+        pixel_format = self.getPixelFormat()
+        scratch = None
+        if isPacked(pixel_format):
+            scratch = newScratch(pixel_format, buffer[0].size)
+        n_read = 0
+        grab_attempts = 0
+        while n_read < len(buffer):
+            if grab_attempts >= max_grab_attempts:
+                break
+            else:
+                grabResult = self.retrieveResult(read_timeout_ms)
+                if grabResult.IsValid() and \
+                grabResult.GrabSucceeded():
+                    t0 = time.perf_counter()
+                    if meta is not None:
+                        writeFrame(grabResult, buffer[n_read], meta[n_read], 
+                            sequence=n_read, pixel_format=pixel_format, 
+                            scratch=scratch)
+                    else:
+                        writeFrame(grabResult, buffer[n_read], 
+                            pixel_format=pixel_format, scratch=scratch)
+                    self.grab_stats.observeCopy(time.perf_counter() - t0)
+                    grabResult.Release()
+                    n_read += 1
+                else:
+                    grab_attempts += 1
+        if meta is not None and n_read > 0:
+            self.clock.annotate(meta[:n_read])
+        return n_read
+
+    def record(self, path, n_frames, chunk_frames=64, n_chunks=4, 
+        read_timeout_ms=1000, max_grab_attempts=3):
+        """ Stream [n_frames] frames to a recording directory at [path].
+
+        The camera must already be grabbing. Only n_chunks*chunk_frames 
+        frames are held in memory at once; see recorder.Recorder. Returns the 
+        number of frames written.
+        """
+        recorder = Recorder(self, path, chunk_frames=chunk_frames, 
+            n_chunks=n_chunks)
+        return recorder.record(n_frames, read_timeout_ms=read_timeout_ms, 
+            max_grab_attempts=max_grab_attempts)
+
+    def retrieveResult(self, read_timeout_ms=1000):
+        """ Wait up to [read_timeout_ms] for the next grab result. 
+
+        On timeout, the returned result is not valid. The wait and outcome 
+        are recorded in the grab statistics, see stats().
+        """
+        t0 = time.perf_counter()
+        rtn = self.camera.RetrieveResult(read_timeout_ms, 
+            self.pylon.TimeoutHandling_Return)
+        self.grab_stats.observeRetrieve(rtn, time.perf_counter() - t0)
+        return rtn
+
     def sendParameters(self, config):
+        """ Apply a configuration to the camera, writing only the nodes 
+        whose values differ from the camera's current state.
+
+        Writes are made in the order given by parameterOrder(). Returns a 
+        report with lists of 'changed' (node, old, new) tuples, 'unchanged' 
+        node names and 'failed' (node, value, error) tuples, along with the 
+        'elapsed_s' time taken, or None if no camera is defined.
+        """
         try:
             exptime = int(config['EXPTIME'])
         except KeyError:
@@ -470,67 +1173,119 @@ class Basler(camera):
                 config['PACKET_SIZE'])
         except KeyError:
             packet_size = None               
-
-        if self.camera is not None:
-            if exptime is not None:
-                self.setExposureTimeMicroseconds(exptime)
-            if pixel_format is not None:
-                self.setPixelFormat(pixel_format)
-
-            # We need to set binning first, then adjust AOI.
-            #
-            current_binning_h = self.getBinningHorizontal()
-            current_binning_v = self.getBinningVertical()
-            if binning_h is not None:
-                self.setBinningHorizontal(binning_h)
-            if binning_v is not None:
-                self.setBinningVertical(binning_v)
-            if width is not None and height is not None and \
-            x_offset is not None and y_offset is not None:
-                self.setAOI(width, height, x_offset, y_offset)
-
-            if binning_mode is not None:
+        try:
+            ipd = int(config['IPD'])
+        except KeyError:
+            ipd = None
+        try:
+            transmission_start_delay = int(config['TRANSMISSION_START_DELAY'])
+        except KeyError:
+            transmission_start_delay = None
+        try:
+            bandwidth_reserve = int(config['BANDWIDTH_RESERVE'])
+        except KeyError:
+            bandwidth_reserve = None
+
+        if self.camera is None:
+            return None
+
+        # Desired node values. The binning mode node differs between models, 
+        # see BINNING_MODE_NODES.
+        #
+        desired = {
+            'ExposureTimeAbs': exptime,
+            'PixelFormat': pixel_format,
+            'BinningHorizontal': binning_h,
+            'BinningVertical': binning_v,
+            'GainRaw': gain,
+            'GainAuto': gain_auto,
+            'BlackLevelRaw': bias,
+            'AcquisitionMode': acquisition_mode,
+            'GevSCPSPacketSize': packet_size,
+            'GevSCBWRA': bandwidth_reserve,
+            'GevSCPD': ipd,
+            'GevSCFTD': transmission_start_delay
+        }
+        if binning_mode is not None:
+            if self.BINNING_MODE_NODES is not None:
+                for name in self.BINNING_MODE_NODES:
+                    desired[name] = binning_mode
+            else:
                 self.setBinningHorizontalMode(binning_mode)
-                self.setBinningVerticalMode(binning_mode)            
-            if gain is not None:
-                self.setGain(gain)
-            if gain_auto is not None:
-                self.setGainAuto(gain_auto)            
-            if bias != None:
-                self.setBlackLevel(bias)
-            if frame_rate is not None:
-                self.setFrameRate(frame_rate)
-            if acquisition_mode is not None:
-                self.setAcquisitionMode(acquisition_mode)
-            if reverse_x is not None:
-                if reverse_x == 1:
-                    self.setImageFlipX(True)
-                else:
-                    self.setImageFlipX(False)
-            if reverse_y is not None:
-                if reverse_y == 1:
-                    self.setImageFlipY(True)
-                else:
-                    self.setImageFlipY(False)
-            if packet_size is not None:
-                self.setPacketSize(packet_size)
+                self.setBinningVerticalMode(binning_mode)
+        if frame_rate is not None:
+            desired['AcquisitionFrameRateEnable'] = frame_rate != 0
+            if frame_rate != 0:
+                desired['AcquisitionFrameRateAbs'] = frame_rate
+        if reverse_x is not None:
+            desired['ReverseX'] = reverse_x == 1
+        if reverse_y is not None:
+            desired['ReverseY'] = reverse_y == 1
+
+        report = {
+            'changed': [],
+            'unchanged': [],
+            'failed': []
+        }
+        start = time.time()
+        for name in self.parameterOrder():
+            if name == 'AOI' and not self.hasNode('OffsetX'):
+                if None not in (width, height, x_offset, y_offset):
+                    self.setAOI(width, height, x_offset, y_offset)
+                    report['changed'].append(('AOI', None, 
+                        (width, height, x_offset, y_offset)))
+                writes = []
+            elif name == 'AOI':
+                # Planned only now, as binning rescales the current AOI.
+                #
+                writes = self.planAOI(width, height, x_offset, y_offset)
+            elif desired.get(name) is not None:
+                writes = [(name, desired[name])]
+            else:
+                writes = []
+            for node, value in writes:
+                if node in HOST_FALLBACK_SETTERS and not self.hasNode(node):
+                    getattr(self, HOST_FALLBACK_SETTERS[node])(value)
+                    report['changed'].append((node, None, value))
+                    continue
+                try:
+                    current = self.getNodeValue(node)
+                except Exception:
+                    current = None
+                if current == value:
+                    report['unchanged'].append(node)
+                    continue
+                try:
+                    self.setNodeValue(node, value)
+                    report['changed'].append((node, current, value))
+                except Exception as e:
+                    report['failed'].append((node, value, str(e)))
+        report['elapsed_s'] = time.time() - start
+        return report
+
+    def setAcquisitionFrameCount(self, n_frames):
+        """ Set the number of frames exposed per acquisition start trigger.
+        """
+        try:
+            rtn = self.setNodeValue('AcquisitionFrameCount', n_frames)
+        except:
+            rtn = None
+        return rtn
 
     def setAOI(self, w, h, x_offset, y_offset):
         """ Set the area of interest.
 
         The area of interest is defined by an offset in x, offset in y, width 
-        and height.
+        and height. If the camera has no offset nodes, the AOI is cropped on 
+        the host instead.
         """
+        if not self.hasNode('OffsetX') or not self.hasNode('OffsetY'):
+            self.host_transform.aoi = (w, h, x_offset, y_offset)
+            return True
         try:
-            self.connect()
-            rtn = self.camera.OffsetX.SetValue(0)      
-            rtn = self.camera.OffsetY.SetValue(0)     
-            rtn = self.camera.Width.SetValue(1)       
-            rtn = self.camera.Height.SetValue(1)       
-            rtn = self.camera.OffsetX.SetValue(x_offset)     
-            rtn = self.camera.OffsetY.SetValue(y_offset)      
-            rtn = self.camera.Width.SetValue(w)      
-            rtn = self.camera.Height.SetValue(h)
+            rtn = True
+            for node, value in self.planAOI(w, h, x_offset, y_offset):
+                rtn = self.setNodeValue(node, value)
         except:
             rtn = None
         return rtn
@@ -541,45 +1296,67 @@ class Basler(camera):
         Can be 'Continuous' or 'SingleFrame'.
         """
         try:
-            self.connect()
-            rtn = self.camera.AcquisitionMode.SetValue(mode)
+            rtn = self.setNodeValue('AcquisitionMode', mode)
+        except:
+            rtn = None
+        return rtn
+
+    def setBandwidthReserve(self, reserve):
+        """ Set the % of bwa reserved to resend packets. """
+        try:
+            rtn = self.setNodeValue('GevSCBWRA', reserve)
         except:
             rtn = None
         return rtn
 
     def setBinningHorizontal(self, binning):
-        """ Set the horizontal binning factor. """
+        """ Set the horizontal binning factor. 
+
+        If the camera doesn't implement binning, frames are binned on the 
+        host instead.
+        """
+        if not self.hasNode('BinningHorizontal'):
+            self.host_transform.binning_h = binning
+            return True
         try:
-            self.connect()
-            rtn = self.camera.BinningHorizontal.SetValue(binning)
+            rtn = self.setNodeValue('BinningHorizontal', binning)
         except:
             rtn = None
         return rtn
 
     def setBinningHorizontalMode(self, mode):
         # This is overriden for different camera models as the 
-        # function call is different.
-        pass
+        # function call is different. Here, it only sets the mode used for 
+        # host binning.
+        self.host_transform.binning_mode = mode
+        return True
 
     def setBinningVertical(self, binning):
-        """ Set the vertical binning factor. """
+        """ Set the vertical binning factor. 
+
+        If the camera doesn't implement binning, frames are binned on the 
+        host instead.
+        """
+        if not self.hasNode('BinningVertical'):
+            self.host_transform.binning_v = binning
+            return True
         try:
-            self.connect()
-            rtn = self.camera.BinningVertical.SetValue(binning)
+            rtn = self.setNodeValue('BinningVertical', binning)
         except:
             rtn = None
         return rtn
 
     def setBinningVerticalMode(self, mode):
         # This is overriden for different camera models as the 
-        # function call is different.
-        pass  
+        # function call is different. Here, it only sets the mode used for 
+        # host binning.
+        self.host_transform.binning_mode = mode
+        return True
 
     def setBlackLevel(self, level):
         """ Set the DC bias level. """
         try:
-            self.connect()
-            rtn = self.camera.BlackLevelRaw.SetValue(level)
+            rtn = self.setNodeValue('BlackLevelRaw', level)
         except:
             rtn = None
         return rtn  
@@ -587,8 +1364,7 @@ class Basler(camera):
     def setDeviceUserID(self, did):
         """ Set the device ID (16 char) """
         try:
-            self.connect()
-            rtn = self.camera.DeviceUserID.SetValue(did)
+            rtn = self.setNodeValue('DeviceUserID', did)
         except:
             rtn = None
         return rtn  
@@ -596,8 +1372,7 @@ class Basler(camera):
     def setExposureTimeMicroseconds(self, exposure_time):
         """ Set the exposure time in microseconds. """
         try:
-            self.connect()
-            rtn = self.camera.ExposureTimeAbs.SetValue(exposure_time)
+            rtn = self.setNodeValue('ExposureTimeAbs', exposure_time)
         except:
             rtn = None
         return rtn
@@ -608,23 +1383,36 @@ class Basler(camera):
         0 turns this off.
         """
         try:
-            self.connect()
             if frame_rate == 0:
-                rtn = self.camera.AcquisitionFrameRateEnable.SetValue(
+                rtn = self.setNodeValue('AcquisitionFrameRateEnable', 
                     False)
             else:
-                self.camera.AcquisitionFrameRateEnable.SetValue(True)
-                rtn = self.camera.AcquisitionFrameRateAbs.SetValue(
+                self.setNodeValue('AcquisitionFrameRateEnable', True)
+                rtn = self.setNodeValue('AcquisitionFrameRateAbs', 
                     frame_rate)
         except:
             rtn = None
         return rtn
 
+    def setFrameStore(self, capacity):
+        """ Allocate a frame store of [capacity] frames for read() to write 
+        into.
+
+        The shape and dtype are taken from the current AOI, pixel format 
+        and host transform (see getHostTransform()), so this should be 
+        called again if any of them changes. A [capacity] of 0 or None turns
+        the frame store off.
+        """
+        if capacity:
+            self.frame_store = FrameStore.fromCamera(self, capacity)
+        else:
+            self.frame_store = None
+        return self.frame_store
+
     def setGain(self, gain):
         """ Set the gain. """
         try:
-            self.connect()
-            rtn = self.camera.GainRaw.SetValue(gain)
+            rtn = self.setNodeValue('GainRaw', gain)
         except:
             rtn = None     
         return rtn   
@@ -632,26 +1420,33 @@ class Basler(camera):
     def setGainAuto(self, gain_auto='Off'):
         """ Set the automatic gain mode. """
         try:
-            self.connect()
-            rtn = self.camera.GainAuto.SetValue(gain_auto)
+            rtn = self.setNodeValue('GainAuto', gain_auto)
         except:
             rtn = None
         return rtn            
 
     def setImageFlipX(self, flip):
-        """ Set the x-axis flipping mode. """
+        """ Set the x-axis flipping mode, flipping on the host if the 
+        camera can't.
+        """
+        if not self.hasNode('ReverseX'):
+            self.host_transform.flip_x = bool(flip)
+            return True
         try:
-            self.connect()
-            rtn = self.camera.ReverseX.SetValue(flip)
+            rtn = self.setNodeValue('ReverseX', flip)
         except:
             rtn = None      
         return rtn
 
     def setImageFlipY(self, flip):
-        """ Set the y-axis flipping mode. """
+        """ Set the y-axis flipping mode, flipping on the host if the 
+        camera can't.
+        """
+        if not self.hasNode('ReverseY'):
+            self.host_transform.flip_y = bool(flip)
+            return True
         try:
-            self.connect()
-            rtn = self.camera.ReverseY.SetValue(flip)
+            rtn = self.setNodeValue('ReverseY', flip)
         except:
             rtn = None   
         return rtn
@@ -659,8 +1454,7 @@ class Basler(camera):
     def setIPD(self, delay):
         """ Set delay between sending packets in ticks. """ 
         try:
-            self.connect()
-            rtn = self.camera.GevSCPD.SetValue(delay)
+            rtn = self.setNodeValue('GevSCPD', delay)
         except:
             rtn = None 
         return rtn   
@@ -668,25 +1462,39 @@ class Basler(camera):
     def setMaxNumBuffers(self, max_num_buffers=25):
         """ Set the maximum number of buffers available. """
         try:
-            self.connect()
-            rtn = self.camera.MaxNumBuffer.SetValue(max_num_buffers)
+            rtn = self.setNodeValue('MaxNumBuffer', max_num_buffers)
+            self.handle_tracker.pool_size = max_num_buffers
         except:
             rtn = None
         return rtn
 
+    def setNodeValue(self, name, value):
+        """ Set the value of node [name], invalidating any cached values 
+        that depend on it.
+        """
+        node = self.getNode(name)
+        try:
+            rtn = node.SetValue(value)
+        finally:
+            self.invalidateCache(name)
+        return rtn
+
     def setPacketSize(self, size):
         """ Set the packet size in bytes. """
         try:
-            self.connect()
-            rtn = self.camera.GevSCPSPacketSize.SetValue(size)
+            rtn = self.setNodeValue('GevSCPSPacketSize', size)
         except:
             rtn = None
         return rtn
 
     def setPixelFormat(self, pixel_format='Mono12'):
+        """ Set the pixel format. 
+
+        The packed formats 'Mono12p', 'Mono12Packed', 'Mono10p' and 
+        'Mono10Packed' use less bandwidth and are unpacked on the host.
+        """
         try:
-            self.connect()
-            rtn = self.camera.PixelFormat.SetValue(pixel_format)
+            rtn = self.setNodeValue('PixelFormat', pixel_format)
         except:
             rtn = None
         return rtn
@@ -696,21 +1504,118 @@ class Basler(camera):
             the host in ticks.
         """
         try:
-            self.connect()
-            rtn = self.camera.GevSCFTD.SetValue(delay)
+            rtn = self.setNodeValue('GevSCFTD', delay)
         except:
             rtn = None      
         return rtn   
 
+    def setTriggerDelayMicroseconds(self, delay, selector='FrameStart'):
+        """ Set the delay between trigger and exposure of [selector]. """
+        try:
+            self.setNodeValue('TriggerSelector', selector)
+            rtn = self.setNodeValue('TriggerDelayAbs', delay)
+        except:
+            rtn = None
+        return rtn
+
+    def setTriggerMode(self, mode='On', selector='FrameStart'):
+        """ Switch the [selector] trigger 'On' or 'Off'. """
+        try:
+            self.setNodeValue('TriggerSelector', selector)
+            rtn = self.setNodeValue('TriggerMode', mode)
+        except:
+            rtn = None
+        return rtn
+
+    def setTriggerSource(self, source='Software', selector='FrameStart'):
+        """ Set the source of the [selector] trigger, 'Software' or an 
+        input line such as 'Line1'.
+        """
+        try:
+            self.setNodeValue('TriggerSelector', selector)
+            rtn = self.setNodeValue('TriggerSource', source)
+        except:
+            rtn = None
+        return rtn
+
+    def stats(self, reset=False):
+        """ Return grab statistics as a JSON-serialisable dict.
+
+        These include frames, timeouts and failed grabs by error code, 
+        histograms of the time spent waiting in RetrieveResult and copying 
+        frames, the acquisition queue depth and drops, and the driver's 
+        stream statistics (buffer underruns, failed and resent packets). 
+        If [reset] is True, the counters are cleared afterwards.
+        """
+        rtn = self.grab_stats.snapshot(camera=self.camera)
+        rtn['handles_outstanding'] = self.handle_tracker.outstanding
+        if self.frame_queue is not None:
+            rtn['queue_dropped'] = self.frame_queue.dropped
+        if reset:
+            self.grab_stats.clear()
+        return rtn
+
+    def stopClockSync(self):
+        if self.clock_sync is not None:
+            self.clock_sync.stop()
+            self.clock_sync = None
+
+    def syncClock(self, n_samples=8):
+        """ Add [n_samples] samples of the camera clock to [clock], the 
+        model mapping frame timestamps to host time, and return it. The 
+        model is left unsynchronised if the camera can't latch its clock.
+        """
+        if self.clock.tick_frequency_hz is None:
+            self.clock.tick_frequency_hz = self.getNodeValue(
+                'GevTimestampTickFrequency')
+        for i in range(n_samples):
+            sample = self.latchTimestamp()
+            if sample is None:
+                break
+            self.clock.addSample(*sample)
+        return self.clock
+
+    def trigger(self, timeout_ms=1000):
+        """ Send a software trigger once the camera is ready for one.
+
+        Returns the host time the trigger was sent, or None if the camera 
+        wasn't ready within [timeout_ms].
+        """
+        if not self.camera.WaitForFrameTriggerReady(timeout_ms, 
+            self.pylon.TimeoutHandling_Return):
+            return None
+        rtn = time.time()
+        self.camera.ExecuteSoftwareTrigger()
+        return rtn
+
+    def startClockSync(self, period_s=1.):
+        """ Sample the camera clock every [period_s] seconds in the 
+        background, keeping [clock] current, until stopClockSync() or 
+        disconnect().
+        """
+        self.stopClockSync()
+        self.clock_sync = ClockSync(self, period_s)
+        self.clock_sync.start()
+        return self.clock_sync
+
+    def startSession(self):
+        """ Forget node handles and cached values from any previous 
+        connection.
+        """
+        self.session_camera = self.camera
+        self.nodes = {}
+        self.node_cache = {}
+
 class Basler_2040_35gm(Basler):
+    BINNING_MODE_NODES = ('BinningHorizontalMode', 'BinningVerticalMode')
+
     def __init__(self):
         super(Basler_2040_35gm, self).__init__()
     
     def setBinningHorizontalMode(self, mode):
         """ Set the horizontal binning mode. """
         try:
-            self.connect()
-            rtn = self.camera.BinningHorizontalMode.SetValue(mode)
+            rtn = self.setNodeValue('BinningHorizontalMode', mode)
         except:
             rtn = None
         return rtn
@@ -718,21 +1623,21 @@ class Basler_2040_35gm(Basler):
     def setBinningVerticalMode(self, mode):
         """ Set the vertical binning mode. """
         try:
-            self.connect()
-            rtn = self.camera.BinningVerticalMode.SetValue(mode)
+            rtn = self.setNodeValue('BinningVerticalMode', mode)
         except:
             rtn = None
         return rtn
 
 class Basler_1600_60gm(Basler):
+    BINNING_MODE_NODES = ('BinningModeHorizontal', 'BinningModeVertical')
+
     def __init__(self):
         super(Basler_1600_60gm, self).__init__()
     
     def setBinningHorizontalMode(self, mode):
         """ Set the horizontal binning mode. """
         try:
-            self.connect()
-            rtn = self.camera.BinningModeHorizontal.SetValue(mode)
+            rtn = self.setNodeValue('BinningModeHorizontal', mode)
         except:
             rtn = None
         return rtn
@@ -740,8 +1645,7 @@ class Basler_1600_60gm(Basler):
     def setBinningVerticalMode(self, mode):
         """ Set the vertical binning mode. """
         try:
-            self.connect()
-            rtn = self.camera.BinningModeVertical.SetValue(mode)
+            rtn = self.setNodeValue('BinningModeVertical', mode)
         except:
             rtn = None
         return rtn
@@ -0,0 +1,235 @@
+""" Measure what Basler.read delivers across a sweep of camera settings.
+
+For every combination of AOI, binning, pixel format, packet size,
+MaxNumBuffer and grab strategy, this grabs [--frames] frames and reports:
+
+    - fps: sustained frames/s delivered by read(),
+    - latency_ms_p50/p90/p99: host arrival time minus the camera timestamp,
+      relative to the smallest difference seen, so the figures are the
+      latency above the best case (they need no clock synchronisation),
+    - dropped: frames missing from the block ID sequence, whether lost for
+      want of a buffer or failed,
+    - cpu_ms_per_frame: process CPU time per frame, all threads included,
+    - retained_bytes_per_frame and peak_alloc_bytes: Python heap growth
+      per frame and peak allocation during a separate traced pass.
+
+Results are written as JSON. Passing an earlier result file with --compare
+prints cases whose frame rate fell by more than --tolerance and exits
+non-zero, to catch regressions between releases.
+
+    python benchmarks/acquisition.py --backend simulated --out run.json
+    python benchmarks/acquisition.py --serial 12345 --compare run.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from basler import Basler
+from framestore import newMetadata
+
+SIMULATED_SERIAL_NUMBER = 99999999
+
+def openCamera(serial_number, backend):
+    """ Return a connected camera, registering a simulated device if
+    needed.
+    """
+    camera = Basler()
+    if backend == 'simulated':
+        from simulated import pylon
+        tlFactory = pylon.TlFactory.GetInstance()
+        if serial_number is None:
+            serial_number = SIMULATED_SERIAL_NUMBER
+        if not any(int(d.GetSerialNumber()) == int(serial_number) for d in
+            tlFactory.EnumerateDevices()):
+            tlFactory.AddDevice(serial_number)
+    camera.find(serial_number, backend=backend)
+    camera.connect()
+    return camera
+
+def configure(camera, case):
+    """ Apply a benchmark case and return the sendParameters() report. """
+    w, h = case['aoi']
+    camera.setMaxNumBuffers(case['max_num_buffers'])
+    return camera.sendParameters({
+        'PIXEL_FORMAT': case['pixel_format'],
+        'BINNING_H': case['binning'],
+        'BINNING_V': case['binning'],
+        'IMAGE_WIDTH': w,
+        'IMAGE_HEIGHT': h,
+        'IMAGE_X_OFFSET': 0,
+        'IMAGE_Y_OFFSET': 0,
+        'PACKET_SIZE': case['packet_size']
+    })
+
+def grab(camera, n_frames, read_timeout_ms):
+    """ Read [n_frames] frames one at a time through Basler.read(),
+    returning their metadata from the frame store.
+    """
+    meta = newMetadata(n_frames)
+    n_read = 0
+    while n_read < n_frames:
+        if not camera.read(1, read_timeout_ms=read_timeout_ms):
+            break
+        meta[n_read] = camera.frame_store.meta[
+            camera.frame_store.latest(1)[0]]
+        n_read += 1
+    return meta[:n_read]
+
+def runCase(camera, case, n_frames, read_timeout_ms, tick_frequency_hz):
+    """ Run one benchmark case and return its results. """
+    report = configure(camera, case)
+    camera.setFrameStore(4)
+    rtn = dict(case)
+    rtn['aoi'] = list(case['aoi'])
+    rtn['configure_s'] = report['elapsed_s']
+    rtn['failed_settings'] = [f[0] for f in report['failed']]
+    rtn['payload_bytes'] = camera.getPayloadSize()
+    rtn['camera_fps'] = camera.getFrameRate()
+
+    camera.beginExpose(case['grab_strategy'])
+    try:
+        grab(camera, 2, read_timeout_ms)
+
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        meta = grab(camera, n_frames, read_timeout_ms)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        grab(camera, min(n_frames, 50), read_timeout_ms)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        camera.endExpose()
+
+    n = len(meta)
+    rtn['frames'] = n
+    rtn['fps'] = n/elapsed if elapsed > 0 else 0.
+    rtn['cpu_ms_per_frame'] = cpu/max(n, 1)*10**3
+    rtn['retained_bytes_per_frame'] = (current - baseline)/max(min(n_frames,
+        50), 1)
+    rtn['peak_alloc_bytes'] = peak - baseline
+    if n > 1:
+        ids = meta['frame_id'].astype(np.int64)
+        rtn['dropped'] = int(ids[-1] - ids[0] + 1 - n)
+        camera_s = meta['timestamp'].astype(np.float64)/tick_frequency_hz
+        latency = meta['host_time'] - camera_s
+        latency -= latency.min()
+        for p in (50, 90, 99):
+            rtn['latency_ms_p' + str(p)] = float(np.percentile(latency,
+                p))*10**3
+    else:
+        rtn['dropped'] = 0
+    return rtn
+
+def compare(results, baseline, tolerance):
+    """ Return the cases whose fps fell by more than [tolerance] (a
+    fraction) against [baseline].
+    """
+    def key(r):
+        return json.dumps({k: r[k] for k in ('aoi', 'binning',
+            'pixel_format', 'packet_size', 'max_num_buffers',
+            'grab_strategy')}, sort_keys=True)
+    previous = {key(r): r for r in baseline['results']}
+    rtn = []
+    for r in results:
+        old = previous.get(key(r))
+        if old is not None and r['fps'] < old['fps']*(1 - tolerance):
+            rtn.append((r, old))
+    return rtn
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--serial', default=None)
+    parser.add_argument('--backend', default='pylon')
+    parser.add_argument('--aoi', nargs='+', default=['2048x2048',
+        '1024x1024'])
+    parser.add_argument('--binning', type=int, nargs='+', default=[1])
+    parser.add_argument('--pixel-format', nargs='+', default=['Mono8',
+        'Mono12'])
+    parser.add_argument('--packet-size', type=int, nargs='+',
+        default=[1500])
+    parser.add_argument('--max-num-buffers', type=int, nargs='+',
+        default=[10])
+    parser.add_argument('--grab-strategy', nargs='+', default=['OneByOne',
+        'LatestImageOnly'])
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--read-timeout-ms', type=int, default=1000)
+    parser.add_argument('--out', default='benchmark_acquisition.json')
+    parser.add_argument('--compare', default=None)
+    parser.add_argument('--tolerance', type=float, default=0.05)
+    args = parser.parse_args()
+
+    camera = openCamera(args.serial, args.backend)
+    tick_frequency_hz = 125*10**6
+    try:
+        tick_frequency_hz = camera.getNodeValue('GevTimestampTickFrequency')
+    except Exception:
+        pass
+
+    aois = [tuple(int(v) for v in aoi.split('x')) for aoi in args.aoi]
+    results = []
+    try:
+        for aoi, binning, pixel_format, packet_size, max_num_buffers, \
+        grab_strategy in itertools.product(aois, args.binning,
+            args.pixel_format, args.packet_size, args.max_num_buffers,
+            args.grab_strategy):
+            case = {
+                'aoi': aoi,
+                'binning': binning,
+                'pixel_format': pixel_format,
+                'packet_size': packet_size,
+                'max_num_buffers': max_num_buffers,
+                'grab_strategy': grab_strategy
+            }
+            r = runCase(camera, case, args.frames, args.read_timeout_ms,
+                tick_frequency_hz)
+            results.append(r)
+            print("%-9s bin%d %-12s pkt%-5d buf%-3d %-15s %7.1f fps  "
+                "p99 %6.2f ms  dropped %d  cpu %.3f ms/frame" % (
+                "x".join(str(v) for v in aoi), binning, pixel_format,
+                packet_size, max_num_buffers, grab_strategy, r['fps'],
+                r.get('latency_ms_p99', float('nan')), r['dropped'],
+                r['cpu_ms_per_frame']))
+    finally:
+        camera.disconnect()
+
+    output = {
+        'created': time.time(),
+        'backend': args.backend,
+        'serial_number': args.serial,
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'frames': args.frames,
+        'results': results
+    }
+    with open(args.out, 'w') as f:
+        json.dump(output, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for r, old in regressions:
+            print("Regression: %s fell from %.1f to %.1f fps" % (
+                {k: r[k] for k in ('aoi', 'binning', 'pixel_format',
+                'packet_size', 'max_num_buffers', 'grab_strategy')},
+                old['fps'], r['fps']))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+""" Compare the host cost of software binning with hardware binning.
+
+For each binning factor, this times hostops.binFrames on a synthetic frame
+of the given size. If a camera serial number is given, it also sets the
+same factor in hardware and measures the payload size and resulting frame
+rate, so the host cost can be weighed against the bandwidth saved.
+
+    python benchmarks/binning.py --width 2048 --height 2048 --serial 12345
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from hostops import binFrames
+
+def hostCost(frame, factor, mode, repeats):
+    """ Return the median time in seconds to bin [frame] by [factor]. """
+    h = frame.shape[0]//factor
+    w = frame.shape[1]//factor
+    out = np.empty((h, w), dtype=frame.dtype)
+    times = timeit.repeat(lambda: binFrames(frame, factor, factor, mode,
+        out=out), number=1, repeat=repeats)
+    return float(np.median(times))
+
+def hardwareCost(serial_number, factor):
+    """ Return the payload size and frame rate with hardware binning at
+    [factor], or None if the camera doesn't support it.
+    """
+    from basler import Basler
+    camera = Basler()
+    camera.find(serial_number)
+    camera.connect()
+    try:
+        if not camera.hasNode('BinningHorizontal'):
+            return None
+        camera.setBinningHorizontal(factor)
+        camera.setBinningVertical(factor)
+        rtn = (camera.getPayloadSize(), camera.getFrameRate())
+        camera.setBinningHorizontal(1)
+        camera.setBinningVertical(1)
+    finally:
+        camera.disconnect()
+    return rtn
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=2048)
+    parser.add_argument('--height', type=int, default=2048)
+    parser.add_argument('--factors', type=int, nargs='+', default=[1, 2, 3,
+        4])
+    parser.add_argument('--mode', default='Summing')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--serial', default=None)
+    args = parser.parse_args()
+
+    frame = np.random.randint(0, 4096, (args.height, args.width),
+        dtype=np.uint16)
+    print("factor  host_ms  host_fps  hw_payload_bytes  hw_fps")
+    for factor in args.factors:
+        t = hostCost(frame, factor, args.mode, args.repeats)
+        hw = None
+        if args.serial is not None:
+            hw = hardwareCost(args.serial, factor)
+        if hw is None:
+            hw = ('-', '-')
+        print("%6d  %7.3f  %8.1f  %16s  %6s" % (factor, t*10**3, 1/t,
+            hw[0], hw[1]))
+
+if __name__ == '__main__':
+    main()
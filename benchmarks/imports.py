@@ -0,0 +1,73 @@
+""" Measure the cold-start cost of importing this package's modules.
+
+Each module is imported in a fresh interpreter, [--repeats] times, and the
+median import time and the process's peak RSS are reported, along with any
+of the heavy modules that should only load once a camera is used (the
+pylon driver, OpenCV) that the import pulled in. Exits with status 1 if a
+module exceeds [--budget-ms] or loads a heavy module, so it can guard cold
+start in CI.
+
+    python benchmarks/imports.py --budget-ms 150
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules imported by default, and the modules none of them should load.
+#
+MODULES = ('cameras', 'framestore', 'transport', 'timing', 'metrics',
+    'acquisition', 'basler', 'cameraarray', 'calibration', 'discovery',
+    'sequencer')
+HEAVY_MODULES = ('pypylon', 'cv2')
+
+# Run in the fresh interpreter: import the module and report the time taken,
+# the peak RSS in kB and the heavy modules loaded.
+#
+PROBE = """
+import json, resource, sys, time
+sys.path.insert(0, %r)
+t = time.perf_counter()
+import %s
+t = time.perf_counter() - t
+print(json.dumps([t, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    [m for m in %r if m in sys.modules]]))
+"""
+
+def probe(module):
+    """ Return (seconds, peak_rss_kb, heavy_modules) for importing [module]
+    in a fresh interpreter.
+    """
+    output = subprocess.check_output([sys.executable, '-c', PROBE % (
+        PACKAGE_DIR, module, HEAVY_MODULES)])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=list(MODULES))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    print("%-12s  %9s  %11s  %s" % ('module', 'import_ms', 'peak_rss_mb',
+        'heavy_modules'))
+    for module in args.modules:
+        results = [probe(module) for i in range(args.repeats)]
+        t = float(np.median([r[0] for r in results]))
+        rss = float(np.median([r[1] for r in results]))
+        heavy = sorted(set(m for r in results for m in r[2]))
+        over = args.budget_ms is not None and t*10**3 > args.budget_ms
+        failed = failed or over or bool(heavy)
+        print("%-12s  %9.1f  %11.1f  %s%s" % (module, t*10**3, rss/1024,
+            ','.join(heavy) or '-', '  OVER BUDGET' if over else ''))
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+""" Compare frames/s for packed and unpacked pixel formats at a fixed AOI.
+
+For each pixel format, this times packed.unpack on a synthetic frame and,
+if a camera serial number is given, sets the format on the camera, grabs
+[--frames] frames through Basler.read and reports the sustained frame rate
+and payload size.
+
+    python benchmarks/packed.py --serial 12345 --formats Mono12 Mono12p
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from packed import isPacked, newScratch, packedSize, unpack
+
+def unpackCost(pixel_format, n_pixels, repeats):
+    """ Return the median time in seconds to unpack one frame, or 0 for an
+    unpacked format.
+    """
+    if not isPacked(pixel_format):
+        return 0.
+    raw = np.random.randint(0, 256, packedSize(pixel_format, n_pixels),
+        dtype=np.uint8)
+    out = np.empty(n_pixels, dtype=np.uint16)
+    scratch = newScratch(pixel_format, n_pixels)
+    times = timeit.repeat(lambda: unpack(raw, pixel_format, out,
+        scratch=scratch), number=1, repeat=repeats)
+    return float(np.median(times))
+
+def cameraRate(camera, pixel_format, n_frames):
+    """ Return the payload size and measured frames/s for [pixel_format]. """
+    if camera.setPixelFormat(pixel_format) is None and \
+    camera.getPixelFormat() != pixel_format:
+        return None
+    camera.beginExpose('OneByOne')
+    try:
+        camera.read(1)
+        start = time.perf_counter()
+        n_read = len(camera.read(n_frames))
+        elapsed = time.perf_counter() - start
+    finally:
+        camera.endExpose()
+    return (camera.getPayloadSize(), n_read/elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=2048)
+    parser.add_argument('--height', type=int, default=2048)
+    parser.add_argument('--formats', nargs='+', default=['Mono12',
+        'Mono12p', 'Mono12Packed'])
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--serial', default=None)
+    args = parser.parse_args()
+
+    camera = None
+    if args.serial is not None:
+        from basler import Basler
+        camera = Basler()
+        camera.find(args.serial)
+        camera.connect()
+        camera.setAOI(args.width, args.height, 0, 0)
+
+    print("format        unpack_ms  payload_bytes  fps")
+    try:
+        for pixel_format in args.formats:
+            t = unpackCost(pixel_format, args.width*args.height,
+                args.repeats)
+            rate = None
+            if camera is not None:
+                rate = cameraRate(camera, pixel_format, args.frames)
+            if rate is None:
+                rate = ('-', '-')
+            else:
+                rate = (rate[0], "%.1f" % rate[1])
+            print("%-12s  %9.3f  %13s  %s" % (pixel_format, t*10**3,
+                rate[0], rate[1]))
+    finally:
+        if camera is not None:
+            camera.disconnect()
+
+if __name__ == '__main__':
+    main()
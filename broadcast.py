@@ -0,0 +1,449 @@
+import os
+import tempfile
+import threading
+import time
+import warnings
+
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    from .acquisition import QueueClosed
+    from .framestore import FRAME_METADATA_DTYPE, pixelFormatDtype
+except ImportError:
+    from acquisition import QueueClosed
+    from framestore import FRAME_METADATA_DTYPE, pixelFormatDtype
+
+# Layout of a frame ring in shared memory. The block holds, each aligned to
+# RING_ALIGNMENT bytes:
+#
+#   - a RING_HEADER_DTYPE header,
+#   - the sequence number + 1 of the frame in each slot, 0 while the slot is
+#     being written,
+#   - a RING_SUBSCRIBER_DTYPE record per subscriber,
+#   - a FRAME_METADATA_DTYPE record per slot,
+#   - the frames, as a (capacity, height, width) array.
+#
+# The magic ends in the layout version, bumped whenever the layout (including
+# FRAME_METADATA_DTYPE) changes, so that processes running different versions
+# can't read each other's rings.
+#
+RING_MAGIC_PREFIX = b'DIRING'
+RING_MAGIC = RING_MAGIC_PREFIX + b'1'
+RING_ALIGNMENT = 64
+RING_HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('capacity', np.uint32),
+    ('height', np.uint32),
+    ('width', np.uint32),
+    ('max_subscribers', np.uint32),
+    ('dtype', 'S8'),
+    ('write_sequence', np.uint64),
+    ('closed', np.uint8)
+])
+
+# A subscriber's [pid] (0 if the entry is free), the sequence number of the
+# frame it holds ([cursor]), the frames it missed by falling behind, and the
+# time of its last read.
+#
+RING_SUBSCRIBER_DTYPE = np.dtype([
+    ('pid', np.int64),
+    ('cursor', np.uint64),
+    ('missed', np.uint64),
+    ('heartbeat', np.float64)
+])
+
+# Access right asked for by processAlive() on Windows, the error when it is
+# refused, and the exit code of a process still running.
+#
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_ACCESS_DENIED = 5
+STILL_ACTIVE = 259
+
+# Names of the rings published by this process, as given to the resource
+# tracker, see attachSharedMemory().
+#
+published_names = set()
+
+class SlowConsumerWarning(UserWarning):
+    pass
+
+class RingLock(object):
+    """ A lock, shared by every process using the ring [name], guarding
+    the subscriber entries. It is an OS lock on a file next to the ring, so
+    it is released if its holder dies.
+    """
+    def __init__(self, name):
+        self.path = os.path.join(tempfile.gettempdir(), name.lstrip('/') +
+            '.lock')
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        if os.name == 'nt':
+            import msvcrt
+            msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if os.name == 'nt':
+            import msvcrt
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        os.close(self.fd)
+        self.fd = None
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+def processAlive(pid):
+    """ Return whether process [pid] is running, without signalling it.
+    """
+    if os.name == 'nt':
+        # os.kill() terminates the process on Windows, so ask for its exit
+        # code instead.
+        #
+        import ctypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION,
+            False, pid)
+        if not handle:
+            # Access is denied to processes that exist but aren't ours.
+            #
+            return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle,
+                ctypes.byref(exit_code)):
+                return True
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def attachSharedMemory(name):
+    """ Attach to an existing shared memory block without leaving it with
+    this process's resource tracker, which would otherwise unlink it when
+    the process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13, attaching registers the block, so unregister it
+    # again; unless this process published it, in which case the
+    # registration is the publisher's.
+    #
+    shm = shared_memory.SharedMemory(name=name)
+    if shm._name not in published_names:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+def ringViews(buf, capacity=None, height=None, width=None, dtype=None,
+    max_subscribers=None):
+    """ Return (header, slot_sequences, subscribers, meta, data) arrays
+    viewing the ring in [buf]. The geometry is read from the header unless
+    given, in which case the header is written.
+    """
+    header = np.ndarray(1, dtype=RING_HEADER_DTYPE, buffer=buf)
+    if capacity is None:
+        capacity = int(header['capacity'][0])
+        height = int(header['height'][0])
+        width = int(header['width'][0])
+        dtype = np.dtype(header['dtype'][0].decode())
+        max_subscribers = int(header['max_subscribers'][0])
+    else:
+        header['capacity'] = capacity
+        header['height'] = height
+        header['width'] = width
+        header['dtype'] = np.dtype(dtype).str.encode()
+        header['max_subscribers'] = max_subscribers
+    offset = ringOffset(RING_HEADER_DTYPE.itemsize)
+    slot_sequences = np.ndarray(capacity, dtype=np.uint64, buffer=buf,
+        offset=offset)
+    offset = ringOffset(offset + slot_sequences.nbytes)
+    subscribers = np.ndarray(max_subscribers, dtype=RING_SUBSCRIBER_DTYPE,
+        buffer=buf, offset=offset)
+    offset = ringOffset(offset + subscribers.nbytes)
+    meta = np.ndarray(capacity, dtype=FRAME_METADATA_DTYPE, buffer=buf,
+        offset=offset)
+    offset = ringOffset(offset + meta.nbytes)
+    data = np.ndarray((capacity, height, width), dtype=dtype, buffer=buf,
+        offset=offset)
+    return header, slot_sequences, subscribers, meta, data
+
+def ringOffset(offset):
+    return -(-offset//RING_ALIGNMENT)*RING_ALIGNMENT
+
+def ringSize(capacity, height, width, dtype, max_subscribers):
+    """ Return the bytes needed for a ring of the given geometry. """
+    size = ringOffset(RING_HEADER_DTYPE.itemsize)
+    size = ringOffset(size + 8*capacity)
+    size = ringOffset(size + RING_SUBSCRIBER_DTYPE.itemsize*max_subscribers)
+    size = ringOffset(size + FRAME_METADATA_DTYPE.itemsize*capacity)
+    return size + capacity*height*width*np.dtype(dtype).itemsize
+
+class FramePublisher(object):
+    """ Broadcast frames from a Basler camera to other processes through a
+    ring of [capacity] frames in shared memory.
+
+    Frames are read straight into the ring with readInto(), so publishing
+    costs one copy however many subscribers there are. The publisher never
+    waits for subscribers: a subscriber that falls more than [capacity]
+    frames behind misses frames. Such slow consumers are listed in
+    [slow_consumers] until they catch up, and a SlowConsumerWarning is
+    issued each time one falls behind.
+
+    Subscribers attach by [name] with FrameSubscriber. The ring is removed
+    when the publisher is closed.
+    """
+    def __init__(self, camera, name=None, capacity=32, max_subscribers=8):
+        aoi = camera.getAOI()
+        pixel_format = camera.getPixelFormat()
+        if aoi is None or pixel_format is None:
+            raise Exception("Could not read the AOI and pixel format from " +
+                "the camera.")
+        w, h = aoi[:2]
+        dtype = pixelFormatDtype(pixel_format)
+        self.camera = camera
+        self.capacity = int(capacity)
+        self.shm = shared_memory.SharedMemory(name=name, create=True,
+            size=ringSize(self.capacity, h, w, dtype, max_subscribers))
+        self.name = self.shm.name
+        published_names.add(self.shm._name)
+        self.header, self.slot_sequences, self.subscribers, self.meta, \
+            self.data = ringViews(self.shm.buf, self.capacity, h, w, dtype,
+            max_subscribers)
+        self.slot_sequences[:] = 0
+        self.subscribers[:] = 0
+        self.header['write_sequence'] = 0
+        self.header['closed'] = 0
+        self.header['magic'] = RING_MAGIC
+        self.lock = RingLock(self.name)
+        self.slow_consumers = set()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def checkSubscribers(self):
+        """ Free the entries of subscribers whose process has gone, and
+        flag those that have fallen a full ring behind, until they catch up.
+        """
+        write_sequence = int(self.header['write_sequence'][0])
+        for subscriber in self.subscribers:
+            pid = int(subscriber['pid'])
+            if pid == 0:
+                continue
+            if not processAlive(pid):
+                # The entry may have been given up and claimed by another
+                # process since it was read, so only free it if it hasn't.
+                #
+                with self.lock:
+                    if subscriber['pid'] == pid:
+                        subscriber['pid'] = 0
+                self.slow_consumers.discard(pid)
+                continue
+            lag = write_sequence - int(subscriber['cursor'])
+            if lag < self.capacity:
+                self.slow_consumers.discard(pid)
+            elif pid not in self.slow_consumers:
+                self.slow_consumers.add(pid)
+                warnings.warn("Subscriber " + str(pid) + " is " + str(lag) +
+                    " frames behind the publisher and missing frames.",
+                    SlowConsumerWarning, stacklevel=2)
+
+    def close(self):
+        """ Stop publishing, tell subscribers and remove the ring. Later
+        calls do nothing.
+        """
+        if self.shm is None:
+            return
+        self.stop()
+        self.header['closed'] = 1
+        self.header = self.slot_sequences = self.subscribers = self.meta = \
+            self.data = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        published_names.discard(self.shm._name)
+        self.shm = None
+        self.lock.remove()
+
+    def publish(self, read_timeout_ms=1000, max_grab_attempts=3):
+        """ Read the next frame from the camera into the ring. Returns its
+        sequence number, or None if no frame was read.
+        """
+        if self.shm is None:
+            raise Exception("The publisher is closed.")
+        sequence = int(self.header['write_sequence'][0])
+        slot = sequence % self.capacity
+        # Marked as being written while readInto() may write to it. The
+        # slot is only written once a frame has arrived, so if none does,
+        # the frame it held is still whole and is given back to readers.
+        #
+        previous = int(self.slot_sequences[slot])
+        self.slot_sequences[slot] = 0
+        n_read = 0
+        try:
+            n_read = self.camera.readInto(self.data[slot:slot + 1],
+                self.meta[slot:slot + 1], read_timeout_ms=read_timeout_ms,
+                max_grab_attempts=max_grab_attempts)
+        finally:
+            if n_read == 0:
+                self.slot_sequences[slot] = previous
+        if n_read == 0:
+            return None
+        self.meta[slot]['sequence'] = sequence
+        self.slot_sequences[slot] = sequence + 1
+        self.header['write_sequence'] = sequence + 1
+        self.checkSubscribers()
+        return sequence
+
+    def run(self, n_frames=None, read_timeout_ms=1000):
+        """ Publish [n_frames] frames, or until stop() if None, from a
+        camera that is already grabbing.
+        """
+        n_published = 0
+        while not self.stop_event.is_set() and (n_frames is None or
+            n_published < n_frames):
+            if self.publish(read_timeout_ms=read_timeout_ms) is not None:
+                n_published += 1
+            elif not self.camera.isExposing():
+                break
+        return n_published
+
+    def start(self, read_timeout_ms=100):
+        """ Publish on a background thread until stop(). """
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run,
+            kwargs={'read_timeout_ms': read_timeout_ms}, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+class FrameSubscriber(object):
+    """ Read frames published by a FramePublisher in another process.
+
+    next() returns a view of the frame in shared memory, without copying.
+    The view stays valid until the publisher laps the ring, which it does
+    without waiting; isCurrent() tells whether a frame has been overwritten,
+    and a frame needed for longer should be copied. Calling next() again
+    releases the previous frame.
+    """
+    def __init__(self, name, poll_s=0.0005):
+        self.shm = attachSharedMemory(name)
+        self.header, self.slot_sequences, self.subscribers, self.meta, \
+            self.data = ringViews(self.shm.buf)
+        magic = self.header['magic'][0]
+        if magic != RING_MAGIC:
+            self.shm.close()
+            if magic.startswith(RING_MAGIC_PREFIX):
+                raise Exception("Frame ring " + str(name) + " has layout " +
+                    "version " + magic[len(RING_MAGIC_PREFIX):].decode() +
+                    ", but this version reads " +
+                    RING_MAGIC[len(RING_MAGIC_PREFIX):].decode() + ".")
+            raise Exception("Shared memory block " + str(name) + " is not " +
+                "a frame ring.")
+        self.capacity = len(self.slot_sequences)
+        self.poll_s = poll_s
+        self.cursor = int(self.header['write_sequence'][0])
+        self.missed = 0
+        self.entry = None
+        # Entries are claimed under the ring's lock, so that subscribers
+        # attaching together can't claim the same one.
+        #
+        with RingLock(name):
+            for i, subscriber in enumerate(self.subscribers):
+                if subscriber['pid'] == 0:
+                    subscriber['cursor'] = self.cursor
+                    subscriber['missed'] = 0
+                    subscriber['heartbeat'] = time.time()
+                    subscriber['pid'] = os.getpid()
+                    self.entry = self.subscribers[i:i + 1]
+                    break
+        if self.entry is None:
+            self.shm.close()
+            raise Exception("All " + str(len(self.subscribers)) +
+                " subscriber entries of " + str(name) + " are in use.")
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.next()
+            except QueueClosed:
+                return
+
+    def close(self):
+        """ Give up the subscriber entry and detach from the ring. Later
+        calls do nothing.
+        """
+        if self.shm is None:
+            return
+        if self.entry is not None:
+            self.entry['pid'] = 0
+            self.entry = None
+        self.header = self.slot_sequences = self.subscribers = self.meta = \
+            self.data = None
+        self.shm.close()
+        self.shm = None
+
+    def isCurrent(self, sequence):
+        """ Return whether the frame [sequence] is still in the ring. """
+        return int(self.slot_sequences[sequence % self.capacity]) == \
+            sequence + 1
+
+    def next(self, timeout=None):
+        """ Return the next (sequence, frame, metadata), waiting up to
+        [timeout] seconds, or None on timeout. Raises QueueClosed once the
+        publisher has closed and every frame has been read.
+
+        If the publisher has lapped this subscriber, the frames overwritten
+        are skipped and counted in [missed].
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            write_sequence = int(self.header['write_sequence'][0])
+            if self.cursor < write_sequence:
+                if write_sequence - self.cursor > self.capacity:
+                    self.missed += write_sequence - self.capacity - \
+                        self.cursor
+                    self.cursor = write_sequence - self.capacity
+                sequence = self.cursor
+                slot = sequence % self.capacity
+                if int(self.slot_sequences[slot]) == sequence + 1:
+                    break
+                # Overwritten, or being overwritten, since the check above.
+                #
+                self.missed += 1
+                self.cursor += 1
+                continue
+            if self.header['closed'][0]:
+                raise QueueClosed()
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_s)
+        self.cursor += 1
+        self.entry['cursor'] = sequence
+        self.entry['missed'] = self.missed
+        self.entry['heartbeat'] = time.time()
+        return sequence, self.data[slot], self.meta[slot]
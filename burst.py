@@ -0,0 +1,158 @@
+import math
+import time
+
+import numpy as np
+
+try:
+    from .framestore import FRAME_METADATA_DTYPE, pixelFormatDtype, \
+        writeFrame
+    from .packed import isPacked, newScratch
+except ImportError:
+    from framestore import FRAME_METADATA_DTYPE, pixelFormatDtype, \
+        writeFrame
+    from packed import isPacked, newScratch
+
+# Per-frame metadata of a burst. [trigger_index] counts the triggers, from 0,
+# [trigger_time] is the host time a software trigger was sent (NaN for
+# hardware triggers) and [trigger_timestamp] the camera time of the trigger,
+# in ticks, worked back from the timestamp of the first frame it exposed (0
+# if that frame failed or was lost).
+#
+BURST_METADATA_DTYPE = np.dtype(FRAME_METADATA_DTYPE.descr + [
+    ('trigger_index', np.uint32),
+    ('trigger_time', np.float64),
+    ('trigger_timestamp', np.uint64)
+])
+
+class Burst(object):
+    """ Pipelined triggered acquisition of a fixed number of frames.
+
+    The camera's trigger must already be configured, see
+    Basler.configureTrigger(). With a software trigger, the next trigger is
+    sent as soon as the camera is ready for it, while earlier frames are
+    still being read out and transmitted, so frames arrive at the sensor's
+    full rate. No more than [max_in_flight] frames are left waiting to be
+    retrieved, by default the number of driver buffers, so that none are
+    lost for want of a buffer. With a hardware trigger, frames are collected
+    as the triggers arrive.
+
+    Frames are returned in the order they were exposed, each tagged with
+    the trigger that exposed it. The trigger is worked out from the frame's
+    block ID, so frames that never reach the host (e.g. for want of a
+    buffer) don't shift the triggers of later ones; they are counted in
+    [n_lost], and failed grabs in [n_failed].
+    """
+    def __init__(self, camera, max_in_flight=None):
+        self.camera = camera
+        self.max_in_flight = max_in_flight
+        self.n_triggers = 0
+        self.n_failed = 0
+        self.n_lost = 0
+
+    def run(self, n_frames, read_timeout_ms=1000, max_grab_attempts=3):
+        """ Acquire [n_frames] frames, starting and stopping grabbing if the
+        camera isn't already grabbing.
+
+        Returns (data, meta), an (N, H, W) array of frames and N
+        BURST_METADATA_DTYPE records, where N is less than [n_frames] if
+        [max_grab_attempts] failed or timed out grabs occurred first.
+        """
+        camera = self.camera
+        camera.checkNoHostTransform('burst()')
+        aoi = camera.getAOI()
+        pixel_format = camera.getPixelFormat()
+        if aoi is None or pixel_format is None:
+            raise Exception("Could not read the AOI and pixel format from " +
+                "the camera.")
+        w, h = aoi[:2]
+        selector = camera.getTriggerSelector()
+        if selector is None:
+            raise Exception("No trigger is enabled; see configureTrigger().")
+        software = camera.getTriggerSource(selector) == 'Software'
+        frames_per_trigger = 1
+        if selector == 'AcquisitionStart':
+            frames_per_trigger = camera.getAcquisitionFrameCount()
+            if not frames_per_trigger:
+                raise Exception("Could not read the number of frames per " +
+                    "acquisition start trigger (AcquisitionFrameCount).")
+        n_triggers = int(math.ceil(n_frames/float(frames_per_trigger)))
+        max_in_flight = self.max_in_flight or camera.getMaxNumBuffers() or 1
+        try:
+            tick_frequency_hz = camera.getNodeValue(
+                'GevTimestampTickFrequency')
+        except Exception:
+            tick_frequency_hz = 125*10**6
+        delay_ticks = int(((camera.getTriggerDelayMicroseconds(selector) or
+            0) + camera.EXPOSURE_START_DELAY_US)*tick_frequency_hz/10**6)
+
+        data = np.empty((n_frames, h, w), dtype=pixelFormatDtype(pixel_format))
+        meta = np.zeros(n_frames, dtype=BURST_METADATA_DTYPE)
+        scratch = None
+        if isPacked(pixel_format):
+            scratch = newScratch(pixel_format, h*w)
+        trigger_times = np.full(n_triggers, np.nan)
+        trigger_timestamps = {}
+
+        started = not camera.isExposing()
+        if started:
+            camera.beginExpose('OneByOne')
+        self.n_triggers = 0
+        self.n_failed = 0
+        self.n_lost = 0
+        n_read = 0
+        n_done = 0
+        last_block_id = None
+        grab_attempts = 0
+        try:
+            while n_read < n_frames and grab_attempts < max_grab_attempts:
+                can_trigger = software and self.n_triggers < n_triggers and \
+                    self.n_triggers*frames_per_trigger - n_done < \
+                    max_in_flight
+                if can_trigger and camera.camera.WaitForFrameTriggerReady(0,
+                    camera.pylon.TimeoutHandling_Return):
+                    trigger_times[self.n_triggers] = time.time()
+                    camera.camera.ExecuteSoftwareTrigger()
+                    self.n_triggers += 1
+                    continue
+                grabResult = camera.retrieveResult(1 if can_trigger else
+                    read_timeout_ms)
+                if not grabResult.IsValid():
+                    if not can_trigger:
+                        grab_attempts += 1
+                    continue
+                # Block IDs count every frame the camera sent, so a gap is
+                # frames lost on the way. A smaller ID has wrapped around.
+                #
+                block_id = grabResult.GetBlockID()
+                if last_block_id is not None and block_id > last_block_id:
+                    self.n_lost += block_id - last_block_id - 1
+                    n_done += block_id - last_block_id - 1
+                last_block_id = block_id
+                trigger_index = n_done//frames_per_trigger
+                n_done += 1
+                if not grabResult.GrabSucceeded():
+                    grabResult.Release()
+                    self.n_failed += 1
+                    grab_attempts += 1
+                    continue
+                writeFrame(grabResult, data[n_read], meta[n_read],
+                    sequence=n_read, pixel_format=pixel_format,
+                    scratch=scratch)
+                grabResult.Release()
+                if (n_done - 1) % frames_per_trigger == 0:
+                    trigger_timestamps[trigger_index] = max(int(
+                        meta[n_read]['timestamp']) - delay_ticks, 0)
+                meta[n_read]['trigger_index'] = trigger_index
+                meta[n_read]['trigger_timestamp'] = trigger_timestamps.get(
+                    trigger_index, 0)
+                if trigger_index < n_triggers:
+                    meta[n_read]['trigger_time'] = trigger_times[
+                        trigger_index]
+                else:
+                    meta[n_read]['trigger_time'] = np.nan
+                n_read += 1
+        finally:
+            if started:
+                camera.endExpose()
+        camera.clock.annotate(meta[:n_read])
+        return data[:n_read], meta[:n_read]
@@ -0,0 +1,301 @@
+import collections
+
+import numpy as np
+
+try:
+    from .framestore import pixelFormatDtype
+except ImportError:
+    from framestore import pixelFormatDtype
+
+# Kinds of master frame, and the settings each is keyed on (see
+# Calibrator.key()). A bias doesn't depend on exposure or temperature, and a
+# flat is dark-subtracted and normalised so depends on neither.
+#
+MASTER_KEY_FIELDS = {
+    'bias': ('gain', 'black_level', 'binning_h', 'binning_v'),
+    'dark': ('exposure_us', 'gain', 'black_level', 'binning_h', 'binning_v',
+        'temperature'),
+    'flat': ('gain', 'black_level', 'binning_h', 'binning_v')
+}
+
+# Ratio of the standard deviation to the median absolute deviation of normally
+# distributed values.
+#
+MAD_TO_SIGMA = 1.4826
+
+class Accumulator(object):
+    """ Running per-pixel mean and variance of a stream of frames, by
+    Welford's method in float64. Memory is a few frames whatever the number
+    accumulated, and adding a frame allocates nothing.
+    """
+    def __init__(self, shape):
+        self.n = 0
+        self.mean = np.zeros(shape, dtype=np.float64)
+        self.m2 = np.zeros(shape, dtype=np.float64)
+        self.delta = np.empty(shape, dtype=np.float64)
+        self.delta2 = np.empty(shape, dtype=np.float64)
+
+    def add(self, frame):
+        self.n += 1
+        np.subtract(frame, self.mean, out=self.delta)
+        np.divide(self.delta, self.n, out=self.delta2)
+        self.mean += self.delta2
+        np.subtract(frame, self.mean, out=self.delta2)
+        self.delta *= self.delta2
+        self.m2 += self.delta
+
+    def finish(self):
+        """ Return (mean, variance, n). """
+        return self.mean, self.variance(), self.n
+
+    def variance(self):
+        """ Return the sample variance per pixel. """
+        if self.n < 2:
+            return np.zeros_like(self.m2)
+        return self.m2/(self.n - 1)
+
+class ClippedAccumulator(Accumulator):
+    """ An Accumulator that rejects outliers, such as cosmic ray hits, by
+    sigma clipping against a rolling [window] of recent frames.
+
+    Each frame waits in the window until it is the oldest; pixels further
+    than [sigma] standard deviations, estimated robustly, from the window's
+    median are then replaced by the median before the frame is
+    accumulated. finish() flushes the frames still in the window. Rejected
+    pixels are counted in [clipped].
+    """
+    def __init__(self, shape, window=5, sigma=3.):
+        super(ClippedAccumulator, self).__init__(shape)
+        self.window = np.empty((window,) + tuple(shape), dtype=np.float64)
+        self.sigma = sigma
+        self.n_window = 0
+        self.oldest = 0
+        self.median = np.empty(shape, dtype=np.float64)
+        self.frame = np.empty(shape, dtype=np.float64)
+        self.deviations = np.empty_like(self.window)
+        self.threshold = np.empty(shape, dtype=np.float64)
+        self.mask = np.empty(shape, dtype=bool)
+        self.clipped = 0
+
+    def add(self, frame):
+        if self.n_window < len(self.window):
+            self.window[self.n_window] = frame
+            self.n_window += 1
+            return
+        self.addClipped(self.oldest, self.window)
+        self.window[self.oldest] = frame
+        self.oldest = (self.oldest + 1) % len(self.window)
+
+    def addClipped(self, i, window):
+        """ Clip frame [i] of [window] against the window and accumulate
+        it.
+        """
+        # The standard deviation is estimated from the median absolute
+        # deviation, since in a window this small an outlier would inflate
+        # the standard deviation enough to hide itself.
+        #
+        np.median(window, axis=0, out=self.median)
+        deviations = self.deviations[:len(window)]
+        np.subtract(window, self.median, out=deviations)
+        np.abs(deviations, out=deviations)
+        np.median(deviations, axis=0, out=self.threshold)
+        self.threshold *= MAD_TO_SIGMA*self.sigma
+        np.greater(deviations[i], self.threshold, out=self.mask)
+        self.clipped += int(np.count_nonzero(self.mask))
+        np.copyto(self.frame, window[i])
+        np.copyto(self.frame, self.median, where=self.mask)
+        super(ClippedAccumulator, self).add(self.frame)
+
+    def finish(self):
+        window = self.window[:self.n_window]
+        for k in range(self.n_window):
+            self.addClipped((self.oldest + k) % self.n_window, window)
+        self.n_window = 0
+        return super(ClippedAccumulator, self).finish()
+
+class Master(object):
+    """ A master calibration frame: the per-pixel mean of [n] frames and
+    its variance, with the settings [key] it applies to.
+    """
+    def __init__(self, kind, key, mean, variance, n):
+        self.kind = kind
+        self.key = key
+        self.mean = mean
+        self.variance = variance
+        self.n = n
+
+class Calibrator(object):
+    """ Build master bias, dark and flat frames from a Basler camera as
+    frames stream in, and correct live frames with them.
+
+    Masters are kept in a cache of at most [capacity] masters, keyed on the
+    camera settings they depend on (see MASTER_KEY_FIELDS), and the least
+    recently used is evicted first. Temperatures are rounded to
+    [temperature_step] degrees so that masters survive small drifts.
+
+    Correction subtracts the dark (or, failing that, the bias) and divides
+    by the flat:
+
+        calibrator.select()
+        for frame in frames:
+            calibrator.correct(frame)
+
+    select() reads the camera settings and prepares the masters, so call it
+    again after changing exposure, gain, black level or binning.
+    """
+    def __init__(self, camera, capacity=16, temperature_step=1.):
+        self.camera = camera
+        self.capacity = capacity
+        self.temperature_step = temperature_step
+        self.masters = collections.OrderedDict()
+        self.offset = None
+        self.inverse_flat = None
+        self.scratch = None
+
+    def add(self, master):
+        """ Add [master] to the cache, evicting the least recently used
+        master if it is full.
+        """
+        self.masters[(master.kind, master.key)] = master
+        self.masters.move_to_end((master.kind, master.key))
+        while len(self.masters) > self.capacity:
+            self.masters.popitem(last=False)
+
+    def build(self, kind, n_frames, window=None, sigma=3.,
+        read_timeout_ms=1000, max_grab_attempts=3):
+        """ Build and cache a master [kind] from [n_frames] frames read from
+        a camera that is already grabbing, and return it.
+
+        If [window] is given, frames are sigma clipped over a rolling window
+        of that many frames. A flat is corrected by the matching dark or
+        bias, if cached, and normalised to a mean of 1.
+        """
+        if kind not in MASTER_KEY_FIELDS:
+            raise Exception("Unknown master kind: " + str(kind) + ". Must " +
+                "be one of " + str(list(MASTER_KEY_FIELDS)) + ".")
+        aoi = self.camera.getAOI()
+        pixel_format = self.camera.getPixelFormat()
+        if aoi is None or pixel_format is None:
+            raise Exception("Could not read the AOI and pixel format from " +
+                "the camera.")
+        w, h = aoi[:2]
+        settings = self.settings()
+        frame = np.empty((1, h, w), dtype=pixelFormatDtype(pixel_format))
+        if window is None:
+            accumulator = Accumulator((h, w))
+        else:
+            accumulator = ClippedAccumulator((h, w), window=window,
+                sigma=sigma)
+        n_read = 0
+        grab_attempts = 0
+        while n_read < n_frames and grab_attempts < max_grab_attempts:
+            if self.camera.readInto(frame, read_timeout_ms=read_timeout_ms,
+                max_grab_attempts=1) == 0:
+                grab_attempts += 1
+                continue
+            grab_attempts = 0
+            accumulator.add(frame[0])
+            n_read += 1
+        mean, variance, n = accumulator.finish()
+        if n == 0:
+            raise Exception("No frames were read for the master " + kind +
+                ".")
+        if kind == 'flat':
+            offset = self.lookup('dark', settings) or \
+                self.lookup('bias', settings)
+            if offset is not None:
+                mean = mean - offset.mean
+            norm = mean.mean()
+            if not norm > 0:
+                raise Exception("The flat has no signal above the dark or " +
+                    "bias.")
+            mean = mean/norm
+            variance = variance/norm**2
+        master = Master(kind, self.key(kind, settings), mean, variance, n)
+        self.add(master)
+        return master
+
+    def correct(self, frame, out=None):
+        """ Correct [frame] with the masters chosen by select().
+
+        The result is written to [out], which may be [frame] itself for an
+        in-place correction, and returned. By default a floating point
+        frame is corrected in place and an integer one into a float32
+        scratch frame, reused between calls. Integer results are clipped to
+        the dtype's range.
+        """
+        if out is None:
+            if np.issubdtype(frame.dtype, np.floating):
+                out = frame
+            else:
+                if self.scratch is None or self.scratch.shape != frame.shape:
+                    self.scratch = np.empty(frame.shape, dtype=np.float32)
+                out = self.scratch
+        if np.issubdtype(out.dtype, np.floating):
+            work = out
+        else:
+            if self.scratch is None or self.scratch.shape != frame.shape:
+                self.scratch = np.empty(frame.shape, dtype=np.float32)
+            work = self.scratch
+        if self.offset is not None:
+            np.subtract(frame, self.offset, out=work, casting='unsafe')
+        elif work is not frame:
+            np.copyto(work, frame, casting='unsafe')
+        if self.inverse_flat is not None:
+            work *= self.inverse_flat
+        if work is not out:
+            info = np.iinfo(out.dtype)
+            np.rint(work, out=work)
+            np.clip(work, info.min, info.max, out=work)
+            np.copyto(out, work, casting='unsafe')
+        return out
+
+    def key(self, kind, settings):
+        """ Return the cache key of a master [kind] for camera [settings].
+        """
+        return tuple(settings[field] for field in MASTER_KEY_FIELDS[kind])
+
+    def lookup(self, kind, settings=None):
+        """ Return the cached master [kind] for [settings], by default the
+        camera's current settings, or None.
+        """
+        if settings is None:
+            settings = self.settings()
+        master = self.masters.get((kind, self.key(kind, settings)))
+        if master is not None:
+            self.masters.move_to_end((kind, master.key))
+        return master
+
+    def select(self):
+        """ Choose the masters for the camera's current settings and prepare
+        them for correct(). Returns the (offset, flat) masters used, either
+        of which may be None.
+        """
+        settings = self.settings()
+        offset = self.lookup('dark', settings) or \
+            self.lookup('bias', settings)
+        flat = self.lookup('flat', settings)
+        self.offset = None
+        self.inverse_flat = None
+        if offset is not None:
+            self.offset = offset.mean.astype(np.float32)
+        if flat is not None:
+            with np.errstate(divide='ignore'):
+                self.inverse_flat = np.where(flat.mean > 0, 1/flat.mean,
+                    0).astype(np.float32)
+        return offset, flat
+
+    def settings(self):
+        """ Return the camera settings that masters are keyed on. """
+        temperature = self.camera.getTemperature()
+        if temperature is not None and self.temperature_step:
+            temperature = round(temperature/self.temperature_step)*\
+                self.temperature_step
+        return {
+            'exposure_us': self.camera.getExposureTimeMicroseconds(),
+            'gain': self.camera.getGain(),
+            'black_level': self.camera.getBlackLevel(),
+            'binning_h': self.camera.getBinningHorizontal() or 1,
+            'binning_v': self.camera.getBinningVertical() or 1,
+            'temperature': temperature
+        }
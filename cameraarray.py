@@ -0,0 +1,154 @@
+import collections
+
+try:
+    from .basler import Basler, loadBackend
+    from .discovery import getDirectory
+    from .framestore import newFrame, newMetadata, writeMetadata
+except ImportError:
+    from basler import Basler, loadBackend
+    from discovery import getDirectory
+    from framestore import newFrame, newMetadata, writeMetadata
+
+class CameraArray(object):
+    """ Synchronised acquisition from several Basler cameras.
+
+    Devices are looked up in a cached enumeration (see
+    discovery.DeviceDirectory) and each camera is opened by serial number
+    into a single pylon InstantCameraArray, so one grab loop serves all of
+    them. Each camera is also wrapped in a [camera_class] instance, available
+    in [cameras], so the usual getters and setters can be used per camera.
+
+    Frames are grouped into sets, one frame per camera, by frame ID or by
+    timestamp. Timestamps are only comparable across cameras if their clocks
+    are synchronised (e.g. with PTP).
+
+    [backend] selects the pylon implementation, as for Basler.find().
+    """
+    def __init__(self, serial_numbers, camera_class=Basler, backend='pylon'):
+        self.serial_numbers = [int(sn) for sn in serial_numbers]
+        self.camera_class = camera_class
+        self.backend = backend
+        self.array = None
+        self.cameras = []
+        self.pending = []
+        self.sequence = 0
+        self.unmatched = 0
+
+    @property
+    def pylon(self):
+        """ The pylon module of the backend, imported on first use. """
+        return loadBackend(self.backend)[0]
+
+    def __len__(self):
+        return len(self.serial_numbers)
+
+    def beginExpose(self, grab_strategy='OneByOne'):
+        """ Start grabbing on all cameras. """
+        self.connect()
+        self.pending = [collections.deque() for sn in self.serial_numbers]
+        if grab_strategy == 'OneByOne':
+            rtn = self.array.StartGrabbing(self.pylon.GrabStrategy_OneByOne)
+        elif grab_strategy == 'LatestImageOnly':
+            rtn = self.array.StartGrabbing(
+                self.pylon.GrabStrategy_LatestImageOnly)
+        else:
+            raise Exception("Unknown grab strategy: " + str(grab_strategy))
+        return rtn
+
+    def connect(self):
+        """ Open all cameras, enumerating devices on first use. """
+        if self.array is None:
+            self.find()
+        if not self.array.IsOpen():
+            self.array.Open()
+
+    def disconnect(self):
+        """ Close all cameras. """
+        if self.array is not None and self.array.IsOpen():
+            self.array.Close()
+
+    def endExpose(self):
+        """ Stop grabbing on all cameras. """
+        if self.array is not None:
+            self.array.StopGrabbing()
+
+    def find(self):
+        """ Look up the devices, enumerating them at most once, and attach a
+        camera per serial number.
+        """
+        tlFactory = self.pylon.TlFactory.GetInstance()
+        directory = getDirectory(self.backend)
+        devices = {}
+        for sn in self.serial_numbers:
+            devices[sn] = directory.lookup(sn)
+        missing = [sn for sn in self.serial_numbers if devices[sn] is None]
+        if missing:
+            raise Exception("Failed to find camera(s): " + str(missing))
+
+        self.array = self.pylon.InstantCameraArray(len(self.serial_numbers))
+        self.cameras = []
+        for i, sn in enumerate(self.serial_numbers):
+            self.array[i].Attach(tlFactory.CreateDevice(devices[sn]))
+            self.array[i].SetCameraContext(i)
+            camera = self.camera_class()
+            camera.backend = self.backend
+            camera.camera = self.array[i]
+            self.cameras.append(camera)
+
+    def isExposing(self):
+        try:
+            rtn = bool(self.array.IsGrabbing())
+        except:
+            rtn = None
+        return rtn
+
+    def read(self, n_sets=1, match='frame_id', tolerance=0,
+        read_timeout_ms=1000, max_grab_attempts=3):
+        """ Read matched frame set(s) from the cameras.
+
+        Each set is a tuple of (frames, metadata), ordered as
+        [serial_numbers]. Frames are matched on [match], either 'frame_id' or
+        'timestamp', and two frames belong to the same set if their values
+        differ by no more than [tolerance] (in camera ticks for timestamps).
+        A frame that can no longer be matched because every other camera has
+        moved past it is discarded and counted in [unmatched].
+        """
+        if match not in ('frame_id', 'timestamp'):
+            raise Exception("Frames can be matched on 'frame_id' or " +
+                "'timestamp', not " + str(match) + ".")
+        sets = []
+        grab_attempts = 0
+        while len(sets) < n_sets:
+            if grab_attempts >= max_grab_attempts:
+                break
+            grabResult = self.array.RetrieveResult(
+                read_timeout_ms, self.pylon.TimeoutHandling_Return)
+            if grabResult.IsValid() and grabResult.GrabSucceeded():
+                idx = grabResult.GetCameraContext()
+                meta = newMetadata(1)[0]
+                writeMetadata(grabResult, meta, sequence=self.sequence)
+                self.cameras[idx].clock.annotate(meta)
+                img = newFrame(grabResult, 
+                    self.cameras[idx].getPixelFormat())
+                self.pending[idx].append((img, meta))
+                grabResult.Release()
+                frame_set = self.matchSet(match, tolerance)
+                if frame_set is not None:
+                    sets.append(frame_set)
+            else:
+                grab_attempts += 1
+        return sets
+
+    def matchSet(self, match, tolerance):
+        """ Pop and return the oldest complete set from the pending frames,
+        or None.
+        """
+        while all(self.pending):
+            keys = [int(q[0][1][match]) for q in self.pending]
+            if max(keys) - min(keys) <= tolerance:
+                heads = [q.popleft() for q in self.pending]
+                self.sequence += 1
+                return ([h[0] for h in heads], [h[1] for h in heads])
+            self.pending[keys.index(min(keys))].popleft()
+            self.unmatched += 1
+        return None
@@ -5,7 +5,31 @@ class camera(object):
     def __init__(self):
         self.camera = None
 
-    def beginExpose(self):
+    def acquire(self, grab_strategy='OneByOne', queue_size=16,
+        overflow='DropOldest', read_timeout_ms=1000):
+        pass
+
+    def beginExpose(self, grab_strategy='LatestImageOnly', background=False,
+        queue_size=16, overflow='DropOldest', read_timeout_ms=1000,
+        on_frame=None, event_driven=False, zero_copy=False):
+        pass
+
+    def broadcast(self, name=None, capacity=32, max_subscribers=8):
+        pass
+
+    def burst(self, n_frames, read_timeout_ms=1000, max_grab_attempts=3,
+        max_in_flight=None):
+        pass
+
+    def checkNoHostTransform(self, operation):
+        pass
+
+    def configureSequencer(self, sets, executions=1, advance='Auto',
+        source='AlwaysActive'):
+        pass
+
+    def configureTrigger(self, source='Software', delay_us=0,
+        activation='RisingEdge', burst_frames=None):
         pass
 
     def connect(self):
@@ -13,6 +37,10 @@ class camera(object):
 
     def disconnect(self):
         pass
+
+    def enableChunks(self, chunks=('Framecounter', 'Timestamp',
+        'ExposureTime', 'GainAll'), enable=True):
+        pass
     
     def endExpose(self):
         pass
@@ -20,6 +48,9 @@ class camera(object):
     def getAcquisitionMode(self):
         pass
 
+    def getAcquisitionFrameCount(self):
+        pass
+
     def getAOI(self):
         pass
 
@@ -47,11 +78,23 @@ class camera(object):
     def getDeviceUserID(self):
         pass
 
+    def getEnabledChunks(self):
+        pass
+
     def getExposureTimeMicroseconds(self):
         pass
 
     def getFrameRate(self):
         pass
+
+    def getFrame(self, timeout=None):
+        pass
+
+    def getFramesNoWait(self):
+        pass
+
+    def getFrameStore(self):
+        pass
         
     def getGain(self):
         pass  
@@ -68,9 +111,18 @@ class camera(object):
     def getIPD(self):        
         pass
 
+    def getHostTransform(self):
+        pass
+
     def getMaxNumBuffers(self):
         pass
 
+    def getNode(self, name):
+        pass
+
+    def getNodeValue(self, name):
+        pass
+
     def getFrameOverheadsSeconds(self):
         pass
 
@@ -98,18 +150,63 @@ class camera(object):
     def getTransmissionStartDelay(self):
         pass  
 
-    def read(self, n_images, read_timeout_ms):
+    def getTriggerDelayMicroseconds(self, selector='FrameStart'):
+        pass
+
+    def getTriggerMode(self, selector='FrameStart'):
+        pass
+
+    def getTriggerSelector(self):
+        pass
+
+    def getTriggerSource(self, selector='FrameStart'):
+        pass
+
+    def hasNode(self, name):
+        pass
+
+    def invalidateCache(self, name=None):
+        pass
+
+    def latchTimestamp(self):
+        pass
+
+    def parameterOrder(self):
+        pass
+
+    def planAOI(self, w=None, h=None, x_offset=None, y_offset=None):
+        pass
+
+    def read(self, n_images=1, read_timeout_ms=1000, max_grab_attempts=3,
+        zero_copy=False, return_meta=False):
+        pass
+
+    def readInto(self, buffer, meta=None, read_timeout_ms=1000,
+        max_grab_attempts=3):
+        pass
+
+    def record(self, path, n_frames, chunk_frames=64, n_chunks=4,
+        read_timeout_ms=1000, max_grab_attempts=3):
+        pass
+
+    def retrieveResult(self, read_timeout_ms=1000):
         pass
 
     def sendParameters(self, config):
         pass
 
+    def setAcquisitionFrameCount(self, n_frames):
+        pass
+
     def setAOI(self, w, h, x_offset, y_offset):
         pass
 
     def setAcquisitionMode(self, mode):
         pass
 
+    def setBandwidthReserve(self, reserve):
+        pass
+
     def setBinningHorizontal(self, binning):
         pass
         
@@ -134,6 +231,9 @@ class camera(object):
     def setFrameRate(self, frame_rate):
         pass
 
+    def setFrameStore(self, capacity):
+        pass
+
     def setGain(self, gain):
         pass 
 
@@ -152,6 +252,9 @@ class camera(object):
     def setMaxNumBuffers(self, max_num_buffers):
         pass
 
+    def setNodeValue(self, name, value):
+        pass
+
     def setPacketSize(self, size):
         pass
 
@@ -161,6 +264,24 @@ class camera(object):
     def setTransmissionStartDelay(self, delay):
         pass      
 
+    def setTriggerDelayMicroseconds(self, delay, selector='FrameStart'):
+        pass
+
+    def setTriggerMode(self, mode='On', selector='FrameStart'):
+        pass
+
+    def setTriggerSource(self, source='Software', selector='FrameStart'):
+        pass
+
+    def stats(self, reset=False):
+        pass
+
+    def stopClockSync(self):
+        pass
+
+    def syncClock(self, n_samples=8):
+        pass
+
     def showLiveFeed(self):
         pass
     
@@ -172,3 +293,12 @@ class camera(object):
 
     def showLiveFeed_render(self):
         pass
+
+    def trigger(self, timeout_ms=1000):
+        pass
+
+    def startClockSync(self, period_s=1.):
+        pass
+
+    def startSession(self):
+        pass
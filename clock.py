@@ -0,0 +1,125 @@
+import collections
+import threading
+
+import numpy as np
+
+# Shortest span of samples, in seconds, over which the drift is fitted. Over
+# shorter spans, the jitter of the samples swamps the drift, and the nominal
+# tick frequency is used instead.
+#
+MIN_DRIFT_SPAN_S = 1.
+
+class ClockModel(object):
+    """ Map camera timestamps, in ticks, to host time (as time.time()).
+
+    The model is fitted to samples of both clocks read together, see
+    Basler.latchTimestamp(). Host time is a straight line in ticks through
+    the last [window] samples, each weighted by the inverse square of its
+    uncertainty (half the round trip of the latch), so the slope follows
+    the drift of the camera's oscillator against the host clock. Until the
+    samples span MIN_DRIFT_SPAN_S, the nominal tick frequency is used.
+
+    Samples going backwards in ticks mean the camera's clock was reset, and
+    the earlier samples are discarded.
+    """
+    def __init__(self, tick_frequency_hz=None, window=32):
+        self.tick_frequency_hz = tick_frequency_hz
+        self.samples = collections.deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.reference_ticks = None
+        self.reference_time = None
+        self.seconds_per_tick = None
+        self.intercept = None
+        self.residual_s = None
+
+    def __len__(self):
+        return len(self.samples)
+
+    def addSample(self, ticks, host_time, uncertainty_s):
+        """ Add a sample of the camera clock reading [ticks] at [host_time],
+        known to within [uncertainty_s], and refit.
+        """
+        with self.lock:
+            if self.samples and ticks < self.samples[-1][0]:
+                self.samples.clear()
+            self.samples.append((int(ticks), float(host_time),
+                float(uncertainty_s)))
+            self.fit()
+
+    def annotate(self, meta):
+        """ Fill in the 'camera_time' of FRAME_METADATA_DTYPE record(s)
+        [meta], in place, from their timestamps.
+        """
+        meta['camera_time'] = self.toHost(meta['timestamp'])
+
+    @property
+    def drift_ppm(self):
+        """ How fast the camera clock runs against the host clock, in parts
+        per million, or None before the model is fitted.
+        """
+        if self.seconds_per_tick is None or not self.tick_frequency_hz:
+            return None
+        return (1/(self.seconds_per_tick*self.tick_frequency_hz) - 1)*10**6
+
+    def fit(self):
+        ticks = np.array([s[0] - self.samples[0][0] for s in self.samples],
+            dtype=np.float64)
+        host = np.array([s[1] - self.samples[0][1] for s in self.samples])
+        weights = 1/np.maximum([s[2] for s in self.samples], 10**-7)
+        if host[-1] - host[0] >= MIN_DRIFT_SPAN_S:
+            slope, intercept = np.polyfit(ticks, host, 1, w=weights)
+        else:
+            slope = 1./self.tick_frequency_hz
+            intercept = np.average(host - slope*ticks, weights=weights**2)
+        residuals = host - (intercept + slope*ticks)
+        self.residual_s = float(np.sqrt(np.average(residuals**2,
+            weights=weights**2)))
+        self.reference_ticks = self.samples[0][0]
+        self.reference_time = self.samples[0][1]
+        self.seconds_per_tick = float(slope)
+        self.intercept = float(intercept)
+
+    def isSynchronised(self):
+        return self.seconds_per_tick is not None
+
+    def toHost(self, ticks):
+        """ Return the host time of camera [ticks], a number or an array,
+        or NaN before the model is fitted.
+        """
+        with self.lock:
+            if self.seconds_per_tick is None:
+                return np.full(np.shape(ticks), np.nan)[()]
+            offset = (np.asarray(ticks).astype(np.int64) -
+                self.reference_ticks).astype(np.float64)
+            return self.reference_time + self.intercept + \
+                self.seconds_per_tick*offset
+
+    def toTicks(self, host_time):
+        """ Return the camera ticks at [host_time], or None before the model
+        is fitted.
+        """
+        with self.lock:
+            if self.seconds_per_tick is None:
+                return None
+            return self.reference_ticks + int(round((host_time -
+                self.reference_time - self.intercept)/self.seconds_per_tick))
+
+class ClockSync(threading.Thread):
+    """ Keep a camera's clock model current by sampling the camera clock
+    every [period_s] seconds in the background.
+    """
+    def __init__(self, camera, period_s=1.):
+        super(ClockSync, self).__init__(daemon=True)
+        self.camera = camera
+        self.period_s = period_s
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.camera.syncClock(1)
+            self.stop_event.wait(self.period_s)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.is_alive():
+            self.join()
@@ -0,0 +1,192 @@
+import concurrent.futures
+import ipaddress
+import threading
+import time
+
+try:
+    from .basler import Basler, loadBackend
+except ImportError:
+    from basler import Basler, loadBackend
+
+# Seconds an enumeration is reused before the devices are enumerated again.
+#
+DEFAULT_TTL_S = 10.
+
+# Shared DeviceDirectory of each backend, see getDirectory().
+#
+directories = {}
+
+def getDirectory(backend='pylon'):
+    """ Return the DeviceDirectory shared by all users of [backend]. """
+    if backend not in directories:
+        directories[backend] = DeviceDirectory(backend)
+    return directories[backend]
+
+class DeviceDirectory(object):
+    """ A cached, indexed list of the devices a backend can see.
+
+    Enumerating devices is slow on GigE, as every interface waits for
+    devices to answer a broadcast, so the list is enumerated once and reused
+    for [ttl_s] seconds. Devices are indexed by serial number, device user ID
+    and IP address, any of which can be passed to lookup(). A device missing
+    from the cache triggers one fresh enumeration, so new devices are found
+    without waiting for the cache to expire.
+
+    open() opens and configures a set of cameras concurrently.
+    """
+    def __init__(self, backend='pylon', ttl_s=DEFAULT_TTL_S):
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self.lock = threading.Lock()
+        self.devices = []
+        self.enumerated = None
+        self.by_serial = {}
+        self.by_user_id = {}
+        self.by_ip = {}
+
+    def create(self, key, camera_class=Basler):
+        """ Return an unopened [camera_class] instance for device [key]. """
+        device = self.lookup(key)
+        if device is None:
+            raise Exception("Failed to find camera: " + str(key))
+        pylon = loadBackend(self.backend)[0]
+        camera = camera_class()
+        camera.backend = self.backend
+        camera.camera = pylon.InstantCamera(
+            pylon.TlFactory.GetInstance().CreateDevice(device))
+        return camera
+
+    def enumerate(self, refresh=False):
+        """ Return the list of devices, enumerating them if the cache has
+        expired or [refresh] is True.
+        """
+        with self.lock:
+            if refresh or self.enumerated is None or \
+            time.monotonic() - self.enumerated > self.ttl_s:
+                pylon = loadBackend(self.backend)[0]
+                devices = list(pylon.TlFactory.GetInstance(
+                    ).EnumerateDevices())
+                self.index(devices)
+                self.enumerated = time.monotonic()
+            return list(self.devices)
+
+    def index(self, devices):
+        self.devices = devices
+        self.by_serial = {}
+        self.by_user_id = {}
+        self.by_ip = {}
+        for device in devices:
+            self.by_serial[int(device.GetSerialNumber())] = device
+            try:
+                user_id = device.GetUserDefinedName()
+            except Exception:
+                user_id = None
+            if user_id:
+                self.by_user_id[user_id] = device
+            try:
+                ip_address = device.GetIpAddress()
+            except Exception:
+                ip_address = None
+            if ip_address:
+                self.by_ip[ip_address] = device
+
+    def invalidate(self):
+        """ Forget the cached devices, so the next lookup enumerates. """
+        with self.lock:
+            self.enumerated = None
+
+    def lookup(self, key):
+        """ Return the device info for [key], a serial number, device user
+        ID or IP address, or None if no such device is found. None returns
+        the first device.
+        """
+        devices = self.enumerate()
+        device = self.match(key, devices)
+        if device is None:
+            devices = self.enumerate(refresh=True)
+            device = self.match(key, devices)
+        return device
+
+    def match(self, key, devices):
+        if key is None:
+            return devices[0] if devices else None
+        with self.lock:
+            try:
+                return self.by_serial[int(key)]
+            except (KeyError, ValueError, TypeError):
+                pass
+            key = str(key)
+            try:
+                ipaddress.ip_address(key)
+            except ValueError:
+                return self.by_user_id.get(key)
+            return self.by_ip.get(key)
+
+    def open(self, keys, config=None, configs=None, camera_class=Basler,
+        timeout_s=10., max_workers=None):
+        """ Open the cameras [keys] concurrently and configure them.
+
+        Each camera is given [configs][key] if present, otherwise [config],
+        with sendParameters(). A camera that isn't open and configured
+        within [timeout_s] seconds of its open starting is given up on, and
+        closed if it opens later. A camera that fails to configure is
+        closed.
+
+        Returns (cameras, errors), dicts keyed by the keys given, of the
+        connected cameras and of the exceptions for those that failed.
+        """
+        keys = list(keys)
+        configs = configs or {}
+        self.enumerate()
+        started = {}
+        lock = threading.Lock()
+
+        def openCamera(key):
+            with lock:
+                started[key] = time.monotonic()
+            camera = self.create(key, camera_class)
+            camera.connect()
+            try:
+                camera_config = configs.get(key, config)
+                if camera_config:
+                    camera.sendParameters(camera_config)
+            except Exception:
+                camera.disconnect()
+                raise
+            return camera
+
+        def closeLate(future):
+            if future.exception() is None:
+                future.result().disconnect()
+
+        cameras = {}
+        errors = {}
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or len(keys) or 1,
+            thread_name_prefix='open')
+        try:
+            pending = {executor.submit(openCamera, key): key for key in keys}
+            while pending:
+                now = time.monotonic()
+                with lock:
+                    deadlines = {future: started[key] + timeout_s for
+                        future, key in pending.items() if key in started}
+                for future, deadline in deadlines.items():
+                    if deadline <= now and not future.done():
+                        key = pending.pop(future)
+                        errors[key] = Exception("Timed out opening camera " +
+                            str(key) + " after " + str(timeout_s) + " s.")
+                        future.add_done_callback(closeLate)
+                wait_s = min([d - now for d in deadlines.values()] +
+                    [timeout_s])
+                done = concurrent.futures.wait(pending, timeout=max(wait_s,
+                    0), return_when=concurrent.futures.FIRST_COMPLETED)[0]
+                for future in done:
+                    key = pending.pop(future)
+                    try:
+                        cameras[key] = future.result()
+                    except Exception as e:
+                        errors[key] = e
+        finally:
+            executor.shutdown(wait=False)
+        return cameras, errors
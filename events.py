@@ -0,0 +1,178 @@
+import time
+import warnings
+
+try:
+    from .acquisition import QueueClosed
+    from .framehandle import FrameHandle
+    from .framestore import newFrame, newMetadata, pixelFormatDtype, \
+        writeMetadata
+    from .metrics import Histogram
+    from .packed import isPacked
+except ImportError:
+    from acquisition import QueueClosed
+    from framehandle import FrameHandle
+    from framestore import newFrame, newMetadata, pixelFormatDtype, \
+        writeMetadata
+    from metrics import Histogram
+    from packed import isPacked
+
+class CallbackOverrunWarning(UserWarning):
+    pass
+
+def newImageEventHandler(pylon, grabber):
+    """ Return a pylon image event handler that passes events to
+    [grabber]. The class is made here as it must derive from the
+    ImageEventHandler of the backend in use.
+    """
+    class Handler(pylon.ImageEventHandler):
+        def OnImageGrabbed(self, camera, grabResult):
+            grabber.onImageGrabbed(grabResult)
+
+        def OnImagesSkipped(self, camera, countOfSkippedImages):
+            grabber.skipped += countOfSkippedImages
+
+    return Handler()
+
+class EventGrabber(object):
+    """ Event-driven grabbing from a Basler camera.
+
+    Frames are delivered from pylon's grab loop thread as soon as they
+    arrive, so no thread of ours waits in RetrieveResult(). Each frame is
+    passed to every function in [callbacks] as callback(frame, meta), in
+    the order given, and put in [queue] (a FrameQueue) if there is one.
+
+    How long a frame's buffer may be held:
+
+      - By default the frame is copied out of the driver's buffer, into the
+        camera's frame store if it has one, and the buffer handed back to
+        pylon before the callbacks run. Callbacks may keep the frame, but a
+        frame store slot is overwritten once the store wraps around.
+      - With [zero_copy], callbacks are given a FrameHandle viewing the
+        driver's buffer, which is closed when the last callback returns.
+        copy() it to keep the frame. There can be no queue.
+      - Either way the next frame isn't delivered until the callbacks
+        return. While they run, frames wait in the driver's buffers and are
+        lost once MaxNumBuffer are in use (OneByOne), or are skipped
+        (LatestImageOnly). Callbacks should return within [hold_budget_ms],
+        by default one frame period; those that take longer are counted in
+        [overruns], with a CallbackOverrunWarning for the first.
+
+    An exception raised by a callback is counted in [errors] and kept in
+    [last_error], and doesn't stop grabbing. [dispatch_s] is a histogram of
+    the time from a frame reaching the handler to the callbacks being
+    called, and [callback_s] of the time the callbacks take.
+    """
+    def __init__(self, camera, callbacks=(), queue=None, zero_copy=False,
+        hold_budget_ms=None):
+        if zero_copy and queue is not None:
+            raise Exception("Zero-copy frames can't be queued, as their " +
+                "buffers are released when the callbacks return.")
+        self.camera = camera
+        self.callbacks = list(callbacks)
+        self.queue = queue
+        self.zero_copy = zero_copy
+        self.hold_budget_ms = hold_budget_ms
+        self.hold_budget_s = None
+        self.handler = None
+        self.pixel_format = None
+        self.dtype = None
+        self.transform = None
+        self.sequence = 0
+        self.failed = 0
+        self.skipped = 0
+        self.overruns = 0
+        self.errors = 0
+        self.last_error = None
+        self.dispatch_s = Histogram()
+        self.callback_s = Histogram()
+
+    def onImageGrabbed(self, grabResult):
+        """ Deliver a grab result; called on the grab loop thread. """
+        t0 = time.perf_counter()
+        camera = self.camera
+        camera.grab_stats.observeResult(grabResult)
+        if not grabResult.GrabSucceeded():
+            self.failed += 1
+            return
+        sequence = self.sequence
+        self.sequence += 1
+        if self.zero_copy:
+            frame = FrameHandle(grabResult, self.dtype,
+                tracker=camera.handle_tracker, sequence=sequence)
+            meta = frame.meta
+            camera.clock.annotate(meta)
+        else:
+            if camera.frame_store is not None:
+                slot = camera.frame_store.write(grabResult)
+                frame = camera.frame_store.data[slot]
+                meta = camera.frame_store.meta[slot]
+            else:
+                frame = newFrame(grabResult, self.pixel_format)
+                meta = newMetadata(1)[0]
+                writeMetadata(grabResult, meta, sequence=sequence)
+            grabResult.Release()
+            camera.clock.annotate(meta)
+            if self.transform is not None:
+                frame = self.transform.apply(frame)
+            camera.grab_stats.observeCopy(time.perf_counter() - t0)
+            if self.queue is not None:
+                try:
+                    self.queue.put((frame, meta))
+                    camera.grab_stats.observeQueueDepth(len(self.queue))
+                except QueueClosed:
+                    pass
+        t1 = time.perf_counter()
+        self.dispatch_s.observe(t1 - t0)
+        try:
+            for callback in self.callbacks:
+                callback(frame, meta)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = e
+        finally:
+            if self.zero_copy:
+                frame.close()
+        elapsed = time.perf_counter() - t1
+        self.callback_s.observe(elapsed)
+        if self.hold_budget_s is not None and elapsed > self.hold_budget_s:
+            self.overruns += 1
+            if self.overruns == 1:
+                warnings.warn("Frame callbacks took " + str(round(elapsed*
+                    10**3, 3)) + " ms, more than the " + str(round(
+                    self.hold_budget_s*10**3, 3)) + " ms budget; frames " +
+                    "are waiting in the driver's buffers.",
+                    CallbackOverrunWarning, stacklevel=2)
+
+    def start(self):
+        """ Register the image event handler. Call before grabbing starts
+        with GrabLoop_ProvidedByInstantCamera.
+        """
+        camera = self.camera
+        self.pixel_format = camera.getPixelFormat()
+        if self.zero_copy:
+            if isPacked(self.pixel_format):
+                raise Exception("Packed pixel format " + self.pixel_format +
+                    " can't be read without copying.")
+            self.dtype = pixelFormatDtype(self.pixel_format)
+            if camera.handle_tracker.pool_size is None:
+                camera.handle_tracker.pool_size = camera.getMaxNumBuffers()
+        elif not camera.host_transform.isIdentity():
+            self.transform = camera.host_transform
+        if self.hold_budget_ms is not None:
+            self.hold_budget_s = self.hold_budget_ms/10**3
+        else:
+            frame_rate = camera.getFrameRate()
+            self.hold_budget_s = 1/frame_rate if frame_rate else None
+        self.handler = newImageEventHandler(camera.pylon, self)
+        camera.camera.RegisterImageEventHandler(self.handler,
+            camera.pylon.RegistrationMode_Append, camera.pylon.Cleanup_None)
+
+    def stop(self):
+        """ Deregister the handler and close the queue. Call after grabbing
+        has stopped, so that no callback is running.
+        """
+        if self.handler is not None:
+            self.camera.camera.DeregisterImageEventHandler(self.handler)
+            self.handler = None
+        if self.queue is not None:
+            self.queue.close()
@@ -0,0 +1,106 @@
+import threading
+import warnings
+
+import numpy as np
+
+try:
+    from .framestore import newMetadata, writeMetadata
+except ImportError:
+    from framestore import newMetadata, writeMetadata
+
+class BufferPoolWarning(UserWarning):
+    pass
+
+class HandleTracker(object):
+    """ Count the grab result buffers held by open FrameHandles.
+
+    pylon can only fill as many buffers as MaxNumBuffer allows, so holding
+    on to too many handles stalls the grab. A warning is issued once the
+    number outstanding reaches [warn_fraction] of [pool_size].
+    """
+    def __init__(self, pool_size=None, warn_fraction=0.75):
+        self.pool_size = pool_size
+        self.warn_fraction = warn_fraction
+        self.outstanding = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            self.outstanding += 1
+            self.peak = max(self.peak, self.outstanding)
+            outstanding = self.outstanding
+        if self.pool_size and \
+        outstanding >= self.warn_fraction*self.pool_size:
+            warnings.warn(str(outstanding) + " of " + str(self.pool_size) +
+                " pylon buffers are held by open frame handles. Close " +
+                "handles sooner or raise MaxNumBuffer.", BufferPoolWarning,
+                stacklevel=3)
+
+    def release(self):
+        with self.lock:
+            self.outstanding -= 1
+
+class FrameHandle(object):
+    """ A frame that views the memory of a pylon grab result directly.
+
+    The grab result's buffer is handed back to pylon when the handle is
+    closed, leaves a with block, or is garbage collected. [array] must not
+    be used after that; take a copy first if the frame is needed for longer.
+    """
+    def __init__(self, grabResult, dtype, tracker=None, sequence=0):
+        self.grabResult = grabResult
+        self.tracker = tracker
+        if self.tracker is not None:
+            self.tracker.acquire()
+        h = grabResult.GetHeight()
+        w = grabResult.GetWidth()
+        self.array = np.frombuffer(grabResult.GetImageMemoryView(),
+            dtype=dtype, count=h*w).reshape(h, w)
+        self.meta = newMetadata(1)[0]
+        writeMetadata(grabResult, self.meta, sequence=sequence)
+
+    def __array__(self, dtype=None, copy=None):
+        """ Return the frame as an array, following NumPy 2's [copy]:
+        True always copies, None copies only to change the dtype, and False
+        views the buffer or raises ValueError if a copy is needed.
+        """
+        if self.array is None:
+            raise Exception("Frame handle has been closed.")
+        converts = dtype is not None and np.dtype(dtype) != self.array.dtype
+        if copy is False and converts:
+            raise ValueError("Frame can't be converted to " + str(dtype) +
+                " without a copy.")
+        if copy or converts:
+            return np.array(self.array, dtype=dtype, copy=True)
+        return self.array
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def closed(self):
+        return self.grabResult is None
+
+    def close(self):
+        """ Release the grab result's buffer back to pylon. """
+        grabResult = getattr(self, 'grabResult', None)
+        if grabResult is None:
+            return
+        self.array = None
+        self.grabResult = None
+        try:
+            grabResult.Release()
+        finally:
+            if self.tracker is not None:
+                self.tracker.release()
+
+    def copy(self):
+        """ Return a copy of the frame that outlives the handle. """
+        return np.array(self.__array__())
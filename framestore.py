@@ -0,0 +1,222 @@
+import copy
+import time
+
+import numpy as np
+
+try:
+    from .packed import isPacked, newScratch, packedSize, unpack
+except ImportError:
+    from packed import isPacked, newScratch, packedSize, unpack
+
+# Map of camera pixel formats to the dtype used to hold an unpacked pixel on
+# the host. Packed formats are unpacked on arrival, see packed.py.
+#
+PIXEL_FORMAT_DTYPES = {
+    'Mono8': np.uint8,
+    'Mono10': np.uint16,
+    'Mono10p': np.uint16,
+    'Mono10Packed': np.uint16,
+    'Mono12': np.uint16,
+    'Mono12p': np.uint16,
+    'Mono12Packed': np.uint16,
+    'Mono16': np.uint16
+}
+
+# Per-slot metadata, stored alongside the pixel data. [timestamp] is in
+# camera ticks and [host_time] is when the frame reached the host.
+# [frame_counter], [exposure_us], [gain] and [sequence_set], the sequencer set
+# that exposed the frame (see sequencer.Sequencer), come from the frame's chunk
+# data and are 0, NaN, NaN and -1 if the camera didn't send them (see
+# Basler.enableChunks()). [camera_time] is [timestamp] on the host clock, see
+# clock.ClockModel, and NaN until the clocks have been synchronised.
+#
+FRAME_METADATA_DTYPE = np.dtype([
+    ('sequence', np.uint64),
+    ('frame_id', np.uint64),
+    ('frame_counter', np.uint64),
+    ('timestamp', np.uint64),
+    ('camera_time', np.float64),
+    ('host_time', np.float64),
+    ('width', np.uint32),
+    ('height', np.uint32),
+    ('exposure_us', np.float64),
+    ('gain', np.float64),
+    ('sequence_set', np.int32),
+    ('valid', np.bool_)
+])
+
+# Chunk nodes of a grab result read into each metadata field, in the order
+# tried: GigE cameras name them differently from USB3 ones.
+#
+CHUNK_FIELDS = (
+    ('frame_counter', ('ChunkFramecounter', 'ChunkCounterValue')),
+    ('timestamp', ('ChunkTimestamp',)),
+    ('exposure_us', ('ChunkExposureTime',)),
+    ('gain', ('ChunkGainAll', 'ChunkGain')),
+    ('sequence_set', ('ChunkSequenceSetIndex', 'ChunkSequencerSetActive'))
+)
+
+def newMetadata(n):
+    """ Return an empty metadata array with [n] records. """
+    return np.zeros(n, dtype=FRAME_METADATA_DTYPE)
+
+def pixelFormatDtype(pixel_format):
+    """ Return the host dtype for a pixel format. """
+    try:
+        rtn = PIXEL_FORMAT_DTYPES[pixel_format]
+    except KeyError:
+        raise Exception("Unsupported pixel format: " + str(pixel_format))
+    return rtn
+
+def newFrame(grabResult, pixel_format=None):
+    """ Return a grab result's image as a new array, unpacking it if
+    [pixel_format] is a packed format.
+    """
+    if pixel_format is None or not isPacked(pixel_format):
+        return grabResult.Array
+    dest = np.empty((grabResult.GetHeight(), grabResult.GetWidth()),
+        dtype=pixelFormatDtype(pixel_format))
+    writeFrame(grabResult, dest, pixel_format=pixel_format)
+    return dest
+
+def writeFrame(grabResult, dest, meta=None, sequence=0, pixel_format=None,
+    scratch=None):
+    """ Copy a grab result's image into [dest] without allocating a new
+    array.
+
+    If [meta] is given, it is a record of FRAME_METADATA_DTYPE that is
+    filled in place. If [pixel_format] is a packed format, the image is 
+    unpacked into [dest], using [scratch] from packed.newScratch() if given.
+    """
+    w = grabResult.GetWidth()
+    h = grabResult.GetHeight()
+    if dest.shape != (h, w):
+        raise Exception("Frame shape (" + str(h) + ", " + str(w) +
+            ") does not match the destination buffer " + str(dest.shape) +
+            ". The AOI may have changed since the buffer was allocated.")
+    if pixel_format is not None and isPacked(pixel_format):
+        src = np.frombuffer(grabResult.GetImageMemoryView(), dtype=np.uint8,
+            count=packedSize(pixel_format, dest.size))
+        unpack(src, pixel_format, dest, scratch=scratch)
+    else:
+        src = np.frombuffer(grabResult.GetImageMemoryView(), 
+            dtype=dest.dtype, count=dest.size)
+        np.copyto(dest, src.reshape(dest.shape))
+    if meta is not None:
+        writeMetadata(grabResult, meta, sequence=sequence)
+
+def writeMetadata(grabResult, meta, sequence=0):
+    """ Fill a FRAME_METADATA_DTYPE record in place from a grab result. """
+    meta['sequence'] = sequence
+    meta['frame_id'] = grabResult.GetBlockID()
+    meta['timestamp'] = grabResult.GetTimeStamp()
+    meta['host_time'] = time.time()
+    meta['width'] = grabResult.GetWidth()
+    meta['height'] = grabResult.GetHeight()
+    meta['valid'] = True
+    meta['camera_time'] = np.nan
+    writeChunks(grabResult, meta)
+
+def writeChunks(grabResult, meta):
+    """ Fill the chunk fields of a metadata record from a grab result,
+    leaving the defaults for chunks the camera didn't send.
+    """
+    meta['frame_counter'] = 0
+    meta['exposure_us'] = np.nan
+    meta['gain'] = np.nan
+    meta['sequence_set'] = -1
+    for field, names in CHUNK_FIELDS:
+        for name in names:
+            try:
+                meta[field] = getattr(grabResult, name).Value
+                break
+            except Exception:
+                pass
+        else:
+            # Without the frame counter, chunk mode is most likely off, so
+            # don't pay for the failed lookups of the others.
+            #
+            if field == 'frame_counter':
+                return
+
+class FrameStore(object):
+    """ A preallocated, fixed-capacity ring of frames.
+
+    Pixel data is held in a single (capacity, height, width) array and
+    metadata in a structured array with one record per slot. Writing a frame
+    reuses the oldest slot, so steady-state acquisition does not allocate.
+
+    If [transform] is a hostops.HostTransform, frames of [height] x [width]
+    are received into a preallocated buffer and the slots hold them as
+    transformed, so are sized to the transform's output.
+    """
+    def __init__(self, capacity, height, width, dtype=np.uint16,
+        pixel_format=None, transform=None):
+        self.capacity = int(capacity)
+        if transform is not None and transform.isIdentity():
+            transform = None
+        self.transform = transform
+        if transform is None:
+            self.received = None
+            self.binned = None
+        else:
+            self.received = np.zeros((height, width), dtype=dtype)
+            self.binned = np.zeros(transform.binnedShape(height, width),
+                dtype=dtype)
+            height, width = transform.outputShape(height, width)
+        self.data = np.zeros((self.capacity, height, width), dtype=dtype)
+        self.meta = newMetadata(self.capacity)
+        self.count = 0
+        self.pixel_format = pixel_format
+        if pixel_format is not None and isPacked(pixel_format):
+            self.scratch = newScratch(pixel_format, height*width)
+        else:
+            self.scratch = None
+
+    @classmethod
+    def fromCamera(cls, camera, capacity):
+        """ Allocate a store sized to a camera's current AOI and pixel
+        format, holding frames as transformed by its current host transform
+        (see Basler.getHostTransform()).
+        """
+        aoi = camera.getAOI()
+        pixel_format = camera.getPixelFormat()
+        if aoi is None or pixel_format is None:
+            raise Exception("Could not read the AOI and pixel format from " +
+                "the camera.")
+        w, h, x_offset, y_offset = aoi
+        return cls(capacity, h, w, dtype=pixelFormatDtype(pixel_format),
+            pixel_format=pixel_format,
+            transform=copy.copy(camera.getHostTransform()))
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        """ Forget all stored frames. The buffers are kept. """
+        self.meta[...] = 0
+        self.count = 0
+
+    def latest(self, n=1):
+        """ Return the slot indices of the [n] most recent frames, oldest
+        first.
+        """
+        n = min(n, len(self))
+        return (np.arange(self.count - n, self.count) % self.capacity)
+
+    def write(self, grabResult):
+        """ Copy a grab result into the next slot and return the slot index.
+        """
+        slot = self.count % self.capacity
+        if self.transform is None:
+            writeFrame(grabResult, self.data[slot], self.meta[slot],
+                sequence=self.count, pixel_format=self.pixel_format,
+                scratch=self.scratch)
+        else:
+            writeFrame(grabResult, self.received, self.meta[slot],
+                sequence=self.count, pixel_format=self.pixel_format,
+                scratch=self.scratch)
+            np.copyto(self.data[slot], self.transform.apply(self.received,
+                out=self.binned))
+        self.count += 1
+        return slot
@@ -0,0 +1,101 @@
+import numpy as np
+
+# Binning modes, named as the camera names them.
+#
+BINNING_MODES = ('Summing', 'Averaging')
+
+def binFrames(frames, binning_h=1, binning_v=1, mode='Summing', out=None):
+    """ Bin a frame, or a stack of frames, on the host.
+
+    Works on the last two axes. Rows and columns that don't fill a whole bin
+    are dropped, as the camera does. Sums saturate at the maximum of the
+    output dtype rather than wrapping. If [out] is given, the result is
+    written into it instead of a new array.
+    """
+    if mode not in BINNING_MODES:
+        raise Exception("Unknown binning mode: " + str(mode) +
+            ". Must be one of " + str(BINNING_MODES) + ".")
+    if binning_h == 1 and binning_v == 1:
+        if out is None:
+            return frames
+        np.copyto(out, frames)
+        return out
+    h = frames.shape[-2]//binning_v
+    w = frames.shape[-1]//binning_h
+    view = frames[..., :h*binning_v, :w*binning_h].reshape(
+        frames.shape[:-2] + (h, binning_v, w, binning_h))
+    dtype = out.dtype if out is not None else frames.dtype
+    acc = view.sum(axis=(-3, -1), dtype=np.uint64 if
+        np.issubdtype(dtype, np.integer) else np.float64)
+    if mode == 'Averaging':
+        if np.issubdtype(dtype, np.integer):
+            acc //= binning_h*binning_v
+        else:
+            acc /= binning_h*binning_v
+    elif np.issubdtype(dtype, np.integer):
+        np.minimum(acc, np.iinfo(dtype).max, out=acc)
+    if out is None:
+        out = np.empty(acc.shape, dtype=dtype)
+    np.copyto(out, acc, casting='unsafe')
+    return out
+
+def cropFrames(frames, w, h, x_offset, y_offset):
+    """ Return a view of the area of interest of a frame or stack of
+    frames.
+    """
+    if x_offset + w > frames.shape[-1] or y_offset + h > frames.shape[-2]:
+        raise Exception("AOI (" + str(w) + ", " + str(h) + ", " +
+            str(x_offset) + ", " + str(y_offset) + ") does not fit in a " +
+            "frame of shape " + str(frames.shape[-2:]) + ".")
+    return frames[..., y_offset:y_offset + h, x_offset:x_offset + w]
+
+def flipFrames(frames, flip_x=False, flip_y=False):
+    """ Return a view of a frame or stack of frames flipped along x and/or y.
+    """
+    if flip_x:
+        frames = frames[..., :, ::-1]
+    if flip_y:
+        frames = frames[..., ::-1, :]
+    return frames
+
+class HostTransform(object):
+    """ Binning, cropping and flipping done on the host for settings the
+    camera can't apply itself.
+
+    The steps are applied in the order the camera applies them: binning,
+    then the AOI (in binned pixels), then flipping. Cropping and flipping
+    return views, so only binning costs a pass over the pixels.
+    """
+    def __init__(self):
+        self.binning_h = 1
+        self.binning_v = 1
+        self.binning_mode = 'Summing'
+        self.aoi = None
+        self.flip_x = False
+        self.flip_y = False
+
+    def apply(self, frames, out=None):
+        """ Transform a frame or stack of frames. [out], if given, receives
+        the binned frames.
+        """
+        rtn = binFrames(frames, self.binning_h, self.binning_v,
+            self.binning_mode, out=out)
+        if self.aoi is not None:
+            rtn = cropFrames(rtn, *self.aoi)
+        return flipFrames(rtn, self.flip_x, self.flip_y)
+
+    def binnedShape(self, height, width):
+        """ Return the shape of a [height] x [width] frame once binned. """
+        return (height//self.binning_v, width//self.binning_h)
+
+    def outputShape(self, height, width):
+        """ Return the shape of a [height] x [width] frame once transformed.
+        """
+        if self.aoi is not None:
+            w, h, x_offset, y_offset = self.aoi
+            return (h, w)
+        return self.binnedShape(height, width)
+
+    def isIdentity(self):
+        return self.binning_h == 1 and self.binning_v == 1 and \
+            self.aoi is None and not self.flip_x and not self.flip_y
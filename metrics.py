@@ -0,0 +1,266 @@
+import bisect
+import json
+import threading
+import time
+
+# Upper bounds in seconds of the histogram buckets, from 10 us to 10 s.
+#
+DEFAULT_BUCKETS = tuple(m*10.**e for e in range(-5, 1) for m in (1, 2.5, 5))\
+    + (10.,)
+
+# Stream grabber statistics read from the driver by GrabStats.snapshot().
+#
+STREAM_STATISTICS = (
+    'Statistic_Total_Buffer_Count',
+    'Statistic_Failed_Buffer_Count',
+    'Statistic_Buffer_Underrun_Count',
+    'Statistic_Total_Packet_Count',
+    'Statistic_Failed_Packet_Count',
+    'Statistic_Resend_Request_Count',
+    'Statistic_Resend_Packet_Count'
+)
+
+class Histogram(object):
+    """ A fixed-bucket histogram. Observing a value is a bisect and two
+    additions.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.clear()
+
+    def clear(self):
+        self.counts = [0]*(len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.
+        self.max = 0.
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """ Return the upper bound of the bucket holding quantile [q]. """
+        if self.count == 0:
+            return None
+        target = q*self.count
+        total = 0
+        for bound, n in zip(self.buckets + (self.max,), self.counts):
+            total += n
+            if total >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': list(zip(self.buckets, self.counts)) +
+                [('+Inf', self.counts[-1])]
+        }
+
+class GrabStats(object):
+    """ Counters and histograms for a camera's grab loop.
+
+    Updates are plain attribute increments without a lock, so a snapshot
+    taken while grabbing may be off by a frame between fields.
+    """
+    def __init__(self):
+        self.enabled = True
+        self.retrieve_wait_s = Histogram()
+        self.copy_s = Histogram()
+        self.clear()
+
+    def clear(self):
+        """ Reset all counters and histograms. """
+        self.frames = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.failed_by_code = {}
+        self.skipped = 0
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+        self.retrieve_wait_s.clear()
+        self.copy_s.clear()
+        self.started = time.time()
+
+    def observeCopy(self, seconds):
+        if self.enabled:
+            self.copy_s.observe(seconds)
+
+    def observeQueueDepth(self, depth):
+        self.queue_depth = depth
+        if depth > self.queue_depth_max:
+            self.queue_depth_max = depth
+
+    def observeResult(self, grabResult):
+        """ Record the outcome of a grab, however it was retrieved. """
+        if not self.enabled:
+            return
+        if not grabResult.IsValid():
+            self.timeouts += 1
+        elif grabResult.GrabSucceeded():
+            self.frames += 1
+            self.skipped += grabResult.GetNumberOfSkippedImages()
+        else:
+            self.failed += 1
+            code = grabResult.GetErrorCode()
+            self.failed_by_code[code] = self.failed_by_code.get(code, 0) + 1
+
+    def observeRetrieve(self, grabResult, seconds):
+        """ Record the outcome of a RetrieveResult() call that took
+        [seconds].
+        """
+        if not self.enabled:
+            return
+        self.retrieve_wait_s.observe(seconds)
+        self.observeResult(grabResult)
+
+    def snapshot(self, camera=None):
+        """ Return the statistics as a JSON-serialisable dict. If a pylon
+        [camera] is given, its stream grabber statistics are included.
+        """
+        rtn = {
+            'uptime_s': time.time() - self.started,
+            'frames': self.frames,
+            'timeouts': self.timeouts,
+            'failed': self.failed,
+            'failed_by_code': {hex(k): v for k, v in
+                self.failed_by_code.items()},
+            'skipped': self.skipped,
+            'queue_depth': self.queue_depth,
+            'queue_depth_max': self.queue_depth_max,
+            'retrieve_wait_s': self.retrieve_wait_s.snapshot(),
+            'copy_s': self.copy_s.snapshot(),
+            'stream': {}
+        }
+        if camera is not None:
+            for name in STREAM_STATISTICS:
+                try:
+                    value = getattr(camera.StreamGrabber, name).GetValue()
+                except Exception:
+                    continue
+                rtn['stream'][name] = value
+        return rtn
+
+def formatPrometheus(stats, labels=None):
+    """ Format a list of (labels, snapshot) pairs, or a single snapshot with
+    [labels], in the Prometheus text exposition format.
+    """
+    if isinstance(stats, dict):
+        stats = [(labels or {}, stats)]
+
+    def fmt(labels, extra=None):
+        items = dict(labels)
+        if extra:
+            items.update(extra)
+        if not items:
+            return ''
+        return '{' + ','.join('%s="%s"' % (k, v) for k, v in
+            sorted(items.items())) + '}'
+
+    lines = []
+    for name, help_text in (
+        ('frames', 'Frames grabbed.'),
+        ('timeouts', 'RetrieveResult calls that timed out.'),
+        ('failed', 'Grab results that did not succeed.'),
+        ('skipped', 'Images skipped by the driver.'),
+        ('queue_depth', 'Frames waiting in the acquisition queue.')):
+        metric = 'camera_' + name
+        kind = 'gauge' if name == 'queue_depth' else 'counter'
+        lines.append('# HELP ' + metric + ' ' + help_text)
+        lines.append('# TYPE ' + metric + ' ' + kind)
+        for labels, snapshot in stats:
+            lines.append(metric + fmt(labels) + ' ' + str(snapshot[name]))
+    lines.append('# TYPE camera_failed_by_code counter')
+    for labels, snapshot in stats:
+        for code, n in snapshot['failed_by_code'].items():
+            lines.append('camera_failed_by_code' +
+                fmt(labels, {'code': code}) + ' ' + str(n))
+    lines.append('# TYPE camera_stream_statistic gauge')
+    for labels, snapshot in stats:
+        for name, value in snapshot['stream'].items():
+            lines.append('camera_stream_statistic' +
+                fmt(labels, {'name': name}) + ' ' + str(value))
+    for name in ('retrieve_wait_s', 'copy_s'):
+        metric = 'camera_' + name
+        lines.append('# TYPE ' + metric + ' histogram')
+        for labels, snapshot in stats:
+            histogram = snapshot[name]
+            total = 0
+            for bound, n in histogram['buckets']:
+                total += n
+                lines.append(metric + '_bucket' +
+                    fmt(labels, {'le': bound}) + ' ' + str(total))
+            lines.append(metric + '_sum' + fmt(labels) + ' ' +
+                str(histogram['sum']))
+            lines.append(metric + '_count' + fmt(labels) + ' ' +
+                str(histogram['count']))
+    return '\n'.join(lines) + '\n'
+
+class MetricsServer(object):
+    """ Serve the stats() of a set of cameras over HTTP, as Prometheus text
+    at /metrics and as JSON at /stats.
+
+    [cameras] maps a label (e.g. the serial number or device user ID) to a
+    Basler instance. The stats are served without authentication, so only to
+    this machine by default; pass [host] '' or an interface's address to
+    serve them to the network.
+    """
+    def __init__(self, cameras, port=9100, host='127.0.0.1'):
+        self.cameras = cameras
+        self.port = port
+        self.host = host
+        self.server = None
+        self.thread = None
+
+    def collect(self):
+        return [({'camera': label}, camera.stats()) for label, camera in
+            self.cameras.items()]
+
+    def start(self):
+        """ Start serving on a daemon thread. """
+        # Imported here, so that processes that only record stats don't pay
+        # for the HTTP server.
+        #
+        import http.server
+        metrics_server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = formatPrometheus(metrics_server.collect())
+                    content_type = 'text/plain; version=0.0.4'
+                elif self.path == '/stats':
+                    body = json.dumps({labels['camera']: snapshot for
+                        labels, snapshot in metrics_server.collect()})
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((self.host, self.port),
+            Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever,
+            daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
@@ -0,0 +1,81 @@
+import numpy as np
+
+# Layouts of the packed pixel formats. Each format packs a group of pixels
+# into a group of bytes; for each pixel in the group, the value is built from
+# two (byte, right shift, mask, left shift) terms as
+#
+#   ((byte >> right shift) & mask) << left shift
+#
+# ORed together. Mono12p and Mono10p are the GenICam (PFNC) formats, which
+# pack pixels LSB first; Mono12Packed and Mono10Packed are Basler's older
+# GigE Vision formats.
+#
+PACKED_FORMATS = {
+    'Mono10p': (5, (
+        ((0, 0, 0xFF, 0), (1, 0, 0x03, 8)),
+        ((1, 2, 0x3F, 0), (2, 0, 0x0F, 6)),
+        ((2, 4, 0x0F, 0), (3, 0, 0x3F, 4)),
+        ((3, 6, 0x03, 0), (4, 0, 0xFF, 2)))),
+    'Mono10Packed': (3, (
+        ((0, 0, 0xFF, 2), (1, 0, 0x03, 0)),
+        ((2, 0, 0xFF, 2), (1, 4, 0x03, 0)))),
+    'Mono12p': (3, (
+        ((0, 0, 0xFF, 0), (1, 0, 0x0F, 8)),
+        ((1, 4, 0x0F, 0), (2, 0, 0xFF, 4)))),
+    'Mono12Packed': (3, (
+        ((0, 0, 0xFF, 4), (1, 0, 0x0F, 0)),
+        ((2, 0, 0xFF, 4), (1, 4, 0x0F, 0))))
+}
+
+def isPacked(pixel_format):
+    return pixel_format in PACKED_FORMATS
+
+def packedSize(pixel_format, n_pixels):
+    """ Return the number of bytes [n_pixels] pixels take in a packed format.
+    """
+    bytes_per_group, layout = PACKED_FORMATS[pixel_format]
+    pixels_per_group = len(layout)
+    if n_pixels % pixels_per_group != 0:
+        raise Exception(pixel_format + " packs pixels in groups of " +
+            str(pixels_per_group) + ", which " + str(n_pixels) +
+            " pixels do not fill.")
+    return n_pixels//pixels_per_group*bytes_per_group
+
+def newScratch(pixel_format, n_pixels):
+    """ Return a scratch buffer for unpacking frames of [n_pixels] pixels,
+    so that unpack() doesn't need to allocate.
+    """
+    return np.empty(n_pixels//len(PACKED_FORMATS[pixel_format][1]),
+        dtype=np.uint16)
+
+def unpack(raw, pixel_format, out, scratch=None):
+    """ Unpack a packed frame into a uint16 array.
+
+    [raw] is a uint8 buffer holding the packed pixels and [out] a C
+    contiguous uint16 array of any shape to receive them. Pass a buffer from
+    newScratch() as [scratch] to avoid any allocation.
+    """
+    bytes_per_group, layout = PACKED_FORMATS[pixel_format]
+    n_bytes = packedSize(pixel_format, out.size)
+    if len(raw) < n_bytes:
+        raise Exception("Packed buffer holds " + str(len(raw)) + " bytes, " +
+            "but " + str(n_bytes) + " are needed for " + str(out.size) +
+            " " + pixel_format + " pixels.")
+    groups = np.asarray(raw[:n_bytes]).reshape(-1, bytes_per_group)
+    pixels = out.reshape(-1, len(layout))
+    if scratch is None:
+        scratch = np.empty(len(groups), dtype=np.uint16)
+    for k, terms in enumerate(layout):
+        dest = pixels[:, k]
+        for t, (byte, rshift, mask, lshift) in enumerate(terms):
+            target = dest if t == 0 else scratch
+            np.copyto(target, groups[:, byte], casting='unsafe')
+            if rshift:
+                np.right_shift(target, rshift, out=target)
+            if mask != 0xFF:
+                np.bitwise_and(target, mask, out=target)
+            if lshift:
+                np.left_shift(target, lshift, out=target)
+            if t > 0:
+                np.bitwise_or(dest, target, out=dest)
+    return out
@@ -0,0 +1,201 @@
+import functools
+import multiprocessing
+import os
+import threading
+
+from multiprocessing import shared_memory
+
+try:
+    from .broadcast import ringSize, ringViews
+    from .framestore import pixelFormatDtype
+except ImportError:
+    from broadcast import ringSize, ringViews
+    from framestore import pixelFormatDtype
+
+# State of a worker process, set up once by initWorker().
+#
+worker_state = {}
+
+def initWorker(name, functions):
+    """ Attach a worker process to the pipeline's frame slots. """
+    # Workers share the resource tracker of the process that started the
+    # pool, which already tracks the slots, so attaching leaves them to it
+    # rather than using broadcast.attachSharedMemory().
+    #
+    shm = shared_memory.SharedMemory(name=name)
+    worker_state['shm'] = shm
+    worker_state['data'] = ringViews(shm.buf)[4]
+    worker_state['functions'] = functions
+
+def processSlot(slot):
+    """ Apply the registered functions to the frame in [slot]. """
+    frame = worker_state['data'][slot]
+    return [fn(frame) for fn in worker_state['functions']]
+
+class FramePipeline(object):
+    """ Process frames from a Basler camera in a pool of worker processes.
+
+    Functions registered with register() take a frame and return a
+    picklable result; each frame's results are returned as a dict keyed by
+    function name, in frame order. Frames pass to the workers through
+    [max_in_flight] slots in shared memory, read straight into them from the
+    camera, so only the results are pickled. When every slot is taken,
+    submitting the next frame waits, holding back the grab loop until a
+    worker finishes.
+
+    Functions must be picklable, i.e. defined at module level. Use as a
+    context manager, or call start() and close().
+    """
+    def __init__(self, camera, n_workers=None, max_in_flight=None,
+        context=None):
+        self.camera = camera
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 2*self.n_workers
+        self.context = context or multiprocessing.get_context()
+        self.functions = []
+        self.names = []
+        self.pool = None
+        self.shm = None
+        self.cond = threading.Condition()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """ Stop the workers and free the frame slots. """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if self.shm is not None:
+            del self.data, self.meta
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def done(self, sequence, slot, results):
+        with self.cond:
+            self.finished[sequence] = (self.meta[slot].copy(), dict(zip(
+                self.names, results)))
+            self.free_slots.append(slot)
+            self.cond.notify_all()
+
+    def failed(self, sequence, slot, error):
+        with self.cond:
+            self.finished[sequence] = (self.meta[slot].copy(), error)
+            self.free_slots.append(slot)
+            self.cond.notify_all()
+
+    def get(self, timeout=None):
+        """ Return (sequence, metadata, results) for the next frame in
+        order, waiting up to [timeout] seconds. Returns None on timeout or
+        if no frame is outstanding. An exception raised by a function is
+        raised here.
+        """
+        with self.cond:
+            if self.next_result >= self.next_sequence:
+                return None
+            if not self.cond.wait_for(lambda: self.next_result in
+                self.finished, timeout):
+                return None
+            sequence = self.next_result
+            meta, results = self.finished.pop(sequence)
+            self.next_result += 1
+        if isinstance(results, BaseException):
+            raise results
+        return sequence, meta, results
+
+    def pending(self):
+        """ Return the number of frames submitted but not yet returned. """
+        with self.cond:
+            return self.next_sequence - self.next_result
+
+    def register(self, fn, name=None):
+        """ Add [fn] to the functions applied to every frame, its result
+        keyed by [name] (by default, the function's name). Must be called
+        before start().
+        """
+        if self.pool is not None:
+            raise Exception("Functions must be registered before start().")
+        self.functions.append(fn)
+        self.names.append(name or fn.__name__)
+
+    def run(self, n_frames=None, read_timeout_ms=1000, max_grab_attempts=3):
+        """ Yield (sequence, metadata, results) for [n_frames] frames from a
+        camera that is already grabbing, or forever if None.
+
+        Grabbing stops early after [max_grab_attempts] failed grabs in a
+        row; the frames in flight are still returned.
+        """
+        grab_attempts = 0
+        n_submitted = 0
+        while (n_frames is None or n_submitted < n_frames) and \
+        grab_attempts < max_grab_attempts:
+            if self.submit(read_timeout_ms=read_timeout_ms) is None:
+                grab_attempts += 1
+                continue
+            grab_attempts = 0
+            n_submitted += 1
+            while True:
+                result = self.get(timeout=0)
+                if result is None:
+                    break
+                yield result
+        while self.pending():
+            yield self.get()
+
+    def start(self):
+        """ Allocate the frame slots and start the workers. """
+        aoi = self.camera.getAOI()
+        pixel_format = self.camera.getPixelFormat()
+        if aoi is None or pixel_format is None:
+            raise Exception("Could not read the AOI and pixel format from " +
+                "the camera.")
+        w, h = aoi[:2]
+        dtype = pixelFormatDtype(pixel_format)
+        self.shm = shared_memory.SharedMemory(create=True, size=ringSize(
+            self.max_in_flight, h, w, dtype, 0))
+        views = ringViews(self.shm.buf, self.max_in_flight, h, w, dtype, 0)
+        self.meta = views[3]
+        self.data = views[4]
+        self.free_slots = list(range(self.max_in_flight))
+        self.finished = {}
+        self.next_sequence = 0
+        self.next_result = 0
+        self.pool = self.context.Pool(self.n_workers, initializer=initWorker,
+            initargs=(self.shm.name, self.functions))
+
+    def submit(self, frame=None, meta=None, read_timeout_ms=1000,
+        max_grab_attempts=1):
+        """ Hand a frame to the workers and return its sequence number.
+
+        The frame is read from the camera, or taken from [frame] and
+        [meta] if given. Waits for a free slot first. Returns None if no
+        frame could be read.
+        """
+        with self.cond:
+            self.cond.wait_for(lambda: self.free_slots)
+            slot = self.free_slots.pop()
+        if frame is None:
+            n_read = self.camera.readInto(self.data[slot:slot + 1],
+                self.meta[slot:slot + 1], read_timeout_ms=read_timeout_ms,
+                max_grab_attempts=max_grab_attempts)
+            if n_read == 0:
+                with self.cond:
+                    self.free_slots.append(slot)
+                return None
+        else:
+            self.data[slot] = frame
+            self.meta[slot] = meta if meta is not None else 0
+        with self.cond:
+            sequence = self.next_sequence
+            self.next_sequence += 1
+        self.meta[slot]['sequence'] = sequence
+        self.pool.apply_async(processSlot, (slot,),
+            callback=functools.partial(self.done, sequence, slot),
+            error_callback=functools.partial(self.failed, sequence, slot))
+        return sequence
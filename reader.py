@@ -0,0 +1,120 @@
+import configparser
+import os
+
+import numpy as np
+
+try:
+    from .framestore import pixelFormatDtype
+    from .recorder import FRAMES_FILENAME, HEADER_FILENAME, \
+        METADATA_FILENAME, RECORDING_METADATA_DTYPE, RECORDING_VERSION
+except ImportError:
+    from framestore import pixelFormatDtype
+    from recorder import FRAMES_FILENAME, HEADER_FILENAME, \
+        METADATA_FILENAME, RECORDING_METADATA_DTYPE, RECORDING_VERSION
+
+class Recording(object):
+    """ A recording written by recorder.Recorder, opened lazily.
+
+    The frames are memory-mapped as a read-only (N, H, W) array, so opening
+    a recording only reads its header, and indexing or slicing it only
+    touches the frames asked for. Per-frame metadata is memory-mapped
+    separately in [meta] and can be searched without reading pixel data.
+
+    Only recordings of the current layout version, see
+    recorder.RECORDING_VERSION, can be read.
+    """
+    def __init__(self, path):
+        self.path = path
+        config = configparser.ConfigParser()
+        if not config.read(os.path.join(path, HEADER_FILENAME)):
+            raise Exception("No recording found at " + str(path) + ".")
+        header = config['RECORDING']
+        version = header.get('VERSION')
+        if version != str(RECORDING_VERSION):
+            raise Exception("Recording " + str(path) + " has layout " +
+                "version " + str(version) + ", but this version reads " +
+                str(RECORDING_VERSION) + ".")
+        self.version = RECORDING_VERSION
+        self.width = int(header['IMAGE_WIDTH'])
+        self.height = int(header['IMAGE_HEIGHT'])
+        self.x_offset = int(header['IMAGE_X_OFFSET'])
+        self.y_offset = int(header['IMAGE_Y_OFFSET'])
+        self.pixel_format = header['PIXEL_FORMAT']
+        self.dtype = np.dtype(header['DTYPE'])
+        if self.dtype != np.dtype(pixelFormatDtype(self.pixel_format)):
+            raise Exception("Recording dtype " + str(self.dtype) + " does " +
+                "not match pixel format " + self.pixel_format + ".")
+
+        # N_FRAMES is only final once the recording has finished, so trust
+        # the file size if the recording was cut short.
+        #
+        frames_path = os.path.join(path, FRAMES_FILENAME)
+        frame_bytes = self.width*self.height*self.dtype.itemsize
+        n_on_disk = os.path.getsize(frames_path)//frame_bytes
+        n_frames = int(header['N_FRAMES'])
+        if n_frames == 0 or n_frames > n_on_disk:
+            n_frames = n_on_disk
+
+        if n_frames > 0:
+            self.data = np.memmap(frames_path, dtype=self.dtype, mode='r',
+                shape=(n_frames, self.height, self.width))
+            self.meta = np.memmap(os.path.join(path, METADATA_FILENAME),
+                dtype=RECORDING_METADATA_DTYPE, mode='r', shape=(n_frames,))
+        else:
+            self.data = np.zeros((0, self.height, self.width),
+                dtype=self.dtype)
+            self.meta = np.zeros(0, dtype=RECORDING_METADATA_DTYPE)
+
+    def __array__(self, dtype=None, copy=None):
+        """ Return the frames, copied as for FrameHandle.__array__(). """
+        converts = dtype is not None and np.dtype(dtype) != self.data.dtype
+        if copy is False and converts:
+            raise ValueError("Recording can't be converted to " + str(dtype) +
+                " without a copy.")
+        if copy or converts:
+            return np.array(self.data, dtype=dtype, copy=True)
+        return np.asarray(self.data)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def find(self, frame_id):
+        """ Return the index of the frame with ID [frame_id], or None. """
+        idx = np.flatnonzero(self.meta['frame_id'] == frame_id)
+        if len(idx) == 0:
+            return None
+        return int(idx[0])
+
+    def getAOI(self):
+        """ Return the area of interest in the same form as
+        Basler.getAOI().
+        """
+        return (self.width, self.height, self.x_offset, self.y_offset)
+
+    def getPixelFormat(self):
+        """ Return the pixel format the recording was made with. """
+        return self.pixel_format
+
+    def iterChunks(self, chunk_frames=64, start=0, stop=None, step=1):
+        """ Yield (index, frames) pairs of up to [chunk_frames] frames at a
+        time, where [index] is the position of the first frame.
+
+        Each chunk is a view onto the mapped file; copy it if it needs to be
+        modified.
+        """
+        if step < 1:
+            raise Exception("Chunks can only be iterated forwards.")
+        indices = range(*slice(start, stop, step).indices(len(self)))
+        for i in range(0, len(indices), chunk_frames):
+            chunk = indices[i:i + chunk_frames]
+            yield chunk.start, self.data[chunk.start:chunk.stop:chunk.step]
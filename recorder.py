@@ -0,0 +1,184 @@
+import configparser
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+try:
+    from .framestore import FRAME_METADATA_DTYPE, pixelFormatDtype, \
+        writeFrame
+    from .packed import isPacked, newScratch
+except ImportError:
+    from framestore import FRAME_METADATA_DTYPE, pixelFormatDtype, \
+        writeFrame
+    from packed import isPacked, newScratch
+
+# A recording is a directory holding these files:
+#
+#   - frames.raw: the frames, back to back, in C order,
+#   - metadata.raw: one RECORDING_METADATA_DTYPE record per frame,
+#   - recording.ini: the layout version, frame shape, dtype and camera
+#     settings.
+#
+FRAMES_FILENAME = 'frames.raw'
+METADATA_FILENAME = 'metadata.raw'
+HEADER_FILENAME = 'recording.ini'
+
+# Per-frame metadata stored in a recording. Frames without an exposure or
+# gain chunk are given the exposure or gain set when recording started.
+#
+RECORDING_METADATA_DTYPE = np.dtype(FRAME_METADATA_DTYPE.descr + [
+    ('offset_x', np.uint32),
+    ('offset_y', np.uint32)
+])
+
+# Version of the recording layout, written to recording.ini and bumped
+# whenever RECORDING_METADATA_DTYPE changes.
+#
+RECORDING_VERSION = 1
+
+class Recorder(object):
+    """ Stream frames from a Basler camera to disk with bounded memory.
+
+    Frames are copied into one of [n_chunks] preallocated chunks of
+    [chunk_frames] frames. Full chunks are handed to an I/O thread, which
+    appends them to the recording with one large sequential write, while the
+    grab loop carries on filling the next free chunk. Memory use is fixed at
+    n_chunks*chunk_frames frames however long the recording is.
+
+    If the disk can't keep up, the grab loop waits for a free chunk; the
+    number of waits is counted in [stalls].
+    """
+    def __init__(self, camera, path, chunk_frames=64, n_chunks=4):
+        self.camera = camera
+        self.path = path
+        self.chunk_frames = int(chunk_frames)
+        self.n_chunks = int(n_chunks)
+        self.n_frames = 0
+        self.stalls = 0
+        self.io_error = None
+
+    def record(self, n_frames, read_timeout_ms=1000, max_grab_attempts=3):
+        """ Record [n_frames] frames from a camera that is already grabbing.
+
+        Returns the number of frames written, which is less than [n_frames]
+        if [max_grab_attempts] failed grabs occurred first.
+        """
+        self.camera.checkNoHostTransform('record()')
+        aoi = self.camera.getAOI()
+        pixel_format = self.camera.getPixelFormat()
+        if aoi is None or pixel_format is None:
+            raise Exception("Could not read the AOI and pixel format from " +
+                "the camera.")
+        w, h, x_offset, y_offset = aoi
+        dtype = np.dtype(pixelFormatDtype(pixel_format))
+        exposure_us = self.camera.getExposureTimeMicroseconds()
+        gain = self.camera.getGain()
+
+        os.makedirs(self.path, exist_ok=True)
+        self.writeHeader(w, h, dtype, pixel_format, x_offset, y_offset,
+            exposure_us, gain, 0)
+
+        data = np.zeros((self.n_chunks, self.chunk_frames, h, w), dtype=dtype)
+        meta = np.zeros((self.n_chunks, self.chunk_frames),
+            dtype=RECORDING_METADATA_DTYPE)
+        meta['offset_x'] = x_offset
+        meta['offset_y'] = y_offset
+        default_exposure_us = np.nan if exposure_us is None else exposure_us
+        default_gain = np.nan if gain is None else gain
+        scratch = None
+        if isPacked(pixel_format):
+            scratch = newScratch(pixel_format, h*w)
+
+        free = queue.Queue()
+        for chunk in range(self.n_chunks):
+            free.put(chunk)
+        full = queue.Queue()
+        writer = threading.Thread(target=self.writeChunks,
+            args=(data, meta, free, full), daemon=True)
+        writer.start()
+
+        self.n_frames = 0
+        grab_attempts = 0
+        chunk = None
+        n_in_chunk = 0
+        try:
+            while self.n_frames < n_frames and self.io_error is None:
+                if grab_attempts >= max_grab_attempts:
+                    break
+                if chunk is None:
+                    try:
+                        chunk = free.get_nowait()
+                    except queue.Empty:
+                        self.stalls += 1
+                        chunk = free.get()
+                    n_in_chunk = 0
+                grabResult = self.camera.retrieveResult(read_timeout_ms)
+                if grabResult.IsValid() and grabResult.GrabSucceeded():
+                    record = meta[chunk, n_in_chunk]
+                    writeFrame(grabResult, data[chunk, n_in_chunk], record,
+                        sequence=self.n_frames, pixel_format=pixel_format,
+                        scratch=scratch)
+                    grabResult.Release()
+                    if np.isnan(record['exposure_us']):
+                        record['exposure_us'] = default_exposure_us
+                    if np.isnan(record['gain']):
+                        record['gain'] = default_gain
+                    self.camera.clock.annotate(record)
+                    self.n_frames += 1
+                    n_in_chunk += 1
+                    if n_in_chunk == self.chunk_frames:
+                        full.put((chunk, n_in_chunk))
+                        chunk = None
+                else:
+                    grab_attempts += 1
+            if chunk is not None and n_in_chunk > 0:
+                full.put((chunk, n_in_chunk))
+        finally:
+            full.put(None)
+            writer.join()
+
+        self.writeHeader(w, h, dtype, pixel_format, x_offset, y_offset,
+            exposure_us, gain, self.n_frames)
+        if self.io_error is not None:
+            raise self.io_error
+        return self.n_frames
+
+    def writeChunks(self, data, meta, free, full):
+        """ I/O thread: append full chunks to the recording files. """
+        with open(os.path.join(self.path, FRAMES_FILENAME), 'wb') as f_data, \
+        open(os.path.join(self.path, METADATA_FILENAME), 'wb') as f_meta:
+            while True:
+                item = full.get()
+                if item is None:
+                    break
+                chunk, n = item
+                try:
+                    if self.io_error is None:
+                        f_data.write(data[chunk, :n].data)
+                        f_meta.write(meta[chunk, :n].data)
+                except Exception as e:
+                    self.io_error = e
+                free.put(chunk)
+
+    def writeHeader(self, w, h, dtype, pixel_format, x_offset, y_offset,
+        exposure_us, gain, n_frames):
+        """ Write the recording's header file. """
+        config = configparser.ConfigParser()
+        config['RECORDING'] = {
+            'VERSION': str(RECORDING_VERSION),
+            'N_FRAMES': str(n_frames),
+            'IMAGE_WIDTH': str(w),
+            'IMAGE_HEIGHT': str(h),
+            'IMAGE_X_OFFSET': str(x_offset),
+            'IMAGE_Y_OFFSET': str(y_offset),
+            'DTYPE': dtype.str,
+            'PIXEL_FORMAT': str(pixel_format),
+            'EXPTIME': str(exposure_us),
+            'GAIN': str(gain),
+            'CREATED': str(time.time())
+        }
+        with open(os.path.join(self.path, HEADER_FILENAME), 'w') as f:
+            config.write(f)
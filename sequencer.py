@@ -0,0 +1,146 @@
+# Ways the sequencer moves from one set to the next, see Sequencer.start().
+#
+ADVANCE_MODES = ('Auto', 'Controlled')
+
+# Chunks enabled by Sequencer.start(), so each frame carries its set along
+# with the exposure and gain it was taken with. Framecounter must be among
+# them for the others to be read, see framestore.writeChunks().
+#
+SEQUENCE_CHUNKS = ('Framecounter', 'Timestamp', 'ExposureTime', 'GainAll',
+    'SequenceSetIndex')
+
+class Sequencer(object):
+    """ Switch a Basler camera between preloaded parameter sets, frame by
+    frame.
+
+    Changing the exposure or gain while grabbing costs a register round trip
+    per node, and the new value can't be tied to a particular frame. The
+    camera's sequencer instead holds several sets of parameters (exposure,
+    gain, black level, AOI and binning) and switches between them itself as
+    frames are exposed, so sets can alternate at the full frame rate. Sets
+    are uploaded with upload() and the sequencer started with start(), both
+    while not grabbing.
+
+    Each frame is tagged with the index of the set that exposed it in the
+    'sequence_set' field of its metadata (see
+    framestore.FRAME_METADATA_DTYPE), from the SequenceSetIndex chunk enabled
+    by start(), so that [sets][meta['sequence_set']] is the configuration of
+    a frame.
+
+    Sets with different AOIs or binning give frames of different shapes,
+    which can't be read into a frame store, readInto() or a recording; use
+    read() without a frame store. While the sequencer runs, getters return
+    the parameters of the set last loaded, not those of the frame being
+    exposed.
+    """
+    def __init__(self, camera):
+        self.camera = camera
+        self.sets = []
+        self.executions = []
+        self.advance_mode = None
+        self.tagged = False
+
+    def advance(self):
+        """ Move to the next set now, in the Controlled advance mode. """
+        self.camera.getNode('SequenceAsyncAdvance').Execute()
+
+    def isEnabled(self):
+        try:
+            rtn = bool(self.camera.getNodeValue('SequenceEnable'))
+        except:
+            rtn = None
+        return rtn
+
+    def load(self, index):
+        """ Copy set [index] into the camera's current parameters. """
+        self.camera.setNodeValue('SequenceSetIndex', index)
+        self.camera.getNode('SequenceSetLoad').Execute()
+        self.camera.invalidateCache()
+
+    def restart(self):
+        """ Go back to the first set now, in the Controlled advance mode. """
+        self.camera.getNode('SequenceAsyncRestart').Execute()
+
+    def start(self, advance='Auto', source='AlwaysActive',
+        restart_source='Disabled'):
+        """ Enable the sequencer, starting from the first set.
+
+        With [advance] 'Auto', each set is used for its number of executions
+        (see upload()) before moving to the next. With 'Controlled', the set
+        moves on when [source] (a SequenceControlSource) fires:
+        'AlwaysActive' for every frame, an input line such as 'Line1' for
+        each pulse, or 'Disabled' only when advance() is called.
+        [restart_source] likewise goes back to the first set.
+
+        Frames are tagged with their set if the camera can send the
+        SequenceSetIndex chunk; [tagged] says whether it could.
+        """
+        if advance not in ADVANCE_MODES:
+            raise Exception("The sequencer advance mode must be one of " +
+                str(ADVANCE_MODES) + ", not " + str(advance) + ".")
+        camera = self.camera
+        camera.setNodeValue('SequenceAdvanceMode', advance)
+        if advance == 'Controlled':
+            for selector, value in (('Advance', source),
+                ('Restart', restart_source)):
+                camera.setNodeValue('SequenceControlSelector', selector)
+                camera.setNodeValue('SequenceControlSource', value)
+        self.tagged = camera.enableChunks(SEQUENCE_CHUNKS) is not None
+        camera.setNodeValue('SequenceEnable', True)
+        camera.invalidateCache()
+        self.advance_mode = advance
+
+    def stop(self):
+        """ Disable the sequencer. The camera keeps the parameters of the
+        set last loaded.
+        """
+        self.camera.setNodeValue('SequenceEnable', False)
+        self.camera.invalidateCache()
+        self.advance_mode = None
+
+    def upload(self, sets, executions=1):
+        """ Store [sets] in the camera's sequencer, disabling it first.
+
+        Each set is a configuration as for Basler.sendParameters(), written
+        in turn, so parameters a set leaves out keep the value of the set
+        before, and parameters the sequencer doesn't hold (e.g. the pixel
+        format) apply to all sets. [executions] is the number of frames each
+        set is used for in the Auto advance mode, one number for all sets or
+        one per set. The first set is then loaded.
+
+        Returns the sendParameters() report of each set.
+        """
+        camera = self.camera
+        sets = [dict(config) for config in sets]
+        if isinstance(executions, int):
+            executions = [executions]*len(sets)
+        executions = list(executions)
+        if len(executions) != len(sets):
+            raise Exception("Got " + str(len(executions)) + " executions " +
+                "for " + str(len(sets)) + " sequence sets.")
+        if not camera.hasNode('SequenceEnable'):
+            raise Exception("The camera has no sequencer.")
+        if camera.isExposing():
+            raise Exception("Sequence sets can't be uploaded while " +
+                "grabbing.")
+        max_sets = camera.getNode('SequenceSetTotalNumber').GetMax()
+        if not 0 < len(sets) <= max_sets:
+            raise Exception("The sequencer holds 1 to " + str(max_sets) +
+                " sets, not " + str(len(sets)) + ".")
+        self.stop()
+        camera.setNodeValue('SequenceSetTotalNumber', len(sets))
+        reports = []
+        for index, (config, n) in enumerate(zip(sets, executions)):
+            report = camera.sendParameters(config)
+            if report['failed']:
+                raise Exception("Failed to set sequence set " + str(index) +
+                    ": " + str(report['failed']))
+            camera.setNodeValue('SequenceSetIndex', index)
+            if camera.hasNode('SequenceSetExecutions'):
+                camera.setNodeValue('SequenceSetExecutions', n)
+            camera.getNode('SequenceSetStore').Execute()
+            reports.append(report)
+        self.load(0)
+        self.sets = sets
+        self.executions = executions
+        return reports
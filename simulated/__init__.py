@@ -0,0 +1,5 @@
+""" A simulated pylon backend, for running without a camera or driver.
+
+The pylon and genicam modules here stand in for pypylon.pylon and
+pypylon.genicam; select them with Basler.find(backend='simulated').
+"""
@@ -0,0 +1,31 @@
+""" Stand-ins for the parts of pypylon.genicam used by this package. """
+
+class GenericException(Exception):
+    pass
+
+class AccessException(GenericException):
+    pass
+
+class LogicalErrorException(GenericException):
+    pass
+
+class OutOfRangeException(GenericException):
+    pass
+
+class RuntimeException(GenericException):
+    pass
+
+class TimeoutException(GenericException):
+    pass
+
+def IsAvailable(node):
+    return node is not None
+
+def IsImplemented(node):
+    return node is not None
+
+def IsReadable(node):
+    return node is not None
+
+def IsWritable(node):
+    return node is not None and node.IsWritable()
@@ -0,0 +1,1145 @@
+""" A simulated pylon transport layer and camera.
+
+Provides the parts of pypylon.pylon used by this package, backed by a model
+of a Basler GigE area-scan camera instead of hardware. The camera exposes the
+same nodes as the real one, produces synthetic frames at the rate its
+settings allow, and models the driver's buffer pool, read timeouts, dropped
+frames and the cost of a register access, so that the host side of the grab
+path can be benchmarked and tested without a camera or driver installed.
+
+Devices given the same [interface] share one link: packets sent while the
+bursts of several cameras together exceed the link rate are lost and resent
+out of the bandwidth reserve, and frames that need more resends than the
+reserve allows fail. Packets larger than the device's [mtu] never arrive.
+
+With a trigger enabled, frames are only exposed on a trigger, sent with
+ExecuteSoftwareTrigger() or fireLineTrigger(). Triggers arriving before the
+camera is ready for the next frame are ignored, as on the camera, and
+counted in [overtriggered].
+
+With the sequencer enabled, each frame is exposed with the parameters of the
+current sequence set, which advances after SequenceSetExecutions frames
+(Auto), or on every frame, a line pulse or SequenceAsyncAdvance, depending on
+the Advance SequenceControlSource (Controlled).
+
+Grabbing with GrabLoop_ProvidedByInstantCamera runs a grab loop thread that
+hands each result to the registered ImageEventHandlers, then releases it.
+
+Simulated devices are registered with TlFactory.GetInstance().AddDevice().
+"""
+import math
+import random
+import threading
+import time
+
+import numpy as np
+
+from . import genicam
+
+GrabStrategy_OneByOne = 0
+GrabStrategy_LatestImageOnly = 1
+GrabStrategy_LatestImages = 2
+GrabStrategy_UpcomingImage = 3
+
+TimeoutHandling_Return = 0
+TimeoutHandling_ThrowException = 1
+
+GrabLoop_ProvidedByInstantCamera = 0
+GrabLoop_ProvidedByUser = 1
+
+RegistrationMode_Append = 1
+RegistrationMode_ReplaceAll = 2
+
+Cleanup_None = 0
+Cleanup_Delete = 1
+
+# Model of the sensor and link, loosely based on an acA2040-35gm.
+#
+SENSOR_WIDTH = 2048
+SENSOR_HEIGHT = 2048
+LINK_BYTES_PER_S = 125*10**6
+TICK_FREQUENCY_HZ = 125*10**6
+PACKET_HEADER_BYTES = 36
+PACKET_OVERHEAD_BYTES = PACKET_HEADER_BYTES + 38
+ROW_TIME_US = 14.
+READOUT_OVERHEAD_US = 100.
+EXPOSURE_START_DELAY_US = 17.
+
+# Error code reported for frames that the model drops in transmission.
+#
+ERROR_INCOMPLETE_GRAB = 0xE1000014
+
+# Chunks the camera can append to a frame, and the bytes each adds to the
+# payload, with its header. The image itself is framed as a chunk too.
+#
+CHUNK_SELECTORS = ('Timestamp', 'Framecounter', 'ExposureTime', 'GainAll',
+    'SequenceSetIndex')
+CHUNK_BYTES = 16
+
+# Nodes held in each sequence set, in the order they are loaded, and the
+# number of sets.
+#
+SEQUENCE_PARAMETERS = ('BinningHorizontal', 'BinningVertical', 'Width',
+    'Height', 'OffsetX', 'OffsetY', 'ExposureTimeAbs', 'GainRaw',
+    'BlackLevelRaw')
+MAX_SEQUENCE_SETS = 64
+
+PIXEL_FORMAT_BITS = {
+    'Mono8': 8,
+    'Mono12': 16,
+    'Mono12p': 12,
+    'Mono16': 16
+}
+
+class Node(object):
+    """ A GenICam node of a simulated camera.
+
+    [minimum] and [maximum] may be callables, for limits that depend on other
+    nodes. A node with a [getter] is computed and can't be written. A node
+    with [locked_while_grabbing] set can't be written during acquisition, and
+    one in SEQUENCE_PARAMETERS can't be written while the sequencer is
+    enabled.
+    """
+    def __init__(self, camera, name, value=None, minimum=None, maximum=None,
+        inc=1, symbols=None, getter=None, locked_while_grabbing=False):
+        self.camera = camera
+        self.name = name
+        self.value = value
+        self.minimum = minimum
+        self.maximum = maximum
+        self.inc = inc
+        self.symbols = symbols
+        self.getter = getter
+        self.locked_while_grabbing = locked_while_grabbing
+
+    def GetInc(self):
+        return self.inc
+
+    def GetMax(self):
+        return self.maximum() if callable(self.maximum) else self.maximum
+
+    def GetMin(self):
+        return self.minimum() if callable(self.minimum) else self.minimum
+
+    def GetSymbolics(self):
+        return list(self.symbols)
+
+    def GetValue(self):
+        self.camera.accessRegister(write=False)
+        if self.getter is not None:
+            return self.getter()
+        return self.value
+
+    def IsWritable(self):
+        if self.getter is not None:
+            return False
+        if self.locked_while_grabbing and self.camera.IsGrabbing():
+            return False
+        if self.name in SEQUENCE_PARAMETERS and self.camera.isSequencing():
+            return False
+        return True
+
+    def SetValue(self, value):
+        self.camera.accessRegister(write=True)
+        if self.getter is not None:
+            raise genicam.AccessException("Node " + self.name +
+                " is read-only.")
+        if self.locked_while_grabbing and self.camera.IsGrabbing():
+            raise genicam.AccessException("Node " + self.name +
+                " is not writable while grabbing.")
+        if self.name in SEQUENCE_PARAMETERS and self.camera.isSequencing():
+            raise genicam.AccessException("Node " + self.name +
+                " is not writable while the sequencer is enabled.")
+        if self.symbols is not None:
+            if value not in self.symbols:
+                raise genicam.OutOfRangeException(str(value) + " is not " +
+                    "a valid value for " + self.name + ".")
+        elif self.minimum is not None:
+            minimum = self.GetMin()
+            maximum = self.GetMax()
+            if value < minimum or value > maximum:
+                raise genicam.OutOfRangeException(str(value) + " is out " +
+                    "of range [" + str(minimum) + ", " + str(maximum) +
+                    "] for " + self.name + ".")
+            if isinstance(self.inc, int) and self.inc > 1 and \
+            (int(value) - minimum) % self.inc != 0:
+                raise genicam.OutOfRangeException(str(value) + " is not " +
+                    "a multiple of " + str(self.inc) + " for " + self.name +
+                    ".")
+        self.value = value
+        self.camera.nodeChanged(self.name)
+
+class SelectedNode(Node):
+    """ A node holding one value per entry of the [selector] node, such as
+    TriggerMode for each TriggerSelector.
+    """
+    def __init__(self, camera, name, selector, value=None, **kwargs):
+        self.selector = selector
+        self.values = {}
+        self.default = value
+        super(SelectedNode, self).__init__(camera, name, **kwargs)
+
+    @property
+    def value(self):
+        return self.values.get(self.camera.nodes[self.selector].value,
+            self.default)
+
+    @value.setter
+    def value(self, value):
+        if value is not None:
+            self.values[self.camera.nodes[self.selector].value] = value
+
+class CommandNode(Node):
+    """ A command node, calling [command] when executed. """
+    def __init__(self, camera, name, command):
+        super(CommandNode, self).__init__(camera, name)
+        self.command = command
+
+    def Execute(self):
+        self.camera.accessRegister(write=True)
+        self.command()
+
+class DeviceInfo(object):
+    """ Description of a simulated device, as returned by
+    TlFactory.EnumerateDevices().
+    """
+    def __init__(self, serial_number, model_name='acA2040-35gm',
+        user_defined_name='', ip_address='192.168.0.10', **options):
+        self.serial_number = str(serial_number)
+        self.model_name = model_name
+        self.user_defined_name = user_defined_name
+        self.ip_address = ip_address
+        self.options = options
+
+    def GetDeviceClass(self):
+        return 'BaslerGigE'
+
+    def GetFriendlyName(self):
+        return self.model_name + ' (' + self.serial_number + ')'
+
+    def GetIpAddress(self):
+        return self.ip_address
+
+    def GetModelName(self):
+        return self.model_name
+
+    def GetSerialNumber(self):
+        return self.serial_number
+
+    def GetUserDefinedName(self):
+        return self.user_defined_name
+
+class Device(object):
+    def __init__(self, device_info):
+        self.device_info = device_info
+
+class TlFactory(object):
+    """ Registry of simulated devices. [enumerate_latency_s] is the time
+    taken by EnumerateDevices(), which on GigE is spent waiting for devices
+    to answer a broadcast.
+    """
+    instance = None
+
+    def __init__(self):
+        self.devices = []
+        self.enumerate_latency_s = 0.
+
+    @classmethod
+    def GetInstance(cls):
+        if cls.instance is None:
+            cls.instance = cls()
+        return cls.instance
+
+    def AddDevice(self, serial_number, **kwargs):
+        """ Register a simulated device and return its DeviceInfo.
+
+        Options are passed on to the camera model: [frame_drop_rate] is the
+        fraction of frames delivered as failed grabs, [register_latency_s]
+        the time taken by each node access, [open_latency_s] the time taken
+        to open the device, [sensor_width] and
+        [sensor_height] the sensor size, [mtu] the largest packet the network
+        path carries and [interface] the name of a link shared with other
+        devices (by default, each device has a link of its own).
+        """
+        device_info = DeviceInfo(serial_number, **kwargs)
+        self.devices.append(device_info)
+        return device_info
+
+    def CreateDevice(self, device_info):
+        return Device(device_info)
+
+    def CreateFirstDevice(self):
+        if not self.devices:
+            raise genicam.RuntimeException("No device is available.")
+        return Device(self.devices[0])
+
+    def EnumerateDevices(self):
+        if self.enumerate_latency_s:
+            time.sleep(self.enumerate_latency_s)
+        return list(self.devices)
+
+    def RemoveDevices(self):
+        """ Forget all registered devices. """
+        self.devices = []
+
+class ChunkValue(object):
+    """ A chunk of a grab result, such as ChunkTimestamp. """
+    def __init__(self, value):
+        self.Value = value
+
+    def GetValue(self):
+        return self.Value
+
+class GrabResult(object):
+    """ The result of a simulated grab. An invalid result stands for a
+    timeout. Chunks sent with the frame are attributes, e.g. ChunkTimestamp.
+    """
+    def __init__(self, camera=None, buffer_index=None, width=0, height=0,
+        pixel_format=None, block_id=0, timestamp=0, error_code=0,
+        skipped=0, chunks=None):
+        self.camera = camera
+        self.buffer_index = buffer_index
+        self.width = width
+        self.height = height
+        self.pixel_format = pixel_format
+        self.block_id = block_id
+        self.timestamp = timestamp
+        self.error_code = error_code
+        self.skipped = skipped
+        self.chunks = chunks or {}
+
+    def __getattr__(self, name):
+        try:
+            return ChunkValue(self.__dict__['chunks'][name])
+        except KeyError:
+            raise genicam.LogicalErrorException("Node not existing: " + name)
+
+    @property
+    def Array(self):
+        if self.pixel_format == 'Mono12p':
+            raise genicam.RuntimeException("Packed pixel formats can't be " +
+                "converted to an array.")
+        dtype = np.uint8 if self.pixel_format == 'Mono8' else np.uint16
+        return np.frombuffer(self.GetImageMemoryView(), dtype=dtype,
+            count=self.width*self.height).reshape(self.height,
+            self.width).copy()
+
+    def GetBlockID(self):
+        return self.block_id
+
+    def GetCameraContext(self):
+        return self.camera.camera_context
+
+    def GetErrorCode(self):
+        return self.error_code
+
+    def GetErrorDescription(self):
+        if self.error_code == ERROR_INCOMPLETE_GRAB:
+            return "The image stream is incomplete (simulated)."
+        return ""
+
+    def GetHeight(self):
+        return self.height
+
+    def GetImageMemoryView(self):
+        return memoryview(self.camera.buffers[self.buffer_index])
+
+    def GetNumberOfSkippedImages(self):
+        return self.skipped
+
+    def GetPayloadSize(self):
+        return len(self.camera.buffers[self.buffer_index])
+
+    def GetTimeStamp(self):
+        return self.timestamp
+
+    def GetWidth(self):
+        return self.width
+
+    def GrabSucceeded(self):
+        return self.error_code == 0
+
+    def IsValid(self):
+        return self.camera is not None and self.buffer_index is not None
+
+    def __del__(self):
+        # Like pypylon's grab result smart pointer, hand the buffer back when
+        # the last reference goes.
+        #
+        self.Release()
+
+    def Release(self):
+        if self.IsValid():
+            self.camera.releaseBuffer(self.buffer_index)
+            self.buffer_index = None
+
+class StreamGrabber(object):
+    """ Stream grabber statistics of a simulated camera. """
+    def __init__(self, camera):
+        self.Statistic_Total_Buffer_Count = Node(camera,
+            'Statistic_Total_Buffer_Count', getter=lambda: camera.delivered)
+        self.Statistic_Failed_Buffer_Count = Node(camera,
+            'Statistic_Failed_Buffer_Count', getter=lambda: camera.dropped)
+        self.Statistic_Buffer_Underrun_Count = Node(camera,
+            'Statistic_Buffer_Underrun_Count', getter=lambda: camera.skipped)
+        self.Statistic_Total_Packet_Count = Node(camera,
+            'Statistic_Total_Packet_Count',
+            getter=lambda: camera.delivered*camera.packetCount())
+        self.Statistic_Failed_Packet_Count = Node(camera,
+            'Statistic_Failed_Packet_Count',
+            getter=lambda: camera.lost_packets)
+        self.Statistic_Resend_Request_Count = Node(camera,
+            'Statistic_Resend_Request_Count',
+            getter=lambda: camera.resend_requests)
+        self.Statistic_Resend_Packet_Count = Node(camera,
+            'Statistic_Resend_Packet_Count',
+            getter=lambda: camera.resent_packets)
+
+class ImageEventHandler(object):
+    """ Base class of the handlers called by the grab loop thread. """
+    def OnImageEventHandlerDeregistered(self, camera):
+        pass
+
+    def OnImageEventHandlerRegistered(self, camera):
+        pass
+
+    def OnImageGrabbed(self, camera, grabResult):
+        pass
+
+    def OnImagesSkipped(self, camera, countOfSkippedImages):
+        pass
+
+class InstantCamera(object):
+    """ A simulated pylon InstantCamera. """
+    # Cameras grabbing on each shared interface, see lossFraction().
+    #
+    interfaces = {}
+
+    def __init__(self, device=None):
+        self.__dict__['nodes'] = {}
+        self.StreamGrabber = StreamGrabber(self)
+        self.delivered = 0
+        self.device = None
+        self.camera_context = 0
+        self.is_open = False
+        self.grab_strategy = None
+        self.lock = threading.Condition()
+        self.register_reads = 0
+        self.register_writes = 0
+        self.buffers = []
+        self.free_buffers = []
+        self.ready = []
+        self.skipped = 0
+        self.unreported_skips = 0
+        self.dropped = 0
+        self.lost_packets = 0
+        self.resent_packets = 0
+        self.resend_requests = 0
+        self.pending = []
+        self.overtriggered = 0
+        self.image_event_handlers = []
+        self.grab_loop_thread = None
+        if device is not None:
+            self.Attach(device)
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['nodes'][name]
+        except KeyError:
+            raise genicam.LogicalErrorException("Node not existing: " + name)
+
+    def accessRegister(self, write):
+        if write:
+            self.register_writes += 1
+        else:
+            self.register_reads += 1
+        if self.register_latency_s:
+            time.sleep(self.register_latency_s)
+
+    def addNode(self, name, **kwargs):
+        self.nodes[name] = Node(self, name, **kwargs)
+
+    def Attach(self, device):
+        self.device = device
+        options = device.device_info.options
+        self.sensor_width = options.get('sensor_width', SENSOR_WIDTH)
+        self.sensor_height = options.get('sensor_height', SENSOR_HEIGHT)
+        self.frame_drop_rate = options.get('frame_drop_rate', 0.)
+        self.register_latency_s = options.get('register_latency_s', 0.)
+        self.mtu = options.get('mtu', 1500)
+        self.interface = options.get('interface')
+        self.random = random.Random(options.get('seed', 0))
+        self.clock_drift_ppm = options.get('clock_drift_ppm', 0.)
+        self.clock_epoch = time.monotonic()
+        self.latched_ticks = 0
+        self.sequence_sets = {}
+        self.sequence_set = 0
+        self.sequence_executions = 0
+        self.buildNodes()
+
+    def buildNodes(self):
+        self.nodes.clear()
+        add = self.addNode
+        add('Width', value=self.sensor_width, minimum=16, inc=16,
+            maximum=lambda: self.sensorColumns() - self.OffsetX.value,
+            locked_while_grabbing=True)
+        add('Height', value=self.sensor_height, minimum=1,
+            maximum=lambda: self.sensorRows() - self.OffsetY.value,
+            locked_while_grabbing=True)
+        add('OffsetX', value=0, minimum=0, inc=16,
+            maximum=lambda: self.sensorColumns() - self.Width.value,
+            locked_while_grabbing=True)
+        add('OffsetY', value=0, minimum=0,
+            maximum=lambda: self.sensorRows() - self.Height.value,
+            locked_while_grabbing=True)
+        add('BinningHorizontal', value=1, minimum=1, maximum=4,
+            locked_while_grabbing=True)
+        add('BinningVertical', value=1, minimum=1, maximum=4,
+            locked_while_grabbing=True)
+        add('BinningHorizontalMode', value='Summing',
+            symbols=('Summing', 'Averaging'))
+        add('BinningVerticalMode', value='Summing',
+            symbols=('Summing', 'Averaging'))
+        add('PixelFormat', value='Mono8', symbols=tuple(PIXEL_FORMAT_BITS),
+            locked_while_grabbing=True)
+        add('PayloadSize', getter=self.payloadSize)
+        add('ExposureTimeAbs', value=10000., minimum=35., maximum=10**7,
+            inc=1.)
+        add('GainRaw', value=0, minimum=0, maximum=240)
+        add('GainAuto', value='Off', symbols=('Off', 'Once', 'Continuous'))
+        add('BlackLevelRaw', value=0, minimum=0, maximum=4095)
+        add('ReverseX', value=False, symbols=(False, True))
+        add('ReverseY', value=False, symbols=(False, True))
+        add('AcquisitionMode', value='Continuous',
+            symbols=('Continuous', 'SingleFrame'))
+        add('AcquisitionFrameCount', value=1, minimum=1, maximum=255)
+        add('TriggerSelector', value='FrameStart',
+            symbols=('AcquisitionStart', 'FrameStart'))
+        for name, value, symbols in (
+            ('TriggerMode', 'Off', ('Off', 'On')),
+            ('TriggerSource', 'Line1', ('Software', 'Line1', 'Line3')),
+            ('TriggerActivation', 'RisingEdge', ('RisingEdge',
+                'FallingEdge'))):
+            self.nodes[name] = SelectedNode(self, name, 'TriggerSelector',
+                value=value, symbols=symbols)
+        self.nodes['TriggerDelayAbs'] = SelectedNode(self, 'TriggerDelayAbs',
+            'TriggerSelector', value=0., minimum=0., maximum=10**6, inc=1.)
+        self.nodes['TriggerSoftware'] = CommandNode(self, 'TriggerSoftware',
+            lambda: self.trigger('Software'))
+        add('AcquisitionFrameRateEnable', value=False, symbols=(False, True))
+        add('AcquisitionFrameRateAbs', value=100., minimum=0.1,
+            maximum=10**4, inc=0.01)
+        add('ResultingFrameRateAbs', getter=lambda: 1/self.framePeriod())
+        add('ReadoutTimeAbs', getter=self.readoutTime)
+        add('GevSCPSPacketSize', value=1500, minimum=220, maximum=9000,
+            inc=4, locked_while_grabbing=True)
+        add('GevSCPD', value=0, minimum=0, maximum=10**6)
+        add('GevSCFTD', value=0, minimum=0, maximum=10**6)
+        add('GevSCBWRA', value=10, minimum=0, maximum=26)
+        add('GevSCBWA', getter=self.bandwidthAssigned)
+        add('GevSCDCT', getter=lambda: self.payloadSize()/self.framePeriod())
+        add('GevLinkSpeed', getter=lambda: LINK_BYTES_PER_S*8//10**6)
+        add('GevTimestampTickFrequency', getter=lambda: TICK_FREQUENCY_HZ)
+        self.nodes['GevTimestampControlLatch'] = CommandNode(self,
+            'GevTimestampControlLatch', self.latchTimestamp)
+        add('GevTimestampValue', getter=lambda: self.latched_ticks)
+        add('ChunkModeActive', value=False, symbols=(False, True),
+            locked_while_grabbing=True)
+        add('ChunkSelector', value='Timestamp', symbols=CHUNK_SELECTORS)
+        self.nodes['ChunkEnable'] = SelectedNode(self, 'ChunkEnable',
+            'ChunkSelector', value=False, symbols=(False, True),
+            locked_while_grabbing=True)
+        add('SequenceEnable', value=False, symbols=(False, True),
+            locked_while_grabbing=True)
+        add('SequenceSetTotalNumber', value=2, minimum=1,
+            maximum=MAX_SEQUENCE_SETS, locked_while_grabbing=True)
+        add('SequenceSetIndex', value=0, minimum=0,
+            maximum=MAX_SEQUENCE_SETS - 1)
+        self.nodes['SequenceSetExecutions'] = SelectedNode(self,
+            'SequenceSetExecutions', 'SequenceSetIndex', value=1, minimum=1,
+            maximum=256)
+        add('SequenceAdvanceMode', value='Auto', symbols=('Auto',
+            'Controlled'), locked_while_grabbing=True)
+        add('SequenceControlSelector', value='Advance', symbols=('Advance',
+            'Restart'))
+        self.nodes['SequenceControlSource'] = SelectedNode(self,
+            'SequenceControlSource', 'SequenceControlSelector',
+            value='Disabled', symbols=('Disabled', 'AlwaysActive', 'Line1',
+            'Line3'))
+        self.nodes['SequenceSetStore'] = CommandNode(self, 'SequenceSetStore',
+            self.storeSequenceSet)
+        self.nodes['SequenceSetLoad'] = CommandNode(self, 'SequenceSetLoad',
+            lambda: self.loadSequenceSet(self.SequenceSetIndex.value))
+        self.nodes['SequenceAsyncAdvance'] = CommandNode(self,
+            'SequenceAsyncAdvance', lambda: self.advanceSequence())
+        self.nodes['SequenceAsyncRestart'] = CommandNode(self,
+            'SequenceAsyncRestart', lambda: self.advanceSequence(restart=True))
+        add('MaxNumBuffer', value=10, minimum=1, maximum=1024,
+            locked_while_grabbing=True)
+        add('DeviceUserID',
+            value=self.device.device_info.user_defined_name)
+        add('TemperatureSelector', value='Coreboard',
+            symbols=('Sensorboard', 'Coreboard', 'Framegrabber'))
+        add('TemperatureAbs', getter=lambda: 40.)
+        add('TemperatureState', getter=lambda: 'Ok')
+
+    # Camera model.
+    #
+    def bandwidthAssigned(self):
+        return int(LINK_BYTES_PER_S*(1 - self.GevSCBWRA.value/100.))
+
+    def burst(self):
+        """ Return the (start, end, rate) of a frame's transmission, with
+        times in seconds from the end of readout and the rate on the wire in
+        bytes/s.
+        """
+        wire_packet_bytes = self.GevSCPSPacketSize.value + \
+            PACKET_OVERHEAD_BYTES - PACKET_HEADER_BYTES
+        packet_s = wire_packet_bytes/self.bandwidthAssigned() + \
+            self.GevSCPD.value/TICK_FREQUENCY_HZ
+        start = self.GevSCFTD.value/TICK_FREQUENCY_HZ
+        return (start, start + self.packetCount()*packet_s,
+            wire_packet_bytes/packet_s)
+
+    def framePeriod(self):
+        """ Return the time between frames in seconds. """
+        sensor_s = (max(self.ExposureTimeAbs.value, self.readoutTime()) +
+            EXPOSURE_START_DELAY_US)/10**6
+        period = max(sensor_s, self.transmissionTime())
+        if self.AcquisitionFrameRateEnable.value:
+            period = max(period, 1/self.AcquisitionFrameRateAbs.value)
+        return period
+
+    def latency(self):
+        """ Return the time from the start of exposure until a frame has
+        reached the host, in seconds.
+        """
+        return (self.ExposureTimeAbs.value + self.readoutTime())/10**6 + \
+            self.transmissionTime()
+
+    def lossFraction(self):
+        """ Return the fraction of a frame's packets lost to other cameras
+        on the same interface, assuming all cameras read out together (e.g.
+        on a common trigger). While bursts overlap and their rates add up to
+        more than the link carries, the excess is lost.
+        """
+        if self.interface is None:
+            return 0.
+        start, end, rate = self.burst()
+        bursts = [c.burst() for c in InstantCamera.interfaces.get(
+            self.interface, ()) if c is not self] + [(start, end, rate)]
+        edges = sorted(set([start, end] + [t for b in bursts for t in b[:2]
+            if start < t < end]))
+        lost = 0.
+        for t0, t1 in zip(edges[:-1], edges[1:]):
+            total = sum(r for s, e, r in bursts if s <= t0 and e >= t1)
+            if total > LINK_BYTES_PER_S:
+                lost += (t1 - t0)*(total - LINK_BYTES_PER_S)/total
+        return lost/(end - start) if end > start else 0.
+
+    def packetCount(self):
+        """ Return the number of packets needed to send a frame. """
+        return -(-self.payloadSize()//(self.GevSCPSPacketSize.value -
+            PACKET_HEADER_BYTES))
+
+    def enabledChunks(self):
+        """ Return the chunks sent with each frame. """
+        if not self.ChunkModeActive.value:
+            return []
+        return [chunk for chunk in CHUNK_SELECTORS if self.selectedValue(
+            'ChunkEnable', chunk)]
+
+    def imageSize(self, values=None):
+        """ Return the bytes of an image with the current AOI, or that of
+        sequence set [values].
+        """
+        bits = PIXEL_FORMAT_BITS[self.PixelFormat.value]
+        if values is None:
+            return self.Width.value*self.Height.value*bits//8
+        return values['Width']*values['Height']*bits//8
+
+    def latchTimestamp(self):
+        self.latched_ticks = self.ticks(time.monotonic())
+
+    def payloadSize(self):
+        """ Return the payload of a frame, the largest of any sequence set
+        while the sequencer is enabled, so that every buffer fits any frame.
+        """
+        size = self.imageSize()
+        if self.isSequencing():
+            size = max(self.imageSize(values) for values in
+                self.sequence_sets.values())
+        if self.ChunkModeActive.value:
+            size += (1 + len(self.enabledChunks()))*CHUNK_BYTES
+        return size
+
+    def readoutTime(self):
+        """ Return the readout time in microseconds. """
+        return READOUT_OVERHEAD_US + ROW_TIME_US*self.Height.value
+
+    def ticks(self, t):
+        """ Return the camera clock, in ticks, at monotonic time [t]. The
+        clock runs from when the device was attached, [clock_drift_ppm] fast.
+        """
+        return int((t - self.clock_epoch)*TICK_FREQUENCY_HZ*(1 +
+            self.clock_drift_ppm/10**6))
+
+    def selectedValue(self, name, selector):
+        """ Return the value of [name] for the [selector] entry. """
+        node = self.nodes[name]
+        return node.values.get(selector, node.default)
+
+    def sensorColumns(self):
+        return self.sensor_width//self.BinningHorizontal.value
+
+    def sensorRows(self):
+        return self.sensor_height//self.BinningVertical.value
+
+    def transmissionTime(self):
+        """ Return the time to send a frame to the host in seconds, limited
+        by the assigned bandwidth, packet overheads and inter-packet delay.
+        """
+        n_packets = self.packetCount()
+        wire_bytes = self.payloadSize() + n_packets*PACKET_OVERHEAD_BYTES
+        return wire_bytes/self.bandwidthAssigned() + \
+            n_packets*self.GevSCPD.value/TICK_FREQUENCY_HZ + \
+            self.GevSCFTD.value/TICK_FREQUENCY_HZ
+
+    def isSequencing(self):
+        node = self.nodes.get('SequenceEnable')
+        return node is not None and node.value
+
+    def advanceSequence(self, restart=False):
+        """ Move to the next sequence set, wrapping around, or back to the
+        first if [restart], and load it for the next frame.
+        """
+        if not self.isSequencing():
+            return
+        with self.lock:
+            if restart:
+                self.sequence_set = 0
+            else:
+                self.sequence_set = (self.sequence_set + 1) % \
+                    self.SequenceSetTotalNumber.value
+            self.sequence_executions = 0
+            self.loadSequenceSet(self.sequence_set)
+
+    def loadSequenceSet(self, index):
+        """ Copy sequence set [index] into the parameter nodes. """
+        for name, value in self.sequence_sets.get(index, {}).items():
+            self.nodes[name].value = value
+
+    def sequenceControl(self, source):
+        """ Handle a pulse from [source] for the sequencer's Controlled
+        advance mode.
+        """
+        if not self.isSequencing() or \
+        self.SequenceAdvanceMode.value != 'Controlled':
+            return
+        if self.selectedValue('SequenceControlSource', 'Restart') == source:
+            self.advanceSequence(restart=True)
+        elif self.selectedValue('SequenceControlSource', 'Advance') == source:
+            self.advanceSequence()
+
+    def sequenceFrameDone(self):
+        """ Count a frame exposed with the current sequence set, and
+        advance if the set is done with.
+        """
+        if not self.isSequencing():
+            return
+        self.sequence_executions += 1
+        if self.SequenceAdvanceMode.value == 'Auto':
+            if self.sequence_executions >= self.selectedValue(
+                'SequenceSetExecutions', self.sequence_set):
+                self.advanceSequence()
+        elif self.selectedValue('SequenceControlSource', 'Advance') == \
+        'AlwaysActive':
+            self.advanceSequence()
+
+    def storeSequenceSet(self):
+        """ Save the parameter nodes into the selected sequence set. """
+        if self.isSequencing():
+            raise genicam.AccessException("Sequence sets can't be stored " +
+                "while the sequencer is enabled.")
+        self.sequence_sets[self.SequenceSetIndex.value] = dict((parameter,
+            self.nodes[parameter].value) for parameter in SEQUENCE_PARAMETERS)
+
+    def nodeChanged(self, name):
+        """ Keep the AOI on the sensor when binning changes, as the camera
+        does, and start the sequencer from the first set when enabled. Sets
+        that were never stored hold the parameters at that time.
+        """
+        if name == 'SequenceEnable' and self.SequenceEnable.value:
+            values = dict((parameter, self.nodes[parameter].value) for
+                parameter in SEQUENCE_PARAMETERS)
+            for index in range(self.SequenceSetTotalNumber.value):
+                self.sequence_sets.setdefault(index, dict(values))
+            self.sequence_set = 0
+            self.sequence_executions = 0
+            self.loadSequenceSet(0)
+        elif name == 'BinningHorizontal':
+            self.Width.value = min(self.Width.value, self.sensorColumns())
+            self.OffsetX.value = min(self.OffsetX.value,
+                self.sensorColumns() - self.Width.value)
+        elif name == 'BinningVertical':
+            self.Height.value = min(self.Height.value, self.sensorRows())
+            self.OffsetY.value = min(self.OffsetY.value,
+                self.sensorRows() - self.Height.value)
+
+    # Connection.
+    #
+    def Close(self):
+        if self.IsGrabbing():
+            self.StopGrabbing()
+        self.is_open = False
+
+    def GetCameraContext(self):
+        return self.camera_context
+
+    def GetDeviceInfo(self):
+        return self.device.device_info
+
+    def IsOpen(self):
+        return self.is_open
+
+    def Open(self):
+        if self.device is None:
+            raise genicam.RuntimeException("No device is attached.")
+        open_latency_s = self.device.device_info.options.get(
+            'open_latency_s', 0.)
+        if open_latency_s:
+            time.sleep(open_latency_s)
+        self.is_open = True
+
+    def SetCameraContext(self, context):
+        self.camera_context = context
+
+    # Grabbing.
+    #
+    def IsGrabbing(self):
+        return self.grab_strategy is not None
+
+    def DeregisterImageEventHandler(self, handler):
+        if handler not in self.image_event_handlers:
+            return False
+        self.image_event_handlers.remove(handler)
+        handler.OnImageEventHandlerDeregistered(self)
+        return True
+
+    def RegisterImageEventHandler(self, handler, mode=RegistrationMode_Append,
+        cleanup=Cleanup_Delete):
+        if mode == RegistrationMode_ReplaceAll:
+            for old in list(self.image_event_handlers):
+                self.DeregisterImageEventHandler(old)
+        self.image_event_handlers.append(handler)
+        handler.OnImageEventHandlerRegistered(self)
+
+    def grabLoop(self):
+        """ Body of the grab loop thread: retrieve results while grabbing
+        and hand them to the image event handlers.
+        """
+        while self.IsGrabbing():
+            try:
+                result = self.RetrieveResult(100, TimeoutHandling_Return)
+            except genicam.RuntimeException:
+                break
+            if not result.IsValid():
+                continue
+            skipped = result.GetNumberOfSkippedImages()
+            for handler in list(self.image_event_handlers):
+                # As in pylon, exceptions from handlers are swallowed so
+                # the grab loop keeps running.
+                #
+                try:
+                    if skipped:
+                        handler.OnImagesSkipped(self, skipped)
+                    handler.OnImageGrabbed(self, result)
+                except Exception:
+                    pass
+            result.Release()
+
+    def StartGrabbing(self, strategy=GrabStrategy_OneByOne,
+        grab_loop=GrabLoop_ProvidedByUser):
+        if not self.is_open:
+            self.Open()
+        payload = self.payloadSize()
+        n_buffers = self.MaxNumBuffer.value
+        self.buffers = [np.zeros(payload, dtype=np.uint8) for i in
+            range(n_buffers)]
+        self.free_buffers = list(range(n_buffers))
+        self.ready = []
+        self.patterns = {}
+        self.block_id = 0
+        self.skipped = 0
+        self.unreported_skips = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.lost_packets = 0
+        self.resent_packets = 0
+        self.resend_requests = 0
+        self.pending = []
+        self.overtriggered = 0
+        self.trigger_ready_time = time.monotonic()
+        if self.interface is not None:
+            InstantCamera.interfaces.setdefault(self.interface, set()).add(
+                self)
+        self.next_frame_time = time.monotonic() + self.framePeriod()
+        if self.triggerSelector() is not None:
+            self.next_frame_time = float('inf')
+        self.start_time = time.monotonic()
+        self.grab_strategy = strategy
+        if grab_loop == GrabLoop_ProvidedByInstantCamera:
+            self.grab_loop_thread = threading.Thread(target=self.grabLoop,
+                daemon=True)
+            self.grab_loop_thread.start()
+
+    def StopGrabbing(self):
+        with self.lock:
+            self.grab_strategy = None
+            self.ready = []
+            self.lock.notify_all()
+        InstantCamera.interfaces.get(self.interface, set()).discard(self)
+        thread = self.grab_loop_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+            self.grab_loop_thread = None
+
+    def RetrieveResult(self, timeout_ms, timeout_handling=
+        TimeoutHandling_ThrowException):
+        if not self.IsGrabbing():
+            raise genicam.RuntimeException("The camera is not grabbing.")
+        deadline = time.monotonic() + timeout_ms/10**3
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                self.produceFrames(now)
+                if self.ready:
+                    return self.ready.pop(0)
+                wait = min(self.next_frame_time, deadline) - now
+                if now >= deadline or not self.IsGrabbing():
+                    break
+                self.lock.wait(max(wait, 0))
+        if timeout_handling == TimeoutHandling_ThrowException:
+            raise genicam.TimeoutException("Grab timed out after " +
+                str(timeout_ms) + " ms.")
+        return GrabResult()
+
+    # Triggering.
+    #
+    def ExecuteSoftwareTrigger(self):
+        self.TriggerSoftware.Execute()
+
+    def fireLineTrigger(self, line='Line1'):
+        """ Simulate a trigger pulse on an input [line]. """
+        self.sequenceControl(line)
+        self.trigger(line)
+
+    def trigger(self, source):
+        """ Handle a trigger from [source] at the current time. A frame
+        start trigger exposes one frame, an acquisition start trigger
+        AcquisitionFrameCount frames at the free-running rate.
+        """
+        selector = self.triggerSelector()
+        if selector is None or not self.IsGrabbing() or \
+        self.selectedValue('TriggerSource', selector) != source:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if now < self.trigger_ready_time:
+                self.overtriggered += 1
+                return
+            start = now + self.selectedValue('TriggerDelayAbs',
+                selector)/10**6 + EXPOSURE_START_DELAY_US/10**6
+            n_frames = 1
+            if selector == 'AcquisitionStart':
+                n_frames = self.AcquisitionFrameCount.value
+            period = self.framePeriod()
+            for i in range(n_frames):
+                self.pending.append(start + i*period)
+            self.trigger_ready_time = start + n_frames*period
+            self.next_frame_time = self.pending[0] + self.latency()
+            self.lock.notify_all()
+
+    def triggerSelector(self):
+        """ Return the trigger selector whose trigger is on, or None if the
+        camera is free-running.
+        """
+        for selector in ('FrameStart', 'AcquisitionStart'):
+            if self.selectedValue('TriggerMode', selector) == 'On':
+                return selector
+        return None
+
+    def WaitForFrameTriggerReady(self, timeout_ms, timeout_handling=
+        TimeoutHandling_ThrowException):
+        wait = self.trigger_ready_time - time.monotonic()
+        if wait > timeout_ms/10**3:
+            time.sleep(timeout_ms/10**3)
+            if timeout_handling == TimeoutHandling_ThrowException:
+                raise genicam.TimeoutException("The camera was not ready " +
+                    "for a trigger within " + str(timeout_ms) + " ms.")
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def newPattern(self):
+        """ Return the raw bytes of a synthetic frame for the current AOI and
+        pixel format: a diagonal gradient.
+        """
+        w = self.Width.value
+        h = self.Height.value
+        pixel_format = self.PixelFormat.value
+        max_value = 2**min(PIXEL_FORMAT_BITS[pixel_format], 12) - 1
+        y, x = np.mgrid[0:h, 0:w]
+        img = ((x + y)*max_value//max(w + h - 2, 1)).astype(np.uint16)
+        if pixel_format == 'Mono8':
+            return img.astype(np.uint8).ravel()
+        if pixel_format == 'Mono12p':
+            pairs = img.reshape(-1, 2)
+            packed = np.empty((len(pairs), 3), dtype=np.uint8)
+            packed[:, 0] = pairs[:, 0] & 0xFF
+            packed[:, 1] = (pairs[:, 0] >> 8) | ((pairs[:, 1] & 0x0F) << 4)
+            packed[:, 2] = pairs[:, 1] >> 4
+            return packed.ravel()
+        return img.astype('<u2').view(np.uint8).ravel()
+
+    def produceFrames(self, now):
+        """ Deliver all frames due by [now] into free buffers. Frames for
+        which no buffer is free are lost and counted in [skipped].
+
+        Free-running frames are due every frame period. Triggered frames are
+        due once exposed, read out and transmitted, and are stamped with the
+        start of their exposure.
+        """
+        if self.triggerSelector() is not None:
+            latency = self.latency()
+            while self.pending and self.pending[0] + latency <= now:
+                start = self.pending.pop(0)
+                self.deliverFrame(self.ticks(start))
+            self.next_frame_time = self.pending[0] + latency if \
+                self.pending else float('inf')
+            return
+        while self.next_frame_time <= now:
+            timestamp = self.ticks(self.next_frame_time)
+            self.next_frame_time += self.framePeriod()
+            self.deliverFrame(timestamp)
+
+    def deliverFrame(self, timestamp):
+        """ Deliver a frame exposed at [timestamp] into a free buffer. """
+        self.block_id += 1
+        if self.grab_strategy == GrabStrategy_LatestImageOnly:
+            for result in self.ready:
+                self.free_buffers.append(result.buffer_index)
+                self.skipped += 1
+                self.unreported_skips += 1
+            self.ready = []
+        if not self.free_buffers:
+            self.skipped += 1
+            self.unreported_skips += 1
+            self.sequenceFrameDone()
+            return
+        buffer_index = self.free_buffers.pop(0)
+        self.delivered += 1
+        error_code = 0
+        n_packets = self.packetCount()
+        if self.GevSCPSPacketSize.value > self.mtu:
+            error_code = ERROR_INCOMPLETE_GRAB
+            self.lost_packets += n_packets
+        else:
+            loss = self.lossFraction()
+            n_lost = int(math.ceil(loss*n_packets))
+            if loss > self.GevSCBWRA.value/100.:
+                error_code = ERROR_INCOMPLETE_GRAB
+                self.lost_packets += n_lost
+            elif n_lost:
+                self.resend_requests += 1
+                self.resent_packets += n_lost
+        if self.frame_drop_rate and \
+        self.random.random() < self.frame_drop_rate:
+            error_code = ERROR_INCOMPLETE_GRAB
+        if error_code:
+            self.dropped += 1
+        else:
+            key = (self.Width.value, self.Height.value,
+                self.PixelFormat.value)
+            if key not in self.patterns:
+                self.patterns[key] = self.newPattern()
+            pattern = self.patterns[key]
+            np.copyto(self.buffers[buffer_index][:len(pattern)], pattern)
+        chunks = {}
+        for chunk in self.enabledChunks():
+            chunks['Chunk' + chunk] = {
+                'Timestamp': timestamp,
+                'Framecounter': self.block_id - 1,
+                'ExposureTime': self.ExposureTimeAbs.value,
+                'GainAll': self.GainRaw.value,
+                'SequenceSetIndex': self.sequence_set
+            }[chunk]
+        self.ready.append(GrabResult(self, buffer_index,
+            self.Width.value, self.Height.value, self.PixelFormat.value,
+            self.block_id, timestamp, error_code=error_code,
+            skipped=self.unreported_skips, chunks=chunks))
+        self.unreported_skips = 0
+        self.sequenceFrameDone()
+
+    def releaseBuffer(self, buffer_index):
+        with self.lock:
+            if buffer_index < len(self.buffers):
+                self.free_buffers.append(buffer_index)
+
+class InstantCameraArray(object):
+    """ A simulated pylon InstantCameraArray. """
+    def __init__(self, n):
+        self.cameras = [InstantCamera() for i in range(n)]
+        self.next = 0
+
+    def __getitem__(self, i):
+        return self.cameras[i]
+
+    def __len__(self):
+        return len(self.cameras)
+
+    def Close(self):
+        for camera in self.cameras:
+            camera.Close()
+
+    def IsGrabbing(self):
+        return any(camera.IsGrabbing() for camera in self.cameras)
+
+    def IsOpen(self):
+        return all(camera.IsOpen() for camera in self.cameras)
+
+    def Open(self):
+        for camera in self.cameras:
+            camera.Open()
+
+    def RetrieveResult(self, timeout_ms, timeout_handling=
+        TimeoutHandling_ThrowException):
+        """ Return the next result from any camera, taking cameras in turn.
+        """
+        deadline = time.monotonic() + timeout_ms/10**3
+        while True:
+            for i in range(len(self.cameras)):
+                camera = self.cameras[(self.next + i) % len(self.cameras)]
+                result = camera.RetrieveResult(0, TimeoutHandling_Return)
+                if result.IsValid():
+                    self.next = (self.next + i + 1) % len(self.cameras)
+                    return result
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wake = min(min(c.next_frame_time for c in self.cameras),
+                deadline)
+            time.sleep(max(wake - now, 0))
+        if timeout_handling == TimeoutHandling_ThrowException:
+            raise genicam.TimeoutException("Grab timed out after " +
+                str(timeout_ms) + " ms.")
+        return GrabResult()
+
+    def StartGrabbing(self, strategy=GrabStrategy_OneByOne):
+        for camera in self.cameras:
+            camera.StartGrabbing(strategy)
+
+    def StopGrabbing(self):
+        for camera in self.cameras:
+            camera.StopGrabbing()
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from basler import Basler
+from discovery import getDirectory
+from simulated import pylon
+
+# A small sensor keeps frames quick to produce and compare.
+#
+SERIAL_NUMBER = 21000001
+SENSOR_WIDTH = 256
+SENSOR_HEIGHT = 128
+
+def expectedFrame(w, h, pixel_format='Mono8'):
+    """ Return the frame the simulated camera sends for a [w] x [h] AOI,
+    unpacked: a diagonal gradient, see
+    simulated.pylon.InstantCamera.newPattern().
+    """
+    if pixel_format == 'Mono8':
+        max_value, dtype = 255, np.uint8
+    else:
+        max_value, dtype = 4095, np.uint16
+    y, x = np.mgrid[0:h, 0:w]
+    return ((x + y)*max_value//max(w + h - 2, 1)).astype(dtype)
+
+@pytest.fixture
+def newCamera():
+    """ Return a function that connects a Basler to a new simulated camera,
+    passing its keyword arguments on to TlFactory.AddDevice(). Each camera
+    gets the next serial number from SERIAL_NUMBER.
+    """
+    factory = pylon.TlFactory.GetInstance()
+    factory.RemoveDevices()
+    cameras = []
+    def connect(**options):
+        options.setdefault('sensor_width', SENSOR_WIDTH)
+        options.setdefault('sensor_height', SENSOR_HEIGHT)
+        serial_number = SERIAL_NUMBER + len(cameras)
+        factory.AddDevice(serial_number, **options)
+        getDirectory('simulated').invalidate()
+        camera = Basler()
+        camera.find(serial_number, backend='simulated')
+        camera.connect()
+        cameras.append(camera)
+        return camera
+    yield connect
+    for camera in cameras:
+        if camera.isExposing():
+            camera.endExpose()
+        camera.disconnect()
+    factory.RemoveDevices()
+
+@pytest.fixture
+def camera(newCamera):
+    """ A Basler connected to a fresh simulated camera. """
+    return newCamera()
@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+import pytest
+
+from acquisition import FrameQueue, QueueClosed
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+
+def testFrameQueueDropOldest():
+    queue = FrameQueue(2, 'DropOldest')
+    assert all(queue.put(i) for i in range(3))
+    assert queue.dropped == 1
+    assert queue.getAll() == [1, 2]
+
+def testFrameQueueDropNewest():
+    queue = FrameQueue(2, 'DropNewest')
+    assert [queue.put(i) for i in range(3)] == [True, True, False]
+    assert queue.dropped == 1
+    assert queue.getAll() == [0, 1]
+
+def testFrameQueueBlock():
+    queue = FrameQueue(1, 'Block')
+    queue.put(0)
+    done = threading.Event()
+    def produce():
+        queue.put(1)
+        done.set()
+    producer = threading.Thread(target=produce)
+    producer.start()
+    assert not done.wait(0.05)
+    assert queue.get() == 0
+    assert done.wait(1)
+    producer.join()
+    assert queue.dropped == 0
+    assert queue.get() == 1
+
+def testFrameQueueCloseWakesBlockedProducer():
+    queue = FrameQueue(1, 'Block')
+    queue.put(0)
+    errors = []
+    def produce():
+        try:
+            queue.put(1)
+        except QueueClosed as e:
+            errors.append(e)
+    producer = threading.Thread(target=produce)
+    producer.start()
+    queue.close()
+    producer.join(1)
+    assert len(errors) == 1
+    assert queue.get(timeout=0) == 0
+    assert queue.get(timeout=0) is None
+    with pytest.raises(QueueClosed):
+        queue.put(2)
+
+def testFrameQueueGetTimesOut():
+    assert FrameQueue(1).get(timeout=0.01) is None
+
+def testFrameQueueRejectsUnknownPolicy():
+    with pytest.raises(Exception):
+        FrameQueue(1, 'DropAll')
+
+def testAcquireInBackground(camera):
+    with camera.acquire(queue_size=4) as acquiring:
+        frames = [acquiring.getFrame(timeout=1) for i in range(3)]
+        assert camera.acquisition_thread.is_alive()
+    assert camera.acquisition_thread is None
+    assert not camera.isExposing()
+    for frame, meta in frames:
+        np.testing.assert_array_equal(frame, expectedFrame(SENSOR_WIDTH,
+            SENSOR_HEIGHT))
+    sequences = [int(meta['sequence']) for frame, meta in frames]
+    assert sequences == sorted(sequences)
+
+def testBeginExposeFailureStartsNoThread(camera, monkeypatch):
+    def fail(*args):
+        raise Exception("StartGrabbing failed.")
+    camera.connect()
+    monkeypatch.setattr(camera.camera, 'StartGrabbing', fail)
+    assert camera.beginExpose('OneByOne', background=True) is None
+    assert camera.acquisition_thread is None
+    assert camera.frame_queue is None
+    assert camera.beginExpose('OneByOne', event_driven=True) is None
+    assert camera.event_grabber is None
+    assert camera.camera.image_event_handlers == []
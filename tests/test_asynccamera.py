@@ -0,0 +1,68 @@
+import asyncio
+import contextlib
+
+import numpy as np
+
+from asynccamera import AsyncBasler
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+
+def testCallsRunOnTheExecutor(camera):
+    async def main():
+        async with AsyncBasler(camera) as cam:
+            await cam.setExposureTimeMicroseconds(2000)
+            await cam.set('GainRaw', 5)
+            return (await cam.getExposureTimeMicroseconds(),
+                await cam.get('GainRaw'))
+    assert asyncio.run(main()) == (2000, 5)
+
+def testFramesStopAfterNFrames(camera):
+    async def main():
+        cam = AsyncBasler(camera)
+        frames = [frame async for frame in cam.frames(n_frames=3)]
+        cam.close()
+        return frames
+    frames = asyncio.run(main())
+    assert len(frames) == 3
+    np.testing.assert_array_equal(frames[0], expectedFrame(SENSOR_WIDTH,
+        SENSOR_HEIGHT))
+    assert not camera.isExposing()
+
+def testBreakingInsideAclosingStopsGrabbing(camera):
+    async def main():
+        cam = AsyncBasler(camera)
+        async with contextlib.aclosing(cam.frames()) as frames:
+            async for frame in frames:
+                exposing = camera.isExposing()
+                break
+        cam.close()
+        return exposing
+    assert asyncio.run(main())
+    assert not camera.isExposing()
+
+def testCancellingStopsGrabbing(camera):
+    camera.configureTrigger('Software')
+    async def main():
+        cam = AsyncBasler(camera)
+        async def iterate():
+            async for frame in cam.frames(poll_ms=10):
+                pass
+        task = asyncio.ensure_future(iterate())
+        while not camera.isExposing():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        cam.close()
+    asyncio.run(main())
+    assert not camera.isExposing()
+
+def testFramesEndAfterEmptyPolls(camera):
+    camera.configureTrigger('Software')
+    async def main():
+        cam = AsyncBasler(camera)
+        frames = [frame async for frame in cam.frames(poll_ms=10,
+            max_grab_attempts=2)]
+        cam.close()
+        return frames
+    assert asyncio.run(main()) == []
+    assert not camera.isExposing()
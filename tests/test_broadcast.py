@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from acquisition import QueueClosed
+from broadcast import FramePublisher, FrameSubscriber, SlowConsumerWarning
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+
+def testSubscriberReadsPublishedFrames(camera):
+    camera.beginExpose('OneByOne')
+    publisher = camera.broadcast(capacity=4)
+    subscriber = FrameSubscriber(publisher.name)
+    try:
+        for i in range(3):
+            sequence, frame, meta = subscriber.next(timeout=5)
+            assert sequence == meta['sequence'] == i
+            np.testing.assert_array_equal(frame, expectedFrame(SENSOR_WIDTH,
+                SENSOR_HEIGHT))
+    finally:
+        publisher.close()
+    list(subscriber)
+    with pytest.raises(QueueClosed):
+        subscriber.next()
+    subscriber.close()
+    subscriber.close()
+    publisher.close()
+
+@pytest.mark.filterwarnings('ignore::broadcast.SlowConsumerWarning')
+def testTimeoutKeepsTheFrameInTheSlot(camera):
+    camera.configureTrigger('Software')
+    camera.beginExpose('OneByOne')
+    publisher = FramePublisher(camera, capacity=1)
+    subscriber = FrameSubscriber(publisher.name)
+    try:
+        camera.trigger()
+        assert publisher.publish() == 0
+        assert publisher.publish(read_timeout_ms=10,
+            max_grab_attempts=1) is None
+        assert subscriber.isCurrent(0)
+        sequence, frame, meta = subscriber.next(timeout=0)
+        assert sequence == 0
+        assert subscriber.missed == 0
+    finally:
+        subscriber.close()
+        publisher.close()
+
+def testSlowConsumerMissesFrames(camera):
+    camera.beginExpose('OneByOne')
+    publisher = FramePublisher(camera, capacity=4)
+    subscriber = FrameSubscriber(publisher.name)
+    try:
+        for i in range(3):
+            publisher.publish()
+        with pytest.warns(SlowConsumerWarning):
+            publisher.publish()
+        assert publisher.slow_consumers == {os.getpid()}
+        publisher.publish()
+        assert not subscriber.isCurrent(0)
+        assert [subscriber.next(timeout=0)[0] for i in range(4)] == \
+            [1, 2, 3, 4]
+        assert subscriber.missed == 1
+        publisher.publish()
+        assert publisher.slow_consumers == set()
+    finally:
+        subscriber.close()
+        publisher.close()
+
+def testRingOutlivesSubscriberProcess(camera):
+    camera.beginExpose('OneByOne')
+    publisher = FramePublisher(camera, capacity=2)
+    try:
+        publisher.publish()
+        code = ("import broadcast\n"
+            "subscriber = broadcast.FrameSubscriber(" + repr(publisher.name) +
+            ")\n"
+            "print(subscriber.capacity)\n"
+            "subscriber.close()\n")
+        result = subprocess.run([sys.executable, '-c', code],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, timeout=60)
+        assert result.stdout == '2\n', result.stderr
+        assert 'leaked' not in result.stderr
+        subscriber = FrameSubscriber(publisher.name)
+        subscriber.close()
+        assert all(publisher.subscribers['pid'] == 0)
+    finally:
+        publisher.close()
+
+def testSubscriberRejectsOtherLayouts(camera):
+    publisher = FramePublisher(camera, capacity=2)
+    try:
+        publisher.header['magic'] = b'DIRING0'
+        with pytest.raises(Exception, match='version 0'):
+            FrameSubscriber(publisher.name)
+    finally:
+        publisher.close()
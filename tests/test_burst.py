@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from burst import Burst
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+
+def loseFrame(camera, block_id):
+    """ Have the simulated camera lose frame [block_id] on the way to the
+    host, as if no buffer were free for it.
+    """
+    sim = camera.camera
+    deliver = sim.deliverFrame
+    def deliverFrame(timestamp):
+        if sim.block_id + 1 == block_id:
+            sim.block_id += 1
+            sim.skipped += 1
+            return
+        deliver(timestamp)
+    sim.deliverFrame = deliverFrame
+
+def testSoftwareTriggeredBurst(camera):
+    camera.setExposureTimeMicroseconds(1000)
+    camera.configureTrigger('Software')
+    assert camera.getTriggerSelector() == 'FrameStart'
+    data, meta = camera.burst(6, max_in_flight=2)
+    assert data.shape == (6, SENSOR_HEIGHT, SENSOR_WIDTH)
+    for frame in data:
+        np.testing.assert_array_equal(frame, expectedFrame(SENSOR_WIDTH,
+            SENSOR_HEIGHT))
+    assert list(meta['trigger_index']) == list(range(6))
+    assert np.all(np.isfinite(meta['trigger_time']))
+    assert np.all(np.diff(meta['trigger_timestamp'].astype(np.int64)) > 0)
+    assert not camera.isExposing()
+    assert camera.camera.overtriggered == 0
+
+def testAcquisitionStartBurst(camera):
+    camera.setExposureTimeMicroseconds(1000)
+    camera.configureTrigger('Software', burst_frames=3)
+    assert camera.getTriggerSelector() == 'AcquisitionStart'
+    assert camera.getAcquisitionFrameCount() == 3
+    data, meta = camera.burst(6)
+    assert list(meta['trigger_index']) == [0, 0, 0, 1, 1, 1]
+    timestamps = meta['trigger_timestamp']
+    assert timestamps[0] == timestamps[2] != timestamps[3] == timestamps[5]
+
+def testBurstTagsTriggersAfterALostFrame(camera):
+    camera.setExposureTimeMicroseconds(1000)
+    camera.configureTrigger('Software', burst_frames=2)
+    loseFrame(camera, 3)
+    burst = Burst(camera)
+    data, meta = burst.run(6, read_timeout_ms=50)
+    assert len(data) == 5
+    assert burst.n_lost == 1
+    assert list(meta['frame_id']) == [1, 2, 4, 5, 6]
+    assert list(meta['trigger_index']) == [0, 0, 1, 2, 2]
+    assert meta['trigger_timestamp'][2] == 0
+
+def testBurstNeedsFrameCount(camera, monkeypatch):
+    camera.configureTrigger('Software', burst_frames=2)
+    monkeypatch.setattr(camera, 'getAcquisitionFrameCount', lambda: None)
+    with pytest.raises(Exception):
+        camera.burst(2)
+
+def testBurstNeedsATrigger(camera):
+    with pytest.raises(Exception):
+        camera.burst(2)
+
+def testTriggerFreeRunsAgain(camera):
+    camera.configureTrigger('Software')
+    camera.beginExpose('OneByOne')
+    assert camera.read(1, read_timeout_ms=20, max_grab_attempts=1) == []
+    assert camera.trigger() is not None
+    assert len(camera.read(1)) == 1
+    camera.endExpose()
+    camera.configureTrigger(None)
+    assert camera.getTriggerSelector() is None
+    camera.beginExpose('OneByOne')
+    assert len(camera.read(2)) == 2
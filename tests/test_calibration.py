@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from calibration import Accumulator, Calibrator, ClippedAccumulator
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+
+def testAccumulatorMatchesNumpy():
+    frames = np.random.default_rng(0).normal(100., 5., (10, 4, 6))
+    accumulator = Accumulator((4, 6))
+    for frame in frames:
+        accumulator.add(frame)
+    mean, variance, n = accumulator.finish()
+    assert n == 10
+    np.testing.assert_allclose(mean, frames.mean(axis=0))
+    np.testing.assert_allclose(variance, frames.var(axis=0, ddof=1))
+
+def testClippedAccumulatorRejectsOutliers():
+    frames = np.random.default_rng(0).normal(100., 1., (8, 4, 6))
+    frames[3, 2, 1] = 10000.
+    accumulator = ClippedAccumulator((4, 6), window=5)
+    for frame in frames:
+        accumulator.add(frame)
+    mean, variance, n = accumulator.finish()
+    assert n == 8
+    assert accumulator.clipped >= 1
+    assert abs(mean[2, 1] - 100.) < 5.
+
+def testDarkIsKeyedOnExposure(camera):
+    camera.setExposureTimeMicroseconds(1000)
+    camera.beginExpose('OneByOne')
+    calibrator = Calibrator(camera)
+    dark = calibrator.build('dark', 4, window=3)
+    assert dark.n == 4
+    np.testing.assert_array_equal(dark.mean, expectedFrame(SENSOR_WIDTH,
+        SENSOR_HEIGHT))
+    assert not dark.variance.any()
+    assert calibrator.lookup('dark') is dark
+    camera.endExpose()
+    camera.setExposureTimeMicroseconds(2000)
+    assert calibrator.lookup('dark') is None
+    assert calibrator.select() == (None, None)
+
+def testCorrectSubtractsTheDark(camera):
+    camera.beginExpose('OneByOne')
+    calibrator = Calibrator(camera)
+    calibrator.build('dark', 2)
+    offset, flat = calibrator.select()
+    assert offset is not None and flat is None
+    frame = camera.read(1)[0]
+    assert not calibrator.correct(frame).any()
+    out = np.empty_like(frame)
+    assert calibrator.correct(frame, out=out) is out
+    assert not out.any()
+    frame = frame.astype(np.float32)
+    assert calibrator.correct(frame) is frame
+    assert not frame.any()
+
+def testCorrectDividesByTheFlat(camera):
+    camera.beginExpose('OneByOne')
+    calibrator = Calibrator(camera)
+    flat = calibrator.build('flat', 2)
+    assert flat.mean.mean() == pytest.approx(1.)
+    calibrator.select()
+    gradient = expectedFrame(SENSOR_WIDTH, SENSOR_HEIGHT)
+    corrected = calibrator.correct(gradient.astype(np.float32))
+    expected = np.where(gradient > 0, gradient.mean(), 0)
+    np.testing.assert_allclose(corrected, expected, rtol=1e-5)
+    calibrator.build('dark', 2)
+    with pytest.raises(Exception):
+        calibrator.build('flat', 2)
+
+def testCacheEvictsTheLeastRecentlyUsed(camera):
+    camera.beginExpose('OneByOne')
+    calibrator = Calibrator(camera, capacity=2)
+    bias = calibrator.build('bias', 1)
+    calibrator.build('dark', 1)
+    assert calibrator.lookup('bias') is bias
+    camera.setBlackLevel(8)
+    calibrator.build('bias', 1)
+    camera.setBlackLevel(0)
+    assert calibrator.lookup('dark') is None
+    assert calibrator.lookup('bias') is bias
+    with pytest.raises(Exception):
+        calibrator.build('sky', 1)
@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+import pytest
+
+from clock import ClockModel
+from simulated.pylon import TICK_FREQUENCY_HZ
+
+def testModelFitsDrift():
+    model = ClockModel(tick_frequency_hz=10**6)
+    assert not model.isSynchronised()
+    assert np.isnan(model.toHost(0))
+    assert model.toTicks(0.) is None
+    for i in range(11):
+        model.addSample(int(i*10**6*(1 + 100e-6)), 1000. + i, 10**-5)
+    assert model.drift_ppm == pytest.approx(100., abs=0.01)
+    assert model.toHost(5*10**6*(1 + 100e-6)) == pytest.approx(1005.)
+    assert model.toTicks(1005.) == pytest.approx(5*10**6*(1 + 100e-6),
+        abs=1)
+    np.testing.assert_allclose(model.toHost(np.array([0, 10**6])),
+        [1000., 1000. + 1/(1 + 100e-6)])
+
+def testModelUsesNominalFrequencyOverShortSpans():
+    model = ClockModel(tick_frequency_hz=10**6)
+    model.addSample(0, 1000., 10**-5)
+    model.addSample(2*10**5, 1000.2001, 10**-5)
+    assert model.isSynchronised()
+    assert model.drift_ppm == 0.
+    assert model.toHost(10**5) == pytest.approx(1000.10005)
+
+def testModelForgetsSamplesWhenTheClockResets():
+    model = ClockModel(tick_frequency_hz=10**6)
+    model.addSample(10**7, 1000., 10**-5)
+    model.addSample(10**5, 1005., 10**-5)
+    assert len(model) == 1
+    assert model.toHost(10**5) == pytest.approx(1005.)
+
+def testLatchTimestamp(camera):
+    ticks, host_time, uncertainty_s = camera.latchTimestamp()
+    assert ticks > 0
+    assert abs(host_time - time.time()) < 1.
+    assert 0 <= uncertainty_s < 0.1
+
+def testFrameTimesMapToHostTime(newCamera):
+    camera = newCamera(clock_drift_ppm=50.)
+    assert camera.enableChunks()
+    assert set(camera.getEnabledChunks()) == {'Framecounter', 'Timestamp',
+        'ExposureTime', 'GainAll'}
+    camera.setExposureTimeMicroseconds(1500)
+    clock = camera.syncClock()
+    assert clock.tick_frequency_hz == TICK_FREQUENCY_HZ
+    assert len(clock) == 8
+    camera.beginExpose('OneByOne')
+    frames, meta = camera.read(3, return_meta=True)
+    assert len(frames) == 3
+    assert np.all(np.abs(meta['camera_time'] - meta['host_time']) < 0.05)
+    assert np.all(meta['exposure_us'] == 1500)
+    assert list(np.diff(meta['frame_counter'].astype(np.int64))) == [1, 1]
+    camera.endExpose()
+    assert camera.enableChunks(enable=False)
+    assert camera.getEnabledChunks() == []
+
+def testClockSyncRunsUntilDisconnect(camera):
+    sync = camera.startClockSync(period_s=0.01)
+    deadline = time.monotonic() + 5
+    while len(camera.clock) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert camera.clock.isSynchronised()
+    camera.disconnect()
+    assert camera.clock_sync is None
+    assert not sync.is_alive()
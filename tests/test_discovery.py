@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from basler import Basler
+from conftest import SERIAL_NUMBER
+from discovery import DeviceDirectory
+from simulated import pylon
+
+@pytest.fixture
+def factory():
+    factory = pylon.TlFactory.GetInstance()
+    factory.RemoveDevices()
+    yield factory
+    factory.enumerate_latency_s = 0.
+    factory.RemoveDevices()
+
+class RecordingBasler(Basler):
+    """ A Basler that records every instance made, so that tests can check
+    the cameras that open() doesn't return.
+    """
+    instances = []
+
+    def __init__(self):
+        super(RecordingBasler, self).__init__()
+        RecordingBasler.instances.append(self)
+
+def testLookupBySerialUserIdAndIp(factory):
+    factory.AddDevice(SERIAL_NUMBER, user_defined_name='left',
+        ip_address='10.0.0.1')
+    factory.AddDevice(SERIAL_NUMBER + 1, user_defined_name='right',
+        ip_address='10.0.0.2')
+    directory = DeviceDirectory('simulated')
+    assert directory.lookup(SERIAL_NUMBER + 1).GetUserDefinedName() == \
+        'right'
+    assert directory.lookup(str(SERIAL_NUMBER)).GetIpAddress() == '10.0.0.1'
+    assert directory.lookup('right').GetIpAddress() == '10.0.0.2'
+    assert directory.lookup('10.0.0.1').GetUserDefinedName() == 'left'
+    assert directory.lookup(None).GetUserDefinedName() == 'left'
+    assert directory.lookup('middle') is None
+    with pytest.raises(Exception):
+        directory.create('middle')
+
+def testEnumerationIsCachedUntilAMiss(factory):
+    factory.AddDevice(SERIAL_NUMBER)
+    directory = DeviceDirectory('simulated')
+    assert len(directory.enumerate()) == 1
+    factory.enumerate_latency_s = 0.2
+    start = time.monotonic()
+    assert directory.lookup(SERIAL_NUMBER) is not None
+    assert time.monotonic() - start < 0.1
+    factory.enumerate_latency_s = 0.
+    factory.AddDevice(SERIAL_NUMBER + 1)
+    assert len(directory.enumerate()) == 1
+    assert directory.lookup(SERIAL_NUMBER + 1) is not None
+    assert len(directory.enumerate()) == 2
+
+def testOpenConfiguresCamerasConcurrently(factory):
+    for i in range(3):
+        factory.AddDevice(SERIAL_NUMBER + i, open_latency_s=0.2)
+    directory = DeviceDirectory('simulated')
+    keys = [SERIAL_NUMBER + i for i in range(3)]
+    start = time.monotonic()
+    cameras, errors = directory.open(keys, config={'EXPTIME': 1000},
+        configs={keys[2]: {'EXPTIME': 3000}})
+    try:
+        assert time.monotonic() - start < 0.5
+        assert errors == {}
+        assert [cameras[key].getExposureTimeMicroseconds() for key in
+            keys] == [1000, 1000, 3000]
+    finally:
+        for camera in cameras.values():
+            camera.disconnect()
+
+def testOpenClosesCamerasThatFail(factory):
+    factory.AddDevice(SERIAL_NUMBER)
+    factory.AddDevice(SERIAL_NUMBER + 1, open_latency_s=0.5)
+    directory = DeviceDirectory('simulated')
+    RecordingBasler.instances = []
+    cameras, errors = directory.open([SERIAL_NUMBER, SERIAL_NUMBER + 1,
+        SERIAL_NUMBER + 2], config={'EXPTIME': 'long'},
+        camera_class=RecordingBasler, timeout_s=0.2)
+    assert cameras == {}
+    assert isinstance(errors[SERIAL_NUMBER], ValueError)
+    assert 'Timed out' in str(errors[SERIAL_NUMBER + 1])
+    assert 'Failed to find' in str(errors[SERIAL_NUMBER + 2])
+    time.sleep(0.6)
+    assert len(RecordingBasler.instances) == 2
+    for camera in RecordingBasler.instances:
+        assert not camera.camera.IsOpen()
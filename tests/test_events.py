@@ -0,0 +1,92 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+
+class Collector(object):
+    """ A frame callback that keeps what it is given, and sets [done] once
+    it has [n_frames] frames.
+    """
+    def __init__(self, n_frames):
+        self.n_frames = n_frames
+        self.frames = []
+        self.done = threading.Event()
+
+    def __call__(self, frame, meta):
+        self.frames.append((frame, meta.copy()))
+        if len(self.frames) >= self.n_frames:
+            self.done.set()
+
+def testCallbacksGetFramesInOrder(camera):
+    collector = Collector(5)
+    order = []
+    assert camera.beginExpose('OneByOne', on_frame=[collector,
+        lambda frame, meta: order.append(int(meta['sequence']))])
+    assert camera.event_grabber is not None
+    assert collector.done.wait(5)
+    camera.endExpose()
+    assert camera.event_grabber is None
+    assert camera.camera.image_event_handlers == []
+    n_frames = len(collector.frames)
+    time.sleep(0.05)
+    assert len(collector.frames) == n_frames
+    sequences = [int(meta['sequence']) for frame, meta in collector.frames]
+    assert sequences == order == list(range(n_frames))
+    for frame, meta in collector.frames:
+        np.testing.assert_array_equal(frame, expectedFrame(SENSOR_WIDTH,
+            SENSOR_HEIGHT))
+
+def testZeroCopyHandlesCloseWhenCallbacksReturn(camera):
+    collector = Collector(3)
+    copies = []
+    camera.beginExpose('OneByOne', on_frame=[collector,
+        lambda frame, meta: copies.append(frame.copy())], zero_copy=True)
+    assert collector.done.wait(5)
+    camera.endExpose()
+    assert all(frame.closed for frame, meta in collector.frames)
+    assert camera.handle_tracker.outstanding == 0
+    for frame in copies:
+        np.testing.assert_array_equal(frame, expectedFrame(SENSOR_WIDTH,
+            SENSOR_HEIGHT))
+    with pytest.raises(Exception):
+        camera.beginExpose(on_frame=collector, background=True,
+            zero_copy=True)
+
+def testEventDrivenQueue(camera):
+    assert camera.beginExpose('OneByOne', background=True,
+        event_driven=True)
+    frames = [camera.getFrame(timeout=5) for i in range(3)]
+    camera.endExpose()
+    assert [int(meta['sequence']) for frame, meta in frames] == [0, 1, 2]
+    assert camera.frame_queue.get(timeout=0) is None
+
+def testCallbackErrorsDontStopGrabbing(camera):
+    collector = Collector(3)
+    def fail(frame, meta):
+        raise ValueError("bad frame")
+    camera.beginExpose('OneByOne', on_frame=[fail, collector])
+    grabber = camera.event_grabber
+    deadline = time.monotonic() + 5
+    while grabber.errors < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    camera.endExpose()
+    assert grabber.errors >= 3
+    assert isinstance(grabber.last_error, ValueError)
+    assert collector.frames == []
+    assert grabber.dispatch_s.count == grabber.callback_s.count >= 3
+
+@pytest.mark.filterwarnings('ignore::events.CallbackOverrunWarning')
+def testSlowCallbacksAreCountedAsOverruns(camera):
+    period_s = 1/camera.getFrameRate()
+    collector = Collector(2)
+    def slow(frame, meta):
+        time.sleep(2*period_s)
+    camera.beginExpose('OneByOne', on_frame=[slow, collector])
+    grabber = camera.event_grabber
+    assert collector.done.wait(5)
+    camera.endExpose()
+    assert grabber.hold_budget_s == pytest.approx(period_s)
+    assert grabber.overruns >= 2
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from basler import Basler
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+from hostops import HostTransform, binFrames, cropFrames, flipFrames
+
+def testBinFramesSumsAndSaturates():
+    frames = np.full((2, 5, 7), 100, dtype=np.uint8)
+    binned = binFrames(frames, 2, 2)
+    assert binned.shape == (2, 2, 3)
+    assert binned.dtype == np.uint8
+    assert np.all(binned == 255)
+    frames = np.arange(16, dtype=np.uint16).reshape(4, 4)
+    np.testing.assert_array_equal(binFrames(frames, 2, 1),
+        frames[:, ::2] + frames[:, 1::2])
+
+def testBinFramesAverages():
+    frames = np.arange(16, dtype=np.uint16).reshape(4, 4)
+    out = np.zeros((2, 2), dtype=np.uint16)
+    assert binFrames(frames, 2, 2, mode='Averaging', out=out) is out
+    np.testing.assert_array_equal(out, [[2, 4], [10, 12]])
+    with pytest.raises(Exception):
+        binFrames(frames, 2, 2, mode='Median')
+
+def testCropAndFlipReturnViews():
+    frames = np.arange(24).reshape(4, 6)
+    crop = cropFrames(frames, 2, 3, 1, 1)
+    np.testing.assert_array_equal(crop, frames[1:4, 1:3])
+    assert np.shares_memory(crop, frames)
+    with pytest.raises(Exception):
+        cropFrames(frames, 4, 4, 4, 0)
+    flipped = flipFrames(frames, flip_x=True, flip_y=True)
+    np.testing.assert_array_equal(flipped, frames[::-1, ::-1])
+    assert np.shares_memory(flipped, frames)
+
+def testHostTransformOrder():
+    transform = HostTransform()
+    assert transform.isIdentity()
+    transform.binning_h = transform.binning_v = 2
+    transform.aoi = (2, 1, 1, 0)
+    transform.flip_x = True
+    frames = np.arange(64, dtype=np.uint16).reshape(8, 8)
+    binned = binFrames(frames, 2, 2)
+    np.testing.assert_array_equal(transform.apply(frames),
+        binned[0:1, 1:3][:, ::-1])
+    assert transform.outputShape(8, 8) == (1, 2)
+    assert transform.binnedShape(8, 8) == (4, 4)
+
+def testFallbackNeedsACamera():
+    camera = Basler()
+    with pytest.raises(Exception):
+        camera.setAOI(16, 16, 0, 0)
+    with pytest.raises(Exception):
+        camera.setImageFlipX(True)
+    assert camera.getHostTransform().isIdentity()
+
+def testImplementedNodesAreSetOnTheCamera(camera):
+    assert camera.hasNode('ReverseX')
+    assert not camera.hasNode('NoSuchNode')
+    camera.setImageFlipX(True)
+    assert camera.getImageFlipX()
+    assert camera.getHostTransform().isIdentity()
+
+def testFlipFallsBackToTheHost(camera):
+    del camera.camera.nodes['ReverseX']
+    assert not camera.hasNode('ReverseX')
+    assert camera.setImageFlipX(True)
+    assert camera.getHostTransform().flip_x
+    camera.beginExpose('OneByOne')
+    frame = camera.read(1)[0]
+    np.testing.assert_array_equal(frame, expectedFrame(SENSOR_WIDTH,
+        SENSOR_HEIGHT)[:, ::-1])
+
+def testFrameStoreHoldsTransformedFrames(camera):
+    transform = camera.getHostTransform()
+    transform.binning_h = transform.binning_v = 2
+    transform.aoi = (32, 16, 8, 4)
+    store = camera.setFrameStore(2)
+    assert store.data.shape == (2, 16, 32)
+    camera.beginExpose('OneByOne')
+    frames = camera.read(3)
+    expected = transform.apply(expectedFrame(SENSOR_WIDTH, SENSOR_HEIGHT))
+    for frame in frames[1:]:
+        np.testing.assert_array_equal(frame, expected)
+    assert np.shares_memory(frames[-1], store.data)
+    assert list(store.meta['width'][store.latest(2)]) == [SENSOR_WIDTH]*2
@@ -0,0 +1,66 @@
+import json
+import urllib.request
+
+from metrics import Histogram, MetricsServer, formatPrometheus
+from simulated.pylon import ERROR_INCOMPLETE_GRAB
+
+def testHistogramQuantiles():
+    histogram = Histogram(buckets=(1., 2., 4.))
+    assert histogram.quantile(0.5) is None
+    for value in (0.5, 1.5, 1.5, 3., 10.):
+        histogram.observe(value)
+    assert histogram.count == 5
+    assert histogram.max == 10.
+    assert histogram.quantile(0.5) == 2.
+    assert histogram.quantile(1.) == 10.
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == [(1., 1), (2., 2), (4., 1), ('+Inf', 1)]
+
+def testStatsCountFramesAndTimeouts(camera):
+    camera.beginExpose('OneByOne')
+    camera.read(3)
+    camera.endExpose()
+    camera.configureTrigger('Software')
+    camera.beginExpose('OneByOne')
+    camera.read(1, read_timeout_ms=10, max_grab_attempts=2)
+    stats = camera.stats(reset=True)
+    assert stats['frames'] == 3
+    assert stats['timeouts'] == 2
+    assert stats['copy_s']['count'] == 3
+    assert stats['retrieve_wait_s']['count'] == 5
+    assert stats['handles_outstanding'] == 0
+    json.dumps(stats)
+    assert camera.stats()['frames'] == 0
+
+def testStatsCountFailedGrabs(newCamera):
+    camera = newCamera(frame_drop_rate=1.)
+    camera.beginExpose('OneByOne')
+    assert camera.read(1, max_grab_attempts=3) == []
+    stats = camera.stats()
+    assert stats['failed'] == 3
+    assert stats['failed_by_code'] == {hex(ERROR_INCOMPLETE_GRAB): 3}
+
+def testFormatPrometheus(camera):
+    camera.beginExpose('OneByOne')
+    camera.read(2)
+    text = formatPrometheus(camera.stats(), labels={'camera': 'a'})
+    assert 'camera_frames{camera="a"} 2\n' in text
+    assert 'camera_copy_s_count{camera="a"} 2\n' in text
+    assert 'camera_copy_s_bucket{camera="a",le="+Inf"} 2\n' in text
+
+def testMetricsServerServesLocally(camera):
+    camera.beginExpose('OneByOne')
+    camera.read(1)
+    server = MetricsServer({'a': camera}, port=0)
+    assert server.host == '127.0.0.1'
+    server.start()
+    try:
+        host, port = server.server.server_address
+        assert host == '127.0.0.1'
+        url = 'http://127.0.0.1:' + str(port)
+        with urllib.request.urlopen(url + '/stats') as response:
+            assert json.loads(response.read())['a']['frames'] == 1
+        with urllib.request.urlopen(url + '/metrics') as response:
+            assert b'camera_frames{camera="a"} 1' in response.read()
+    finally:
+        server.stop()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+from framestore import newMetadata
+from packed import PACKED_FORMATS, isPacked, newScratch, packedSize, unpack
+
+def pack(pixels, pixel_format):
+    """ Pack [pixels] bit by bit from the layout in PACKED_FORMATS. """
+    bytes_per_group, layout = PACKED_FORMATS[pixel_format]
+    groups = pixels.reshape(-1, len(layout)).astype(np.uint16)
+    raw = np.zeros((len(groups), bytes_per_group), dtype=np.uint16)
+    for k, terms in enumerate(layout):
+        for byte, rshift, mask, lshift in terms:
+            raw[:, byte] |= ((groups[:, k] >> lshift) & mask) << rshift
+    return raw.astype(np.uint8).ravel()
+
+@pytest.mark.parametrize('pixel_format', sorted(PACKED_FORMATS))
+def testUnpackInvertsPack(pixel_format):
+    bits = 12 if pixel_format.startswith('Mono12') else 10
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 2**bits, size=(6, 8), dtype=np.uint16)
+    raw = pack(pixels, pixel_format)
+    assert len(raw) == packedSize(pixel_format, pixels.size)
+    out = np.zeros_like(pixels)
+    unpack(raw, pixel_format, out, scratch=newScratch(pixel_format,
+        pixels.size))
+    np.testing.assert_array_equal(out, pixels)
+
+def testMono12pLayout():
+    out = np.zeros(2, dtype=np.uint16)
+    unpack(np.array([0x21, 0x43, 0x65], dtype=np.uint8), 'Mono12p', out)
+    assert list(out) == [0x321, 0x654]
+    unpack(np.array([0x65, 0x01, 0x43], dtype=np.uint8), 'Mono12Packed', out)
+    assert list(out) == [0x651, 0x430]
+
+def testUnpackRejectsShortBuffers():
+    assert isPacked('Mono12p') and not isPacked('Mono12')
+    with pytest.raises(Exception):
+        packedSize('Mono12p', 3)
+    with pytest.raises(Exception):
+        unpack(np.zeros(2, dtype=np.uint8), 'Mono12p', np.zeros(2,
+            dtype=np.uint16))
+
+def testReadUnpacksFrames(camera):
+    camera.setPixelFormat('Mono12p')
+    expected = expectedFrame(SENSOR_WIDTH, SENSOR_HEIGHT, 'Mono12p')
+    camera.beginExpose('OneByOne')
+    frame = camera.read(1)[0]
+    assert frame.dtype == np.uint16
+    np.testing.assert_array_equal(frame, expected)
+    buffer = np.zeros((2, SENSOR_HEIGHT, SENSOR_WIDTH), dtype=np.uint16)
+    assert camera.readInto(buffer, newMetadata(2)) == 2
+    np.testing.assert_array_equal(buffer[1], expected)
+    with pytest.raises(Exception):
+        camera.read(1, zero_copy=True)
+
+def testFrameStoreUnpacksFrames(camera):
+    camera.setPixelFormat('Mono12p')
+    store = camera.setFrameStore(2)
+    assert store.data.dtype == np.uint16
+    camera.beginExpose('OneByOne')
+    frames = camera.read(3)
+    np.testing.assert_array_equal(frames[-1], expectedFrame(SENSOR_WIDTH,
+        SENSOR_HEIGHT, 'Mono12p'))
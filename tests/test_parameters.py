@@ -0,0 +1,40 @@
+def changedNodes(report):
+    return dict((node, (old, new)) for node, old, new in report['changed'])
+
+def testSendParametersWritesOnlyDifferences(camera):
+    config = {
+        'EXPTIME': 5000,
+        'GAIN': 10,
+        'IMAGE_WIDTH': 128,
+        'IMAGE_HEIGHT': 64,
+        'IMAGE_X_OFFSET': 32,
+        'IMAGE_Y_OFFSET': 16
+    }
+    report = camera.sendParameters(config)
+    changed = changedNodes(report)
+    assert changed['ExposureTimeAbs'] == (10000., 5000)
+    assert changed['GainRaw'] == (0, 10)
+    assert set(['Width', 'Height', 'OffsetX', 'OffsetY']) <= set(changed)
+    assert report['failed'] == []
+    assert camera.getAOI() == (128, 64, 32, 16)
+
+    writes = camera.camera.register_writes
+    report = camera.sendParameters(config)
+    assert report['changed'] == []
+    assert set(['ExposureTimeAbs', 'GainRaw']) <= set(report['unchanged'])
+    assert report['failed'] == []
+    assert camera.camera.register_writes == writes
+
+def testSendParametersReportsFailures(camera):
+    report = camera.sendParameters({'EXPTIME': 2000, 'GAIN': 10**6})
+    assert 'ExposureTimeAbs' in changedNodes(report)
+    assert [node for node, value, error in report['failed']] == ['GainRaw']
+    assert camera.getGain() == 0
+
+def testSendParametersOrdersAOIWrites(camera):
+    camera.sendParameters({'IMAGE_WIDTH': 64, 'IMAGE_X_OFFSET': 192})
+    report = camera.sendParameters({'IMAGE_WIDTH': 256, 'IMAGE_X_OFFSET': 0})
+    assert report['failed'] == []
+    assert [node for node, old, new in report['changed']] == ['OffsetX',
+        'Width']
+    assert camera.getAOI()[0] == 256
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+from pipeline import FramePipeline
+
+# Applied in the worker processes, so defined at module level.
+#
+def frameSum(frame):
+    return int(frame.sum(dtype=np.int64))
+
+def frameMax(frame):
+    return int(frame.max())
+
+def fail(frame):
+    raise ValueError("bad frame")
+
+def testRunReturnsResultsInOrder(camera):
+    camera.beginExpose('OneByOne')
+    pipeline = FramePipeline(camera, n_workers=2, max_in_flight=3)
+    pipeline.register(frameSum)
+    pipeline.register(frameMax, name='max')
+    with pipeline:
+        results = list(pipeline.run(6))
+    expected = expectedFrame(SENSOR_WIDTH, SENSOR_HEIGHT)
+    assert [sequence for sequence, meta, r in results] == list(range(6))
+    assert [meta['sequence'] for sequence, meta, r in results] == \
+        list(range(6))
+    assert [meta['frame_id'] for sequence, meta, r in results] == \
+        list(range(1, 7))
+    for sequence, meta, r in results:
+        assert r == {'frameSum': frameSum(expected), 'max': 255}
+    assert pipeline.shm is None
+
+def testSubmitGivenFrames(camera):
+    pipeline = FramePipeline(camera, n_workers=1, max_in_flight=2)
+    pipeline.register(frameSum)
+    with pipeline:
+        for value in (1, 2, 3):
+            frame = np.full((SENSOR_HEIGHT, SENSOR_WIDTH), value, np.uint8)
+            assert pipeline.submit(frame) == value - 1
+        assert [pipeline.get(timeout=10)[2] for i in range(3)] == [
+            {'frameSum': value*SENSOR_HEIGHT*SENSOR_WIDTH}
+            for value in (1, 2, 3)]
+        assert pipeline.pending() == 0
+        assert pipeline.get() is None
+
+def testFunctionErrorsRaiseInGet(camera):
+    pipeline = FramePipeline(camera, n_workers=1, max_in_flight=2)
+    pipeline.register(fail)
+    with pipeline:
+        pipeline.submit(np.zeros((SENSOR_HEIGHT, SENSOR_WIDTH), np.uint8))
+        with pytest.raises(ValueError):
+            pipeline.get(timeout=10)
+        with pytest.raises(Exception):
+            pipeline.register(frameSum)
+
+def testRunStopsAfterFailedGrabs(camera):
+    camera.configureTrigger('Software')
+    camera.beginExpose('OneByOne')
+    pipeline = FramePipeline(camera, n_workers=1)
+    pipeline.register(frameSum)
+    with pipeline:
+        assert list(pipeline.run(3, read_timeout_ms=10)) == []
+        assert len(pipeline.free_slots) == pipeline.max_in_flight
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from conftest import SENSOR_HEIGHT, SENSOR_WIDTH, expectedFrame
+from framestore import newMetadata
+
+def testReadReturnsFrames(camera):
+    camera.beginExpose('OneByOne')
+    frames, meta = camera.read(3, return_meta=True)
+    assert len(frames) == 3
+    for frame in frames:
+        np.testing.assert_array_equal(frame, expectedFrame(SENSOR_WIDTH,
+            SENSOR_HEIGHT))
+    assert list(meta['sequence']) == [0, 1, 2]
+    assert np.all(np.diff(meta['frame_id'].astype(np.int64)) == 1)
+    assert np.all(np.diff(meta['timestamp'].astype(np.int64)) > 0)
+    assert np.all(meta['valid'])
+
+def testReadFollowsAOI(camera):
+    camera.setAOI(64, 32, 16, 8)
+    camera.beginExpose('OneByOne')
+    frame = camera.read(1)[0]
+    np.testing.assert_array_equal(frame, expectedFrame(64, 32))
+
+def testReadGivesUpAfterFailedGrabs(camera):
+    camera.configureTrigger('Software')
+    camera.beginExpose('OneByOne')
+    assert camera.read(1, read_timeout_ms=10, max_grab_attempts=2) == []
+
+def testReadInto(camera):
+    buffer = np.zeros((4, SENSOR_HEIGHT, SENSOR_WIDTH), dtype=np.uint8)
+    meta = newMetadata(4)
+    camera.beginExpose('OneByOne')
+    assert camera.readInto(buffer, meta) == 4
+    for frame in buffer:
+        np.testing.assert_array_equal(frame, expectedFrame(SENSOR_WIDTH,
+            SENSOR_HEIGHT))
+    assert list(meta['sequence']) == [0, 1, 2, 3]
+    assert list(meta['width']) == [SENSOR_WIDTH]*4
+    assert list(meta['height']) == [SENSOR_HEIGHT]*4
+
+def testReadIntoRejectsWrongShape(camera):
+    buffer = np.zeros((1, SENSOR_HEIGHT, SENSOR_WIDTH//2), dtype=np.uint8)
+    camera.beginExpose('OneByOne')
+    with pytest.raises(Exception):
+        camera.readInto(buffer)
+
+def testReadIntoRejectsHostTransform(camera):
+    camera.host_transform.flip_x = True
+    buffer = np.zeros((1, SENSOR_HEIGHT, SENSOR_WIDTH), dtype=np.uint8)
+    camera.beginExpose('OneByOne')
+    with pytest.raises(Exception):
+        camera.readInto(buffer)
+
+def testFrameStoreRing(camera):
+    store = camera.setFrameStore(3)
+    camera.beginExpose('OneByOne')
+    frames = camera.read(5)
+    assert store.count == 5
+    assert len(store) == 3
+    slots = store.latest(3)
+    assert list(slots) == [2, 0, 1]
+    assert list(store.meta['sequence'][slots]) == [2, 3, 4]
+    # The last frames read are views onto the slots they were written to.
+    #
+    assert np.shares_memory(frames[-1], store.data[slots[-1]])
+    assert list(store.latest(1)) == [1]
+    store.clear()
+    assert len(store) == 0
+
+def testZeroCopyHandlesRelease(camera):
+    camera.beginExpose('OneByOne')
+    n_buffers = camera.getMaxNumBuffers()
+    handles = camera.read(2, zero_copy=True)
+    assert camera.handle_tracker.outstanding == 2
+    assert len(camera.camera.free_buffers) <= n_buffers - 2
+    np.testing.assert_array_equal(np.asarray(handles[0]),
+        expectedFrame(SENSOR_WIDTH, SENSOR_HEIGHT))
+    copy = handles[0].copy()
+    assert not np.shares_memory(copy, handles[0].array)
+    with handles[0]:
+        pass
+    assert handles[0].closed
+    handles[1].close()
+    handles[1].close()
+    assert camera.handle_tracker.outstanding == 0
+    assert camera.handle_tracker.peak == 2
+    with pytest.raises(Exception):
+        np.asarray(handles[0])
+    np.testing.assert_array_equal(copy, expectedFrame(SENSOR_WIDTH,
+        SENSOR_HEIGHT))
+
+def testZeroCopyArrayCopyKeyword(camera):
+    camera.beginExpose('OneByOne')
+    handle = camera.read(1, zero_copy=True)[0]
+    assert np.shares_memory(np.asarray(handle), handle.array)
+    assert not np.shares_memory(np.array(handle, copy=True), handle.array)
+    with pytest.raises(ValueError):
+        np.array(handle, dtype=np.float32, copy=False)
+    handle.close()
@@ -0,0 +1,69 @@
+import configparser
+import os
+
+import numpy as np
+import pytest
+
+from conftest import expectedFrame
+from reader import Recording
+from recorder import HEADER_FILENAME, RECORDING_VERSION
+
+def record(camera, path, n_frames, **kwargs):
+    camera.beginExpose('OneByOne')
+    try:
+        return camera.record(str(path), n_frames, **kwargs)
+    finally:
+        camera.endExpose()
+
+def testRecordRoundTrip(camera, tmp_path):
+    camera.setAOI(64, 32, 16, 8)
+    camera.setExposureTimeMicroseconds(2000)
+    assert record(camera, tmp_path, 10, chunk_frames=4, n_chunks=2) == 10
+    recording = Recording(str(tmp_path))
+    assert recording.version == RECORDING_VERSION
+    assert len(recording) == 10
+    assert recording.shape == (10, 32, 64)
+    assert recording.getAOI() == (64, 32, 16, 8)
+    assert recording.getPixelFormat() == 'Mono8'
+    for frame in recording:
+        np.testing.assert_array_equal(frame, expectedFrame(64, 32))
+    assert list(recording.meta['sequence']) == list(range(10))
+    assert list(recording.meta['offset_x']) == [16]*10
+    assert np.all(recording.meta['exposure_us'] == 2000)
+    assert recording.find(int(recording.meta['frame_id'][3])) == 3
+    assert recording.find(10**6) is None
+    chunks = list(recording.iterChunks(chunk_frames=4))
+    assert [index for index, frames in chunks] == [0, 4, 8]
+    assert sum(len(frames) for index, frames in chunks) == 10
+
+def testRecordingArrayCopyKeyword(camera, tmp_path):
+    record(camera, tmp_path, 2)
+    recording = Recording(str(tmp_path))
+    assert not np.shares_memory(np.array(recording, copy=True),
+        recording.data)
+    with pytest.raises(ValueError):
+        np.array(recording, dtype=np.float64, copy=False)
+
+def testRecordingCutShort(camera, tmp_path):
+    record(camera, tmp_path, 4)
+    config = configparser.ConfigParser()
+    config.read(os.path.join(str(tmp_path), HEADER_FILENAME))
+    config['RECORDING']['N_FRAMES'] = '0'
+    with open(os.path.join(str(tmp_path), HEADER_FILENAME), 'w') as f:
+        config.write(f)
+    assert len(Recording(str(tmp_path))) == 4
+
+def testRecordingRejectsUnknownVersion(camera, tmp_path):
+    record(camera, tmp_path, 1)
+    config = configparser.ConfigParser()
+    config.read(os.path.join(str(tmp_path), HEADER_FILENAME))
+    config['RECORDING']['VERSION'] = str(RECORDING_VERSION + 1)
+    with open(os.path.join(str(tmp_path), HEADER_FILENAME), 'w') as f:
+        config.write(f)
+    with pytest.raises(Exception):
+        Recording(str(tmp_path))
+    del config['RECORDING']['VERSION']
+    with open(os.path.join(str(tmp_path), HEADER_FILENAME), 'w') as f:
+        config.write(f)
+    with pytest.raises(Exception):
+        Recording(str(tmp_path))
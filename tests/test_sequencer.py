@@ -0,0 +1,51 @@
+import pytest
+
+from simulated.pylon import MAX_SEQUENCE_SETS
+
+def readSets(camera, n_frames):
+    """ Return the exposure time and sequence set of [n_frames] frames. """
+    frames, meta = camera.read(n_frames, return_meta=True)
+    assert len(frames) == n_frames
+    return [(int(m['exposure_us']), int(m['sequence_set'])) for m in meta]
+
+def testAutoAdvanceAlternatesSets(camera):
+    sequencer = camera.configureSequencer([{'EXPTIME': 1000},
+        {'EXPTIME': 3000}], executions=[2, 1])
+    assert camera.sequencer is sequencer
+    assert sequencer.isEnabled()
+    assert sequencer.tagged
+    camera.beginExpose('OneByOne')
+    assert readSets(camera, 6) == [(1000, 0), (1000, 0), (3000, 1),
+        (1000, 0), (1000, 0), (3000, 1)]
+    camera.endExpose()
+    assert camera.configureSequencer(None) is None
+    assert not sequencer.isEnabled()
+    assert camera.sequencer is None
+
+def testControlledAdvance(camera):
+    camera.configureTrigger('Software')
+    sequencer = camera.configureSequencer([{'EXPTIME': 1000},
+        {'EXPTIME': 2000}, {'EXPTIME': 3000}], advance='Controlled',
+        source='Disabled')
+    camera.beginExpose('OneByOne')
+    sets = []
+    for step in ('trigger', 'advance', 'advance', 'restart'):
+        if step == 'advance':
+            sequencer.advance()
+        elif step == 'restart':
+            sequencer.restart()
+        camera.trigger()
+        sets += readSets(camera, 1)
+    assert sets == [(1000, 0), (2000, 1), (3000, 2), (1000, 0)]
+
+def testUploadChecksTheSets(camera):
+    with pytest.raises(Exception):
+        camera.configureSequencer([{'EXPTIME': 1000}]*(MAX_SEQUENCE_SETS +
+            1))
+    with pytest.raises(Exception):
+        camera.configureSequencer([{'EXPTIME': 1000}]*2, executions=[1])
+    with pytest.raises(Exception):
+        camera.configureSequencer([{'EXPTIME': 1000}], advance='Manual')
+    camera.beginExpose('OneByOne')
+    with pytest.raises(Exception):
+        camera.configureSequencer([{'EXPTIME': 1000}])
@@ -0,0 +1,49 @@
+import pytest
+
+from simulated.pylon import READOUT_OVERHEAD_US, ROW_TIME_US
+from timing import TimingModel, payloadBytes, transmissionSeconds
+
+def testTransmissionSeconds():
+    # Two packets of 1464 payload bytes, each with 74 bytes of headers and
+    # framing, and two inter-packet delays.
+    #
+    t = transmissionSeconds(2000, 1500, 10**6, ipd=125,
+        transmission_start_delay=250, tick_frequency_hz=125*10**6)
+    assert t == pytest.approx((2000 + 2*74)/10**6 + (2*125 + 250)/125e6)
+    assert payloadBytes('Mono12p', 4) == 6
+    assert payloadBytes('Mono12', 4) == 8
+
+def testFromCameraFitsReadout(camera):
+    camera.setAOI(128, 64, 16, 8)
+    model = TimingModel.fromCamera(camera)
+    assert model.row_time_us == pytest.approx(ROW_TIME_US)
+    assert model.readout_overhead_us == pytest.approx(READOUT_OVERHEAD_US)
+    assert model.sensor_height == camera.camera.sensor_height
+    assert camera.getAOI() == (128, 64, 16, 8)
+
+@pytest.mark.parametrize('config, bottleneck', [
+    ({'EXPTIME': 20000}, 'exposure'),
+    ({'EXPTIME': 100}, 'readout'),
+    ({'EXPTIME': 100, 'PIXEL_FORMAT': 'Mono16', 'IPD': 20000},
+        'transmission'),
+    ({'EXPTIME': 100, 'FRAME_RATE': 50}, 'frame_rate')
+])
+def testModelMatchesCamera(camera, config, bottleneck):
+    model = TimingModel.fromCamera(camera)
+    camera.sendParameters(config)
+    assert model.breakdown(config)['bottleneck'] == bottleneck
+    result = model.validate(camera)
+    assert abs(result['relative_error']) < 0.01
+
+def testPlanRanksCandidates(camera):
+    model = TimingModel.fromCamera(camera)
+    candidates = model.plan(target_fps=200, duty_cycle=0.5,
+        pixel_formats=('Mono16', 'Mono8'))
+    assert [c['meets_target'] for c in candidates] == sorted(
+        [c['meets_target'] for c in candidates], reverse=True)
+    best = candidates[0]
+    assert best['meets_target']
+    assert best['config']['EXPTIME'] == 2500
+    assert best['timing']['frame_rate'] >= 200
+    with pytest.raises(Exception):
+        model.plan(duty_cycle=0.5)
@@ -0,0 +1,63 @@
+import math
+
+import pytest
+
+from transport import WIRE_OVERHEAD_BYTES, TransportTuner, loadProfile, \
+    serialNumber
+
+def newCameras(newCamera, n, **options):
+    cameras = []
+    for i in range(n):
+        camera = newCamera(interface='eth0', **options)
+        camera.setExposureTimeMicroseconds(2000)
+        cameras.append(camera)
+    return cameras
+
+def testPlanBandwidthUsesTheLinkRate(newCamera):
+    cameras = newCameras(newCamera, 2)
+    tuner = TransportTuner(cameras, headroom=0.1)
+    plan = tuner.planBandwidth()
+    cameras[0].setBandwidthReserve(20)
+    assert tuner.planBandwidth() == plan
+
+    link = tuner.linkBytesPerSecond(cameras[0])
+    wire_packet_bytes = cameras[0].getPacketSize() + WIRE_OVERHEAD_BYTES
+    share = link*0.9/2
+    tick_frequency_hz = cameras[0].getNodeValue('GevTimestampTickFrequency')
+    expected = math.ceil((wire_packet_bytes/share - wire_packet_bytes/link)*
+        tick_frequency_hz)
+    settings = [plan[serialNumber(camera)] for camera in cameras]
+    assert [s['IPD'] for s in settings] == [expected]*2
+    assert settings[0]['TRANSMISSION_START_DELAY'] == 0
+    assert settings[1]['TRANSMISSION_START_DELAY'] == round(
+        wire_packet_bytes/link*tick_frequency_hz)
+
+def testMeasureIgnoresEarlierResends(camera, monkeypatch):
+    statistic = camera.camera.StreamGrabber.Statistic_Resend_Packet_Count
+    getter = statistic.getter
+    monkeypatch.setattr(statistic, 'getter', lambda: getter() + 10**6)
+    tuner = TransportTuner([camera])
+    result = tuner.measure([camera], n_frames=5)[0]
+    assert result['resend_rate'] == 0.
+    assert result['failed_rate'] == 0.
+    assert result['fps'] > 0
+
+def testTunePicksAPacketSizeThatArrives(newCamera, tmp_path):
+    cameras = newCameras(newCamera, 2, mtu=4000)
+    tuner = TransportTuner(cameras)
+    settings = tuner.tune(n_frames=5, packet_sizes=(9000, 3000, 1500))
+    for camera in cameras:
+        serial_number = serialNumber(camera)
+        assert settings[serial_number]['PACKET_SIZE'] == 3000
+        assert camera.getPacketSize() == 3000
+        assert camera.getIPD() == settings[serial_number]['IPD']
+        assert tuner.measurements[serial_number]['failed_rate'] == 0.
+    path = str(tmp_path/'transport.ini')
+    tuner.saveProfile(path)
+    assert loadProfile(path) == settings
+
+def testTuneRaisesWhenNoPacketSizeArrives(newCamera):
+    camera = newCamera(mtu=1000)
+    with pytest.raises(Exception):
+        TransportTuner([camera]).tunePacketSize(camera, n_frames=2,
+            packet_sizes=(1500,), read_timeout_ms=50)
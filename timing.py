@@ -0,0 +1,303 @@
+import itertools
+import math
+import re
+
+import numpy as np
+
+try:
+    from .framestore import pixelFormatDtype
+    from .packed import isPacked, packedSize
+    from .transport import PACKET_HEADER_BYTES, WIRE_OVERHEAD_BYTES
+except ImportError:
+    from framestore import pixelFormatDtype
+    from packed import isPacked, packedSize
+    from transport import PACKET_HEADER_BYTES, WIRE_OVERHEAD_BYTES
+
+# Stages of a frame that can limit the frame rate, as reported in the
+# 'bottleneck' of TimingModel.breakdown().
+#
+BOTTLENECKS = ('exposure', 'readout', 'transmission', 'frame_rate')
+
+def payloadBytes(pixel_format, n_pixels):
+    """ Return the size in bytes of [n_pixels] pixels in [pixel_format]. """
+    if isPacked(pixel_format):
+        return packedSize(pixel_format, n_pixels)
+    return np.dtype(pixelFormatDtype(pixel_format)).itemsize*n_pixels
+
+def pixelFormatBits(pixel_format):
+    """ Return the bit depth of [pixel_format], e.g. 12 for Mono12p. """
+    return int(re.search(r'\d+', pixel_format).group())
+
+def transmissionSeconds(payload_bytes, packet_size, bandwidth_bytes_per_s,
+    ipd=0, transmission_start_delay=0, tick_frequency_hz=125*10**6):
+    """ Return the time to send a frame of [payload_bytes] to the host.
+
+    Packets of [packet_size] bytes leave the camera at
+    [bandwidth_bytes_per_s], each followed by the inter-packet delay [ipd];
+    the first waits for [transmission_start_delay]. Delays are in ticks.
+    """
+    n_packets = math.ceil(payload_bytes/(packet_size - PACKET_HEADER_BYTES))
+    wire_bytes = payload_bytes + n_packets*(PACKET_HEADER_BYTES +
+        WIRE_OVERHEAD_BYTES)
+    return wire_bytes/bandwidth_bytes_per_s + (n_packets*ipd +
+        transmission_start_delay)/tick_frequency_hz
+
+class TimingModel(object):
+    """ Model of a camera's frame timing, to predict the frame rate of
+    settings without applying them.
+
+    A frame is exposed, read out and transmitted. Exposure of the next frame
+    overlaps readout of the last, so the sensor delivers a frame every
+    max(exposure, readout) plus the exposure start delay, and transmission
+    overlaps both; the frame period is the longest of these and the period
+    set by AcquisitionFrameRateAbs, if enabled. Readout takes a fixed
+    overhead plus a time per row read, where a binned row may take longer
+    to read than a single one ([row_factors] maps the vertical binning to
+    the rows read per output row, relative to no binning). If the camera
+    bins on the host ([host_binning]), binning doesn't change the timing
+    and the AOI is in sensor pixels.
+
+    Settings are given as sendParameters() configs. Missing keys take the
+    values in [defaults]. Build a model for a camera with fromCamera().
+    """
+    def __init__(self, readout_overhead_us, row_time_us, link_bytes_per_s,
+        sensor_width, sensor_height, row_factors=None,
+        exposure_start_delay_us=0., tick_frequency_hz=125*10**6,
+        host_binning=False, defaults=None):
+        self.readout_overhead_us = readout_overhead_us
+        self.row_time_us = row_time_us
+        self.link_bytes_per_s = link_bytes_per_s
+        self.sensor_width = sensor_width
+        self.sensor_height = sensor_height
+        self.row_factors = row_factors or {1: 1.}
+        self.exposure_start_delay_us = exposure_start_delay_us
+        self.tick_frequency_hz = tick_frequency_hz
+        self.host_binning = host_binning
+        self.defaults = {
+            'EXPTIME': 10000,
+            'PIXEL_FORMAT': 'Mono8',
+            'BINNING_H': 1,
+            'BINNING_V': 1,
+            'IMAGE_WIDTH': sensor_width,
+            'IMAGE_HEIGHT': sensor_height,
+            'PACKET_SIZE': 1500,
+            'IPD': 0,
+            'TRANSMISSION_START_DELAY': 0,
+            'BANDWIDTH_RESERVE': 10,
+            'FRAME_RATE': 0
+        }
+        if defaults is not None:
+            self.defaults.update(defaults)
+
+    @classmethod
+    def fromCamera(cls, camera):
+        """ Calibrate a model against a connected camera that isn't
+        grabbing.
+
+        The readout overhead and row time are fitted from ReadoutTimeAbs at
+        two heights, and the row factor of each vertical binning from one
+        more reading. The camera's height and binning are restored
+        afterwards, and its current settings become the model's defaults.
+        """
+        defaults = currentConfig(camera)
+        host_binning = not camera.hasNode('BinningVertical')
+        row_factors = {1: 1.}
+        try:
+            if not host_binning:
+                camera.setNodeValue('BinningVertical', 1)
+            max_height = camera.getNode('Height').GetMax()
+            sensor_height = max_height + camera.getNodeValue('OffsetY')
+            sensor_width = (camera.getNode('Width').GetMax() +
+                camera.getNodeValue('OffsetX'))*defaults['BINNING_H']
+            readouts = []
+            for height in (max_height//2, max_height):
+                camera.setNodeValue('Height', height)
+                readouts.append((height, camera.getReadoutTime()))
+            (h1, r1), (h2, r2) = readouts
+            row_time_us = (r2 - r1)/(h2 - h1)
+            readout_overhead_us = r1 - row_time_us*h1
+            if not host_binning:
+                node = camera.getNode('BinningVertical')
+                for binning in range(2, node.GetMax() + 1):
+                    try:
+                        camera.setNodeValue('BinningVertical', binning)
+                    except Exception:
+                        continue
+                    height = camera.getNodeValue('Height')
+                    row_factors[binning] = (camera.getReadoutTime() -
+                        readout_overhead_us)/(row_time_us*height*binning)
+        finally:
+            restore = {
+                'IMAGE_HEIGHT': defaults['IMAGE_HEIGHT'],
+                'IMAGE_Y_OFFSET': defaults['IMAGE_Y_OFFSET']
+            }
+            if not host_binning:
+                restore['BINNING_V'] = defaults['BINNING_V']
+            camera.sendParameters(restore)
+
+        try:
+            link_bytes_per_s = camera.getNodeValue('GevLinkSpeed')*10**6/8
+        except Exception:
+            link_bytes_per_s = camera.getBandwidthAssigned()/(1 -
+                defaults['BANDWIDTH_RESERVE']/100.)
+        try:
+            tick_frequency_hz = camera.getNodeValue(
+                'GevTimestampTickFrequency')
+        except Exception:
+            tick_frequency_hz = 125*10**6
+        return cls(readout_overhead_us, row_time_us, link_bytes_per_s,
+            sensor_width, sensor_height, row_factors=row_factors,
+            exposure_start_delay_us=getattr(camera,
+            'EXPOSURE_START_DELAY_US', 0.), tick_frequency_hz=
+            tick_frequency_hz, host_binning=host_binning, defaults=defaults)
+
+    def breakdown(self, config=None):
+        """ Return the predicted timing of the settings in [config].
+
+        The result holds the 'exposure_s', 'exposure_start_delay_s',
+        'readout_s', 'transmission_start_delay_s', 'transmission_s' (after
+        the start delay) and 'period_s' of a frame, the 'frame_rate', the
+        'payload_bytes' and the stage that limits the frame rate, one of
+        BOTTLENECKS, as 'bottleneck'.
+        """
+        c = dict(self.defaults)
+        if config is not None:
+            c.update(config)
+        width = int(c['IMAGE_WIDTH'])
+        height = int(c['IMAGE_HEIGHT'])
+        binning_v = int(c['BINNING_V'])
+        rows = height*binning_v*self.row_factors.get(binning_v, 1.)
+        if self.host_binning:
+            rows = height
+        payload_bytes = payloadBytes(c['PIXEL_FORMAT'], width*height)
+
+        exposure_s = float(c['EXPTIME'])/10**6
+        start_delay_s = self.exposure_start_delay_us/10**6
+        readout_s = (self.readout_overhead_us + self.row_time_us*rows)/10**6
+        bandwidth = self.link_bytes_per_s*(1 -
+            float(c['BANDWIDTH_RESERVE'])/100)
+        transmission_start_delay_s = float(c['TRANSMISSION_START_DELAY'])/\
+            self.tick_frequency_hz
+        transmission_s = transmissionSeconds(payload_bytes,
+            int(c['PACKET_SIZE']), bandwidth, ipd=int(c['IPD']),
+            tick_frequency_hz=self.tick_frequency_hz)
+
+        limits = {
+            'exposure': exposure_s + start_delay_s,
+            'readout': readout_s + start_delay_s,
+            'transmission': transmission_start_delay_s + transmission_s,
+            'frame_rate': 1./float(c['FRAME_RATE']) if float(
+                c['FRAME_RATE']) > 0 else 0.
+        }
+        bottleneck = max(BOTTLENECKS, key=lambda k: limits[k])
+        period_s = limits[bottleneck]
+        return {
+            'exposure_s': exposure_s,
+            'exposure_start_delay_s': start_delay_s,
+            'readout_s': readout_s,
+            'transmission_start_delay_s': transmission_start_delay_s,
+            'transmission_s': transmission_s,
+            'period_s': period_s,
+            'frame_rate': 1./period_s,
+            'payload_bytes': payload_bytes,
+            'bottleneck': bottleneck
+        }
+
+    def plan(self, target_fps=None, duty_cycle=None, aoi=None,
+        binnings=(1, 2), pixel_formats=('Mono12', 'Mono12p', 'Mono8'),
+        packet_sizes=(1500,), config=None):
+        """ Return candidate settings ranked best first.
+
+        [aoi] is the (width, height) to cover in unbinned sensor pixels,
+        the whole sensor by default. Every combination of [binnings],
+        [pixel_formats] and [packet_sizes] is modelled on top of [config].
+        If [duty_cycle] is given, the exposure is set to that fraction of
+        the target frame period.
+
+        Each candidate is a dict with the sendParameters() 'config', its
+        'timing' from breakdown() and whether it 'meets_target'. Candidates
+        that reach [target_fps] come first, preferring the least binning,
+        then the greatest bit depth, then the highest frame rate; the rest,
+        and all candidates if there is no target, are ranked by frame rate.
+        """
+        base = dict(config or {})
+        if duty_cycle is not None:
+            if target_fps is None:
+                raise Exception("A duty cycle needs a target frame rate.")
+            base['EXPTIME'] = int(duty_cycle*10**6/target_fps)
+        width, height = aoi or (self.sensor_width, self.sensor_height)
+
+        rtn = []
+        for binning, pixel_format, packet_size in itertools.product(
+            binnings, pixel_formats, packet_sizes):
+            if self.host_binning:
+                w, h = width, height
+            else:
+                w, h = width//binning//16*16, height//binning
+            c = dict(base)
+            c.update({
+                'PIXEL_FORMAT': pixel_format,
+                'BINNING_H': binning,
+                'BINNING_V': binning,
+                'IMAGE_WIDTH': w,
+                'IMAGE_HEIGHT': h,
+                'PACKET_SIZE': packet_size
+            })
+            try:
+                timing = self.breakdown(c)
+            except Exception:
+                continue
+            rtn.append({
+                'config': c,
+                'timing': timing,
+                'meets_target': target_fps is None or
+                    timing['frame_rate'] >= target_fps
+            })
+        if target_fps is None:
+            rtn.sort(key=lambda r: -r['timing']['frame_rate'])
+        else:
+            rtn.sort(key=lambda r: (False, r['config']['BINNING_H'],
+                -pixelFormatBits(r['config']['PIXEL_FORMAT']),
+                -r['timing']['frame_rate']) if r['meets_target'] else
+                (True, 0, 0, -r['timing']['frame_rate']))
+        return rtn
+
+    def validate(self, camera):
+        """ Compare the predicted frame rate of [camera]'s current settings
+        with its ResultingFrameRateAbs. Returns the 'predicted_fps',
+        'measured_fps' and their 'relative_error'.
+        """
+        predicted = self.breakdown(currentConfig(camera))['frame_rate']
+        measured = camera.getFrameRate()
+        return {
+            'predicted_fps': predicted,
+            'measured_fps': measured,
+            'relative_error': (predicted - measured)/measured
+        }
+
+def currentConfig(camera):
+    """ Return a Basler camera's current timing-related settings as a
+    sendParameters() config.
+    """
+    w, h, x_offset, y_offset = camera.getAOI()
+    frame_rate = 0
+    try:
+        if camera.getNodeValue('AcquisitionFrameRateEnable'):
+            frame_rate = camera.getNodeValue('AcquisitionFrameRateAbs')
+    except Exception:
+        pass
+    return {
+        'EXPTIME': camera.getExposureTimeMicroseconds(),
+        'PIXEL_FORMAT': camera.getPixelFormat(),
+        'BINNING_H': camera.getBinningHorizontal() or 1,
+        'BINNING_V': camera.getBinningVertical() or 1,
+        'IMAGE_WIDTH': w,
+        'IMAGE_HEIGHT': h,
+        'IMAGE_X_OFFSET': x_offset,
+        'IMAGE_Y_OFFSET': y_offset,
+        'PACKET_SIZE': camera.getPacketSize(),
+        'IPD': camera.getIPD() or 0,
+        'TRANSMISSION_START_DELAY': camera.getTransmissionStartDelay() or 0,
+        'BANDWIDTH_RESERVE': camera.getBandwidthReserve() or 0,
+        'FRAME_RATE': frame_rate
+    }
@@ -0,0 +1,228 @@
+import configparser
+import math
+import time
+
+# Packet sizes tried by TransportTuner.tunePacketSize(), largest first. Sizes
+# above 1500 bytes need jumbo frames on every hop between camera and host.
+#
+PACKET_SIZES = (9000, 8192, 6000, 4000, 3000, 1500)
+
+# Bytes a GigE Vision stream packet carries on the wire besides its payload
+# (Ethernet framing and preamble), and the IP/UDP/GVSP headers counted in
+# GevSCPSPacketSize.
+#
+WIRE_OVERHEAD_BYTES = 38
+PACKET_HEADER_BYTES = 36
+
+# Prefix of the profile sections holding each camera's settings.
+#
+PROFILE_SECTION_PREFIX = 'CAMERA_'
+
+def loadProfile(path):
+    """ Return the transport settings saved by TransportTuner.saveProfile()
+    as a dict mapping serial numbers to sendParameters() configs.
+    """
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    if not config.read(path):
+        raise Exception("Could not read transport profile: " + str(path))
+    rtn = {}
+    for section in config.sections():
+        if section.startswith(PROFILE_SECTION_PREFIX):
+            rtn[section[len(PROFILE_SECTION_PREFIX):]] = {k: int(v) for k, v
+                in config[section].items()}
+    return rtn
+
+def serialNumber(camera):
+    """ Return the serial number of a connected Basler camera. """
+    return str(camera.camera.GetDeviceInfo().GetSerialNumber())
+
+class TransportTuner(object):
+    """ Choose GigE transport settings for Basler cameras sharing a network
+    interface.
+
+    Each camera is first tuned on its own: packet sizes are tried from
+    largest to smallest, and the first one that streams without failed
+    frames is kept, along with a bandwidth reserve that covers the resends
+    seen. The link is then split between the cameras in proportion to the
+    data rate each needs. A camera's share is enforced with the
+    inter-packet delay (GevSCPD), and transmission start delays (GevSCFTD)
+    stagger the cameras by one packet each, so that with a common trigger
+    their packets interleave rather than collide.
+
+    [cameras] is a list of connected Basler instances. [link_bytes_per_s]
+    is used if the cameras don't report their link speed, and [headroom] is
+    the fraction of the link left unused.
+    """
+    def __init__(self, cameras, link_bytes_per_s=125*10**6, headroom=0.05,
+        max_failed_rate=0., min_reserve=1, max_reserve=26):
+        self.cameras = list(cameras)
+        self.link_bytes_per_s = link_bytes_per_s
+        self.headroom = headroom
+        self.max_failed_rate = max_failed_rate
+        self.min_reserve = min_reserve
+        self.max_reserve = max_reserve
+        self.settings = {}
+        self.measurements = {}
+
+    def apply(self, camera, settings):
+        """ Write transport [settings] to [camera] with sendParameters(). """
+        return camera.sendParameters(settings)
+
+    def linkBytesPerSecond(self, camera):
+        """ Return the link rate of [camera] in bytes/s. """
+        try:
+            return camera.getNodeValue('GevLinkSpeed')*10**6//8
+        except Exception:
+            return self.link_bytes_per_s
+
+    def measure(self, cameras, n_frames=50, read_timeout_ms=1000):
+        """ Grab [n_frames] frames from each of [cameras] at once and return
+        a dict of results per camera: 'fps', 'bytes_per_s', 'failed_rate'
+        (failed grabs per grab) and 'resend_rate' (resent packets per packet).
+
+        The driver's stream statistics count from when the stream grabber was
+        opened, so packet counts are taken as the difference between
+        snapshots either side of the measurement.
+        """
+        streams_before = []
+        for camera in cameras:
+            camera.beginExpose('OneByOne')
+            streams_before.append(camera.stats(reset=True)['stream'])
+        start = time.perf_counter()
+        try:
+            n_grabs = 0
+            while n_grabs < n_frames:
+                for camera in cameras:
+                    camera.read(1, read_timeout_ms=read_timeout_ms,
+                        max_grab_attempts=1)
+                n_grabs += 1
+            elapsed = time.perf_counter() - start
+            snapshots = [camera.stats() for camera in cameras]
+        finally:
+            for camera in cameras:
+                camera.endExpose()
+
+        rtn = []
+        for camera, snapshot, stream_before in zip(cameras, snapshots,
+            streams_before):
+            n_grabbed = snapshot['frames'] + snapshot['failed']
+            stream = {name: value - stream_before.get(name, 0) for name, value
+                in snapshot['stream'].items()}
+            n_packets = stream.get('Statistic_Total_Packet_Count', 0)
+            rtn.append({
+                'fps': snapshot['frames']/elapsed,
+                'bytes_per_s': snapshot['frames']*camera.getPayloadSize()/
+                    elapsed,
+                'failed_rate': snapshot['failed']/max(n_grabbed, 1),
+                'resend_rate': stream.get('Statistic_Resend_Packet_Count',
+                    0)/max(n_packets, 1)
+            })
+        return rtn
+
+    def planBandwidth(self):
+        """ Split the link between the cameras in proportion to the wire
+        rate each needs at its current frame rate, and return the IPD and
+        transmission start delay settings per serial number, in ticks.
+        """
+        demands = []
+        for camera in self.cameras:
+            packet_size = camera.getPacketSize()
+            n_packets = math.ceil(camera.getPayloadSize()/(packet_size -
+                PACKET_HEADER_BYTES))
+            wire_packet_bytes = packet_size + WIRE_OVERHEAD_BYTES
+            demands.append((wire_packet_bytes, n_packets*wire_packet_bytes*
+                camera.getFrameRate()))
+
+        rtn = {}
+        total = sum(d[1] for d in demands)
+        start_delay_s = 0.
+        for camera, (wire_packet_bytes, demand) in zip(self.cameras,
+            demands):
+            link = self.linkBytesPerSecond(camera)
+            usable = link*(1 - self.headroom)
+            share = usable*demand/total
+            try:
+                tick_frequency_hz = camera.getNodeValue(
+                    'GevTimestampTickFrequency')
+            except Exception:
+                tick_frequency_hz = 125*10**6
+            # The time a packet takes on the wire, which the IPD adds to.
+            # Not from the bandwidth assigned, which this plan changes.
+            #
+            sending_s = wire_packet_bytes/link
+            ipd = max(0, math.ceil((wire_packet_bytes/share - sending_s)*
+                tick_frequency_hz))
+            rtn[serialNumber(camera)] = {
+                'IPD': ipd,
+                'TRANSMISSION_START_DELAY': int(round(start_delay_s*
+                    tick_frequency_hz))
+            }
+            start_delay_s += wire_packet_bytes/link
+        return rtn
+
+    def saveProfile(self, path):
+        """ Save the tuned settings, one section per camera, so they can be
+        reapplied with loadProfile() and Basler.sendParameters().
+        """
+        config = configparser.ConfigParser()
+        config.optionxform = str
+        for serial_number, settings in self.settings.items():
+            config[PROFILE_SECTION_PREFIX + serial_number] = {k: str(v) for
+                k, v in settings.items()}
+        with open(path, 'w') as f:
+            config.write(f)
+
+    def tune(self, n_frames=50, packet_sizes=PACKET_SIZES,
+        read_timeout_ms=1000):
+        """ Tune every camera and return the settings per serial number.
+
+        The results of the final measurement, with all cameras streaming
+        together, are kept in [measurements].
+        """
+        for camera in self.cameras:
+            self.settings[serialNumber(camera)] = self.tunePacketSize(camera,
+                n_frames, packet_sizes, read_timeout_ms)
+        for serial_number, settings in self.planBandwidth().items():
+            self.settings[serial_number].update(settings)
+        for camera in self.cameras:
+            self.apply(camera, self.settings[serialNumber(camera)])
+        results = self.measure(self.cameras, n_frames, read_timeout_ms)
+        self.measurements = {serialNumber(camera): result for camera, result
+            in zip(self.cameras, results)}
+        return self.settings
+
+    def tunePacketSize(self, camera, n_frames=50, packet_sizes=PACKET_SIZES,
+        read_timeout_ms=1000):
+        """ Return the largest packet size in [packet_sizes] that [camera]
+        streams on its own with no more than [max_failed_rate] failed
+        grabs, with a bandwidth reserve covering the resends measured.
+
+        Transmission is unthrottled while measuring. Sizes above the
+        camera's maximum are skipped.
+        """
+        try:
+            maximum = camera.getNode('GevSCPSPacketSize').GetMax()
+        except Exception:
+            maximum = max(packet_sizes)
+        self.apply(camera, {
+            'IPD': 0,
+            'TRANSMISSION_START_DELAY': 0,
+            'BANDWIDTH_RESERVE': self.max_reserve
+        })
+        for packet_size in sorted(packet_sizes, reverse=True):
+            if packet_size > maximum:
+                continue
+            self.apply(camera, {'PACKET_SIZE': packet_size})
+            result = self.measure([camera], n_frames, read_timeout_ms)[0]
+            if result['failed_rate'] <= self.max_failed_rate:
+                reserve = min(self.max_reserve, max(self.min_reserve,
+                    math.ceil(2*result['resend_rate']*100)))
+                settings = {
+                    'PACKET_SIZE': packet_size,
+                    'BANDWIDTH_RESERVE': reserve
+                }
+                self.apply(camera, settings)
+                return settings
+        raise Exception("No packet size streamed without failures from " +
+            "camera " + serialNumber(camera) + ".")